@@ -0,0 +1,167 @@
+import bpy
+import math
+import hashlib
+import numpy as np
+from datablocks import tag, SHARED
+
+
+class ActionLibrary:
+    """
+    Shared, normalized Actions for the repeated motion patterns (grow, bloom,
+    pop, sway, wobble, spin, wiggle, flap).
+    Objects no longer own private keyframes for these: each one gets an NLA
+    strip that plays a shared Action with its own time offset, time scale
+    and influence, while its rest pose lives in its delta transforms. Action
+    and F-curve count grows with the number of pattern buckets, not objects.
+    """
+
+    # Property -> delta property holding the per-object rest value
+    DELTA_PATHS = {
+        "location": "delta_location",
+        "rotation_euler": "delta_rotation_euler",
+        "scale": "delta_scale",
+    }
+
+    # Sine buckets: 4 period buckets per octave, amplitude rounded up to a power of 2
+    PERIOD_BUCKETS_PER_OCTAVE = 4
+    SAMPLES_PER_PERIOD = 12
+    # Normalized key values are rounded to this many decimals before sharing
+    VALUE_DECIMALS = 3
+
+    def __init__(self, prefix="Forest_Pattern"):
+        self.prefix = prefix
+        # Bucket key -> Action (mirrors bpy.data, saves the name lookups)
+        self._actions = {}
+        self.strip_count = 0
+
+    def supports(self, id_data, data_path):
+        """Only object transforms can move their rest value into delta transforms."""
+        return isinstance(id_data, bpy.types.Object) and data_path in self.DELTA_PATHS
+
+    # ============ SHARED ACTIONS ============
+
+    def get_action(self, pattern, data_path, indices, frames, values):
+        """
+        Returns the shared Action keying data_path[indices] with frames
+        (starting at 0) and values (one column per index), creating it once.
+        """
+        frames = np.asarray(frames, dtype=np.float64)
+        values = np.round(np.asarray(values, dtype=np.float64), self.VALUE_DECIMALS) + 0.0
+        digest = hashlib.sha1()
+        digest.update(f"{pattern}|{data_path}|{tuple(indices)}".encode("utf-8"))
+        digest.update(np.round(frames, 3).tobytes())
+        digest.update(values.tobytes())
+        key = digest.hexdigest()[:12]
+
+        action = self._actions.get(key)
+        if action is not None:
+            return action
+
+        name = f"{self.prefix}_{pattern}_{key}"
+        action = bpy.data.actions.get(name)
+        if action is None:
+            action = tag(bpy.data.actions.new(name=name), SHARED)
+            action.use_fake_user = True  # Kept between runs even with no strip using it
+            for column, index in enumerate(indices):
+                fcurve = action.fcurves.new(data_path, index=index, action_group="Object Transforms")
+                co = np.empty(len(frames) * 2, dtype=np.float32)
+                co[0::2] = frames
+                co[1::2] = values[:, column]
+                fcurve.keyframe_points.add(len(frames))
+                fcurve.keyframe_points.foreach_set("co", co)
+                fcurve.update()
+        self._actions[key] = action
+        return action
+
+    # ============ STRIPS ============
+
+    def add_strip(self, id_data, pattern, action, frame_start, blend_type, extrapolation):
+        """Puts an action on its own NLA track of the object (strips on one track may not overlap)."""
+        anim_data = id_data.animation_data or id_data.animation_data_create()
+        track = anim_data.nla_tracks.new()
+        track.name = pattern
+        strip = track.strips.new(pattern, int(frame_start), action)
+        strip.blend_type = blend_type
+        strip.extrapolation = extrapolation
+        self.strip_count += 1
+        return strip
+
+    def set_influence(self, strip, influence):
+        """Per-object amplitude: a constant animated influence on the strip."""
+        if influence >= 1.0:
+            return
+        strip.use_animated_influence = True
+        curve = strip.fcurves.find("influence")
+        # insert() on an existing frame replaces the key's value
+        curve.keyframe_points.insert(strip.frame_start, influence)
+
+    def move_rest_to_delta(self, id_data, data_path, index, rest):
+        """Stores the object's rest value in its delta transform and clears the animated one."""
+        delta = getattr(id_data, self.DELTA_PATHS[data_path])
+        channel = getattr(id_data, data_path)
+        if data_path == "scale":
+            delta[index] = rest
+            channel[index] = 1.0
+        else:
+            delta[index] += rest
+            channel[index] = 0.0
+
+    def add_keys(self, id_data, data_path, indices, frames, values, pattern):
+        """
+        Plays keyed motion (ramps such as grow/bloom/spin) through a shared Action.
+        Scale is normalized by its final value, location/rotation by their first.
+
+        Returns:
+            bool: False when the motion cannot be normalized (caller keys it privately)
+        """
+        frames = np.asarray(frames, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(frames), len(indices))
+        if data_path == "scale":
+            rest = values[-1]
+            if np.any(np.abs(rest) < 1e-9):
+                return False
+            normalized = values / rest
+        else:
+            rest = values[0]
+            normalized = values - rest
+
+        action = self.get_action(pattern, data_path, indices, frames - frames[0], normalized)
+        for column, index in enumerate(indices):
+            self.move_rest_to_delta(id_data, data_path, index, rest[column])
+        self.add_strip(id_data, pattern, action, frames[0], 'REPLACE', 'HOLD')
+        return True
+
+    def add_sine(self, id_data, data_path, index, base, amplitude, frequency,
+                 frame_start, frame_end, phase=0.0, pattern="sine"):
+        """
+        Plays base + amplitude * sin(frequency * (frame - frame_start) + phase)
+        through a shared unit-period sine Action:
+            period    -> strip time scale (exact) over a bucketed Action period
+            amplitude -> strip influence over a power-of-two Action amplitude
+            phase     -> offset into the Action's two baked periods
+        """
+        self.move_rest_to_delta(id_data, data_path, index, base)
+        if amplitude == 0 or frequency <= 0 or frame_end <= frame_start:
+            return
+
+        period = 2 * math.pi / frequency
+        octaves = round(math.log2(period) * self.PERIOD_BUCKETS_PER_OCTAVE) / self.PERIOD_BUCKETS_PER_OCTAVE
+        bucket_period = 2.0 ** octaves
+        bucket_amplitude = 2.0 ** math.ceil(math.log2(abs(amplitude)))
+
+        # Two baked periods so any phase can start a full cycle
+        samples = 2 * self.SAMPLES_PER_PERIOD
+        frames = np.linspace(0.0, 2 * bucket_period, samples + 1)
+        values = bucket_amplitude * np.sin(2 * math.pi * frames / bucket_period)
+        action = self.get_action(f"sine_{data_path}", data_path, (index,), frames, values[:, None])
+
+        offset = (phase % (2 * math.pi)) / (2 * math.pi) * bucket_period
+        if amplitude < 0:
+            offset = (offset + bucket_period / 2) % bucket_period  # Negative amplitude = half-period shift
+
+        strip = self.add_strip(id_data, pattern, action, frame_start, 'ADD', 'NOTHING')
+        strip.action_frame_start = offset
+        strip.action_frame_end = offset + bucket_period
+        strip.scale = period / bucket_period
+        strip.repeat = (frame_end - frame_start) / period
+        self.set_influence(strip, abs(amplitude) / bucket_amplitude)
@@ -0,0 +1,238 @@
+import bpy
+import numpy as np
+import profiler
+from datablocks import tag
+from action_library import ActionLibrary
+
+
+class KeyframeWriter:
+    """
+    Bulk keyframe writer.
+    Generators hand over whole channels as NumPy arrays (frames + values)
+    instead of calling keyframe_insert once per frame. flush() then creates
+    each F-curve once and fills it with ONE keyframe_points.add(n) +
+    foreach_set("co", ...) pass - roughly one RNA call per curve.
+
+    In procedural mode, sine motion (wind sway, wobble, wiggle) is not baked
+    at all: the channel gets a single rest key plus a Function Generator
+    F-curve modifier, so key count no longer grows with timeline length.
+
+    In nla mode, channels queued with a pattern name (grow, sway, ...) are
+    played from shared ActionLibrary Actions through per-object NLA strips;
+    only one-off motion (flight paths, the sun) keeps private keyframes.
+    """
+
+    MODES = ("baked", "procedural", "nla")
+
+    def __init__(self, procedural=False, mode=None):
+        """
+        Args:
+            procedural: Shorthand for mode="procedural"
+            mode: One of MODES (overrides procedural)
+        """
+        mode = mode or ("procedural" if procedural else "baked")
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown animation mode '{mode}', expected one of {self.MODES}")
+        self.mode = mode
+        self.procedural = mode == "procedural"
+        # Shared pattern Actions (nla mode only)
+        self.actions = ActionLibrary() if mode == "nla" else None
+        # Queued pattern strips: (method, args, kwargs) replayed on flush
+        self._patterns = []
+        # (pointer, data_path, index) -> [id_data, [frame chunks], [value chunks]]
+        self._channels = {}
+        # Queued sine modifiers: (id_data, data_path, index, parameters)
+        self._modifiers = []
+
+    def uses_pattern(self, id_data, data_path, pattern):
+        """True when a channel should play a shared NLA pattern instead of private keys."""
+        return pattern is not None and self.actions is not None and self.actions.supports(id_data, data_path)
+
+    def add(self, id_data, data_path, frames, values, index=0, pattern=None):
+        """
+        Queues keyframes for one channel (one F-curve).
+        Later keys on the same frame replace earlier ones, like keyframe_insert.
+
+        Args:
+            id_data: Object (or other ID such as light data) to animate
+            data_path: RNA path, e.g. "rotation_euler"
+            frames: Frame numbers (scalar or array)
+            values: Values per frame (scalar broadcasts over frames)
+            index: Array index of the property (0=x, 1=y, 2=z)
+            pattern: Motion pattern name ("spin", "flap", ...) shared in nla mode
+        """
+        frames = np.atleast_1d(np.asarray(frames, dtype=np.float64))
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), frames.shape)
+        if self.uses_pattern(id_data, data_path, pattern):
+            self._patterns.append(("keys", id_data, data_path, (index,), frames, values[:, None], pattern))
+            return
+
+        key = (id_data.as_pointer(), data_path, index)
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = [id_data, [], []]
+        channel[1].append(frames)
+        channel[2].append(values)
+
+    def add_vector(self, id_data, data_path, frames, values, indices=(0, 1, 2), pattern=None):
+        """
+        Queues keyframes for several components of a vector property at once.
+
+        Args:
+            id_data: Object to animate
+            data_path: RNA path, e.g. "location"
+            frames: Frame numbers, shape (n,)
+            values: Values, shape (n, len(indices))
+            indices: Which array indices the value columns belong to
+            pattern: Motion pattern name ("grow", "bloom", ...) shared in nla mode
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        if self.uses_pattern(id_data, data_path, pattern):
+            frames = np.atleast_1d(np.asarray(frames, dtype=np.float64))
+            self._patterns.append(("keys", id_data, data_path, tuple(indices), frames, values, pattern))
+            return
+        for column, index in enumerate(indices):
+            self.add(id_data, data_path, frames, values[:, column], index=index)
+
+    def add_sine(self, id_data, data_path, index, base, amplitude, frequency,
+                 frame_start, frame_end, phase=0.0, step=5, pattern=None):
+        """
+        Queues a sine oscillation around a rest value:
+            value(frame) = base + amplitude * sin(frequency * (frame - frame_start) + phase)
+
+        Baked mode samples it every `step` frames; procedural mode stores it
+        as a Function Generator modifier restricted to the frame range.
+
+        Args:
+            id_data: Object to animate
+            data_path: RNA path, e.g. "rotation_euler"
+            index: Array index of the property
+            base: Rest value the oscillation is added to
+            amplitude: Peak offset from the rest value
+            frequency: Angular speed in radians per frame
+            frame_start: First animated frame
+            frame_end: Last animated frame
+            phase: Phase at frame_start (radians)
+            step: Sampling interval in baked mode
+            pattern: Motion pattern name ("sway", "wobble", ...) shared in nla mode
+        """
+        if self.uses_pattern(id_data, data_path, pattern):
+            self._patterns.append(("sine", id_data, data_path, index, base, amplitude, frequency,
+                                   frame_start, frame_end, phase, pattern))
+            return
+
+        if self.procedural:
+            # One rest key; the modifier adds the motion on top
+            self.add(id_data, data_path, frame_start, base, index=index)
+            self._modifiers.append((id_data, data_path, index, {
+                "amplitude": amplitude,
+                "phase_multiplier": frequency,
+                "phase_offset": phase - frequency * frame_start,
+                "frame_start": frame_start,
+                "frame_end": frame_end,
+            }))
+            return
+
+        frames = np.arange(frame_start, frame_end + 1, step)
+        values = base + amplitude * np.sin(frequency * (frames - frame_start) + phase)
+        self.add(id_data, data_path, frames, values, index=index)
+
+    def flush(self):
+        """
+        Writes every queued channel into its F-curve.
+
+        Returns:
+            int: Number of keyframes written
+        """
+        with profiler.phase("keyframing"):
+            total = 0
+            for (_, data_path, index), (id_data, frame_chunks, value_chunks) in self._channels.items():
+                frames = np.concatenate(frame_chunks)
+                values = np.concatenate(value_chunks)
+
+                # Sort by frame; on duplicate frames keep the LAST queued value
+                order = np.argsort(frames, kind="stable")
+                frames = frames[order]
+                values = values[order]
+                keep = np.append(frames[1:] != frames[:-1], True)
+
+                total += self.write_fcurve(id_data, data_path, index, frames[keep], values[keep])
+
+            for id_data, data_path, index, parameters in self._modifiers:
+                self.add_sine_modifier(self.get_fcurve(id_data, data_path, index), **parameters)
+
+            # Ramps (REPLACE strips) go below the additive sine strips
+            self._patterns.sort(key=lambda queued: queued[0] == "sine")
+            for queued in self._patterns:
+                if queued[0] == "sine":
+                    self.actions.add_sine(*queued[1:])
+                elif not self.actions.add_keys(*queued[1:]):
+                    # Not normalizable (zero final scale) - key it privately
+                    _, id_data, data_path, indices, frames, values, _ = queued
+                    for column, index in enumerate(indices):
+                        total += self.write_fcurve(id_data, data_path, index, frames, values[:, column])
+
+            self._channels.clear()
+            self._modifiers.clear()
+            self._patterns.clear()
+        profiler.count("keyframes", total)
+        return total
+
+    def get_fcurve(self, id_data, data_path, index):
+        """Finds or creates the F-curve for a channel (creating the Action if needed)."""
+        anim_data = id_data.animation_data or id_data.animation_data_create()
+        action = anim_data.action
+        if action is None:
+            action = tag(bpy.data.actions.new(name=f"{id_data.name}Action"))
+            anim_data.action = action
+
+        fcurve = action.fcurves.find(data_path, index=index)
+        if fcurve is None:
+            # Same group keyframe_insert uses for object transforms
+            group = "Object Transforms" if isinstance(id_data, bpy.types.Object) else ""
+            fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+        return fcurve
+
+    def write_fcurve(self, id_data, data_path, index, frames, values):
+        """
+        Fills one F-curve in a single bulk pass.
+        Any keys already on the curve are replaced.
+
+        Returns:
+            int: Number of keyframes written
+        """
+        fcurve = self.get_fcurve(id_data, data_path, index)
+        points = fcurve.keyframe_points
+        if len(points):
+            fcurve.id_data.fcurves.remove(fcurve)
+            fcurve = self.get_fcurve(id_data, data_path, index)
+            points = fcurve.keyframe_points
+
+        count = len(frames)
+        co = np.empty(count * 2, dtype=np.float32)
+        co[0::2] = frames
+        co[1::2] = values
+
+        points.add(count)
+        points.foreach_set("co", co)
+        # Recalculate auto-clamped Bezier handles (what keyframe_insert gives)
+        fcurve.update()
+        return count
+
+    def add_sine_modifier(self, fcurve, amplitude, phase_multiplier, phase_offset,
+                          frame_start, frame_end, blend=5):
+        """Adds an additive SIN Function Generator, active only inside the frame range."""
+        modifier = fcurve.modifiers.new(type='FNGENERATOR')
+        modifier.function_type = 'SIN'
+        modifier.use_additive = True
+        modifier.amplitude = amplitude
+        modifier.phase_multiplier = phase_multiplier
+        modifier.phase_offset = phase_offset
+        modifier.value_offset = 0.0
+
+        # Ease out after the last frame instead of popping back to rest
+        modifier.use_restricted_range = True
+        modifier.frame_start = frame_start
+        modifier.frame_end = frame_end + blend
+        modifier.blend_out = blend
+        return modifier
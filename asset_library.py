@@ -0,0 +1,215 @@
+import bpy
+import os
+import json
+import time
+import hashlib
+import palettes
+import shading
+from templates import MeshTemplateLibrary
+
+
+class AssetLibrary:
+    """
+    Persistent cross-session cache of template meshes and category materials.
+    The datablocks are written to a .blend file once, next to a JSON index
+    keyed by a fingerprint of everything they are built from (template
+    specs, palettes, shading kinds). Later runs - and fresh Blender
+    sessions - append (or link) them from disk instead of rebuilding them
+    with bmesh and node-tree calls. Changing any input changes the
+    fingerprint, so a stale library is simply never matched and a new one
+    is built.
+    """
+
+    # Bump when a builder (bmesh recipe, material node layout) changes in a
+    # way the parameter tables below do not capture
+    LIBRARY_VERSION = 1
+
+    # Custom property stamped on every library datablock
+    FINGERPRINT_PROP = "forest_asset_fingerprint"
+
+    def __init__(self, templates, material_engine, directory=None, name="forest_assets",
+                 link=False, max_entries=4):
+        """
+        Args:
+            templates: MeshTemplateLibrary whose meshes are cached
+            material_engine: MaterialAssigner whose category materials are cached
+            directory: Where the .blend files and index live (default: asset_cache/ next to this script)
+            name: Base name of the index and library files
+            link: Link datablocks (read-only, shared with the file) instead of appending
+            max_entries: Library files kept on disk before the oldest are pruned
+        """
+        self.templates = templates
+        self.material_engine = material_engine
+        if directory is None:
+            directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "asset_cache")
+        self.directory = directory
+        self.name = name
+        self.link = link
+        self.max_entries = max_entries
+
+    # ============ FINGERPRINT & INDEX ============
+
+    @classmethod
+    def fingerprint(cls):
+        """
+        Hash of every generator parameter the cached datablocks depend on.
+
+        Returns:
+            str: sha256 hex digest
+        """
+        params = {
+            "version": cls.LIBRARY_VERSION,
+            "templates": MeshTemplateLibrary.TEMPLATE_SPECS,
+            "palettes": {
+                name: value for name, value in vars(palettes).items()
+                if name.isupper()
+            },
+            "shading_kinds": shading.SHADING_KINDS,
+            "shading_inputs": shading.SHADING_INPUTS,
+            "shading_defaults": shading.DEFAULTS,
+        }
+        # default=list turns palette tuples into plain JSON arrays
+        blob = json.dumps(params, sort_keys=True, default=list)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, f"{self.name}.json")
+
+    def library_path(self, fingerprint):
+        return os.path.join(self.directory, f"{self.name}_{fingerprint[:16]}.blend")
+
+    def read_index(self):
+        """Returns the JSON index ({"entries": {fingerprint: entry}}), empty when missing or unreadable."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as handle:
+                index = json.load(handle)
+        except (OSError, ValueError):
+            return {"entries": {}}
+        index.setdefault("entries", {})
+        return index
+
+    def write_index(self, index):
+        """
+        Writes the index atomically (a crashed write never leaves half a
+        file). The temp file is per process, so concurrent writers never
+        clobber each other's half-written file; the last replace wins.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(index, handle, indent=2, sort_keys=True)
+        os.replace(temp_path, self.index_path)
+
+    def lookup(self, fingerprint):
+        """Returns the index entry for a fingerprint if its .blend still exists, else None."""
+        entry = self.read_index()["entries"].get(fingerprint)
+        if entry is None or not os.path.exists(entry["file"]):
+            return None
+        return entry
+
+    # ============ DATABLOCKS ============
+
+    def material_names(self):
+        return [self.material_engine.category_material_name(kind) for kind in shading.SHADING_KINDS]
+
+    def mesh_names(self):
+        return [self.templates.mesh_name(template) for template in MeshTemplateLibrary.TEMPLATE_SPECS]
+
+    def is_current(self, datablock, fingerprint):
+        return datablock is not None and datablock.get(self.FINGERPRINT_PROP) == fingerprint
+
+    def discard_stale(self, collection, names, fingerprint):
+        """Removes in-session datablocks built from other parameters so they cannot shadow the library."""
+        for name in names:
+            datablock = collection.get(name)
+            if datablock is not None and not self.is_current(datablock, fingerprint):
+                collection.remove(datablock)
+
+    def build(self, fingerprint):
+        """
+        Builds every template mesh and category material in this session and
+        writes them to a new library file.
+
+        Returns:
+            dict: The new index entry
+        """
+        self.discard_stale(bpy.data.meshes, self.mesh_names(), fingerprint)
+        self.discard_stale(bpy.data.materials, self.material_names(), fingerprint)
+
+        meshes = [self.templates.get_mesh(template) for template in MeshTemplateLibrary.TEMPLATE_SPECS]
+        materials = [self.material_engine.category_material(kind) for kind in shading.SHADING_KINDS]
+        for datablock in meshes + materials:
+            datablock[self.FINGERPRINT_PROP] = fingerprint
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.library_path(fingerprint)
+        # fake_user keeps the datablocks alive inside the library file
+        bpy.data.libraries.write(path, set(meshes + materials), fake_user=True, compress=True)
+
+        entry = {
+            "file": path,
+            "meshes": [mesh.name for mesh in meshes],
+            "materials": [material.name for material in materials],
+            "version": self.LIBRARY_VERSION,
+            "created": time.time(),
+        }
+        index = self.read_index()
+        index["entries"][fingerprint] = entry
+        self.prune(index, keep=fingerprint)
+        self.write_index(index)
+        return entry
+
+    def prune(self, index, keep):
+        """Drops the oldest library files beyond max_entries (never the one in use)."""
+        entries = index["entries"]
+        by_age = sorted(entries, key=lambda fp: entries[fp].get("created", 0.0))
+        while len(entries) > self.max_entries:
+            oldest = next(fp for fp in by_age if fp != keep)
+            by_age.remove(oldest)
+            try:
+                os.remove(entries[oldest]["file"])
+            except OSError:
+                pass
+            del entries[oldest]
+
+    def load(self, entry, fingerprint):
+        """
+        Appends (or links) the library datablocks this session does not already hold.
+
+        Returns:
+            int: Number of datablocks read from disk
+        """
+        self.discard_stale(bpy.data.meshes, entry["meshes"], fingerprint)
+        self.discard_stale(bpy.data.materials, entry["materials"], fingerprint)
+        missing_meshes = [name for name in entry["meshes"] if name not in bpy.data.meshes]
+        missing_materials = [name for name in entry["materials"] if name not in bpy.data.materials]
+        if not missing_meshes and not missing_materials:
+            return 0
+
+        with bpy.data.libraries.load(entry["file"], link=self.link) as (data_from, data_to):
+            data_to.meshes = [name for name in missing_meshes if name in data_from.meshes]
+            data_to.materials = [name for name in missing_materials if name in data_from.materials]
+        return len(missing_meshes) + len(missing_materials)
+
+    def ensure(self):
+        """
+        Makes every template mesh and category material available in bpy.data,
+        reading them from the library when it matches the current parameters
+        and rebuilding (and re-saving) it otherwise.
+
+        Returns:
+            str: "session" (already loaded), "loaded" or "built"
+        """
+        fingerprint = self.fingerprint()
+        entry = self.lookup(fingerprint)
+        if entry is None:
+            self.build(fingerprint)
+            print(f"📦 Asset library built ({fingerprint[:12]}) -> {self.library_path(fingerprint)}")
+            return "built"
+
+        loaded = self.load(entry, fingerprint)
+        if loaded == 0:
+            return "session"
+        print(f"📦 Asset library {'linked' if self.link else 'appended'}: {loaded} datablocks ({fingerprint[:12]})")
+        return "loaded"
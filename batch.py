@@ -0,0 +1,308 @@
+# batch.py
+"""
+Headless multi-process batch generator.
+Expands a seed range x density x season matrix into jobs, splits the jobs
+into shards and runs every shard in its own `blender --background`
+process (batch_worker.py), as many at a time as there are cores. Each
+Blender launch generates a whole shard, so startup cost is paid per shard,
+not per scene. Progress lives in a manifest next to the outputs: finished
+jobs are skipped when the batch is started again, failed ones are retried.
+Runs with plain Python - no bpy.
+
+    python batch.py --seeds 0-999 --density sparse,dense --season spring,autumn --output renders/
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_SCRIPT = os.path.join(SCRIPT_DIR, "batch_worker.py")
+
+DENSITIES = ("sparse", "medium", "dense", "random")
+SEASONS = ("spring", "summer", "autumn", "winter")
+
+# Files every finished job leaves in its directory
+JOB_OUTPUTS = ("scene.blend", "plan.json", "stats.json")
+
+
+class BatchRunner:
+    """Shards scene variants across local Blender worker processes."""
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, output, seeds, densities=("medium",), seasons=(None,), workers=None,
+                 blender="blender", shard_size=None, retries=2, job_timeout=600.0):
+        """
+        Args:
+            output: Output directory (one sub-directory per job + manifest.json)
+            seeds: Iterable of integer seeds
+            densities: GenerationConfig densities to combine with every seed
+            seasons: SeasonalVariation seasons (None = no seasonal counts)
+            workers: Parallel Blender processes (default: one per core)
+            blender: Blender executable
+            shard_size: Jobs per Blender launch (default: spread evenly, at most 25)
+            retries: Extra attempts for a failed job in this invocation
+            job_timeout: Seconds one job may take before its shard is killed
+        """
+        self.output = os.path.abspath(output)
+        self.seeds = list(seeds)
+        self.densities = tuple(densities)
+        self.seasons = tuple(seasons)
+        self.workers = workers or os.cpu_count() or 1
+        self.blender = blender
+        self.shard_size = shard_size
+        self.retries = retries
+        self.job_timeout = job_timeout
+        self.manifest = None
+
+    # ============ JOBS & MANIFEST ============
+
+    @staticmethod
+    def job_id(seed, density, season):
+        return f"seed{seed:06d}_{density}_{season or 'any'}"
+
+    def jobs(self):
+        """Returns {job id: job} for the whole seed x density x season matrix."""
+        jobs = {}
+        for seed in self.seeds:
+            for density in self.densities:
+                for season in self.seasons:
+                    job_id = self.job_id(seed, density, season)
+                    jobs[job_id] = {
+                        "id": job_id, "seed": seed, "density": density, "season": season,
+                        "directory": os.path.join(self.output, job_id),
+                    }
+        return jobs
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.output, "manifest.json")
+
+    def load_manifest(self):
+        """
+        Merges the job matrix into the manifest of an earlier run. Jobs marked
+        done whose outputs are gone are queued again.
+
+        Returns:
+            dict: The manifest ({"version", "jobs": {job id: entry}})
+        """
+        manifest = {"version": self.MANIFEST_VERSION, "jobs": {}}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as handle:
+                manifest = json.load(handle)
+        except (OSError, ValueError):
+            pass
+
+        entries = manifest.setdefault("jobs", {})
+        for job_id, job in self.jobs().items():
+            entry = entries.setdefault(job_id, dict(job, status="pending", attempts=0, error=None, seconds=None))
+            if entry["status"] == "done" and not self.outputs_exist(entry):
+                entry["status"] = "pending"
+        self.manifest = manifest
+        return manifest
+
+    def save_manifest(self):
+        """Writes the manifest atomically (a killed driver never leaves half a file)."""
+        os.makedirs(self.output, exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(self.manifest, handle, indent=2, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    @staticmethod
+    def outputs_exist(entry):
+        return all(os.path.exists(os.path.join(entry["directory"], name)) for name in JOB_OUTPUTS)
+
+    def pending(self):
+        """Jobs of the manifest that still need to run (pending or failed)."""
+        return [entry for entry in self.manifest["jobs"].values() if entry["status"] != "done"]
+
+    # ============ SHARDS ============
+
+    def shards(self, jobs):
+        """
+        Splits jobs into shards: enough for every worker to stay busy, small
+        enough that a crashed Blender process loses little work.
+        """
+        size = self.shard_size or max(1, min(25, -(-len(jobs) // self.workers)))
+        return [jobs[start:start + size] for start in range(0, len(jobs), size)]
+
+    def run_shard(self, index, attempt, jobs):
+        """
+        Generates one shard in a fresh Blender process.
+
+        Returns:
+            dict: job id -> result line written by the worker; jobs the
+                process never reported (crash, timeout) are missing
+        """
+        shard_dir = os.path.join(self.output, "shards")
+        os.makedirs(shard_dir, exist_ok=True)
+        name = f"shard_{attempt:02d}_{index:04d}"
+        shard_path = os.path.join(shard_dir, f"{name}.json")
+        results_path = os.path.join(shard_dir, f"{name}.results.jsonl")
+        log_path = os.path.join(shard_dir, f"{name}.log")
+
+        with open(shard_path, "w", encoding="utf-8") as handle:
+            json.dump(jobs, handle)
+        if os.path.exists(results_path):
+            os.remove(results_path)
+
+        command = [
+            self.blender, "--background", "--factory-startup",
+            "--python", WORKER_SCRIPT, "--", "--shard", shard_path, "--results", results_path,
+        ]
+        with open(log_path, "w", encoding="utf-8") as log:
+            try:
+                subprocess.run(command, stdout=log, stderr=subprocess.STDOUT,
+                               timeout=self.job_timeout * len(jobs), check=False)
+            except subprocess.TimeoutExpired:
+                log.write(f"\nShard killed after {self.job_timeout * len(jobs):.0f}s\n")
+
+        results = {}
+        if os.path.exists(results_path):
+            with open(results_path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        result = json.loads(line)
+                        results[result["id"]] = result
+        return results
+
+    def warm_assets(self):
+        """
+        Builds the on-disk asset library once so parallel workers only ever
+        read it. Raises RuntimeError when the warm-up fails: the workers
+        would otherwise all build the library at the same time.
+        """
+        shard_dir = os.path.join(self.output, "shards")
+        os.makedirs(shard_dir, exist_ok=True)
+        log_path = os.path.join(shard_dir, "warm_assets.log")
+        # --python-exit-code: a failing script fails the process (Blender exits 0 otherwise)
+        command = [self.blender, "--background", "--factory-startup", "--python-exit-code", "1",
+                   "--python", WORKER_SCRIPT, "--", "--warm"]
+        with open(log_path, "w", encoding="utf-8") as log:
+            try:
+                completed = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT,
+                                           timeout=self.job_timeout, check=False)
+            except subprocess.TimeoutExpired:
+                raise RuntimeError(f"Asset library warm-up timed out after {self.job_timeout:.0f}s "
+                                   f"(see {log_path})") from None
+        if completed.returncode != 0:
+            raise RuntimeError(f"Asset library warm-up failed with exit code {completed.returncode} "
+                               f"(see {log_path})")
+
+    # ============ RUN ============
+
+    def run(self):
+        """
+        Runs every unfinished job, retrying failures up to self.retries times.
+
+        Returns:
+            dict: {"done": n, "failed": n, "seconds": wall time}
+        """
+        if shutil.which(self.blender) is None and not os.path.exists(self.blender):
+            raise FileNotFoundError(f"Blender executable not found: {self.blender}")
+
+        start = time.perf_counter()
+        self.load_manifest()
+        self.save_manifest()
+        skipped = len(self.manifest["jobs"]) - len(self.pending())
+        print(f"📋 {len(self.manifest['jobs'])} jobs ({skipped} already done) -> {self.output}")
+
+        if self.pending():
+            self.warm_assets()
+
+        for attempt in range(self.retries + 1):
+            jobs = self.pending()
+            if not jobs:
+                break
+            shards = self.shards(jobs)
+            print(f"🚀 Attempt {attempt + 1}: {len(jobs)} jobs in {len(shards)} shards on {self.workers} workers")
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    executor.submit(self.run_shard, index, attempt, shard): shard
+                    for index, shard in enumerate(shards)
+                }
+                for future in as_completed(futures):
+                    results = future.result()
+                    for job in futures[future]:
+                        entry = self.manifest["jobs"][job["id"]]
+                        result = results.get(job["id"], {
+                            "status": "failed", "error": "worker exited before finishing the job", "seconds": None,
+                        })
+                        entry["attempts"] += 1
+                        entry["status"] = result["status"]
+                        entry["error"] = result["error"]
+                        entry["seconds"] = result["seconds"]
+                        if entry["status"] == "done" and not self.outputs_exist(entry):
+                            entry["status"], entry["error"] = "failed", "outputs missing"
+                    # Saved after every shard, so an interrupted batch resumes where it stopped
+                    self.save_manifest()
+
+        entries = self.manifest["jobs"].values()
+        summary = {
+            "done": sum(entry["status"] == "done" for entry in entries),
+            "failed": sum(entry["status"] != "done" for entry in entries),
+            "seconds": time.perf_counter() - start,
+        }
+        print(f"✅ {summary['done']} done, {summary['failed']} failed in {summary['seconds']:.1f}s")
+        return summary
+
+
+def parse_seeds(text):
+    """ "0-99" -> 0..99, "1,5,9" -> [1, 5, 9], both may be mixed ("0-9,42")."""
+    seeds = []
+    for part in text.split(","):
+        if "-" in part.strip()[1:]:
+            first, last = part.rsplit("-", 1)
+            seeds.extend(range(int(first), int(last) + 1))
+        elif part.strip():
+            seeds.append(int(part))
+    return seeds
+
+
+def parse_choices(text, allowed, allow_none=False):
+    """Comma-separated choices, checked against allowed ("none" -> None when allow_none)."""
+    choices = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        if allow_none and part in ("none", "any"):
+            choices.append(None)
+        elif part in allowed:
+            choices.append(part)
+        else:
+            raise argparse.ArgumentTypeError(f"'{part}' is not one of {', '.join(allowed)}")
+    return choices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seeds", required=True, type=parse_seeds, help='Seed range/list, e.g. "0-999" or "1,7,42"')
+    parser.add_argument("--density", default="medium", type=lambda text: parse_choices(text, DENSITIES),
+                        help=f"Comma-separated densities ({', '.join(DENSITIES)})")
+    parser.add_argument("--season", default="none", type=lambda text: parse_choices(text, SEASONS, True),
+                        help=f"Comma-separated seasons ({', '.join(SEASONS)}, none)")
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel Blender processes (default: cores)")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--shard-size", type=int, default=None, help="Jobs per Blender launch")
+    parser.add_argument("--retries", type=int, default=2, help="Extra attempts for failed jobs")
+    parser.add_argument("--job-timeout", type=float, default=600.0, help="Seconds per job before a shard is killed")
+    args = parser.parse_args(argv)
+
+    runner = BatchRunner(
+        args.output, args.seeds, args.density, args.season, workers=args.workers,
+        blender=args.blender, shard_size=args.shard_size, retries=args.retries,
+        job_timeout=args.job_timeout,
+    )
+    summary = runner.run()
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Headless batch worker - runs INSIDE Blender, started by batch.py:
+
+    blender --background --factory-startup --python batch_worker.py -- --shard shard.json --results results.jsonl
+
+Generates every job of one shard in a single Blender process (one
+SceneManager, so template meshes, materials and pooled objects are reused
+between scenes) and appends one JSON line per finished job to the results
+file, so the driver still knows what was done if the process dies midway.
+"""
+import bpy
+import sys
+import os
+import json
+import time
+import argparse
+import traceback
+
+# Scripts live next to this file (no saved .blend needed in --background)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+import profiler
+from scene_manager import SceneManager
+from generation_config import GenerationConfig, SeasonalVariation
+from datablocks import datablock_counts
+
+
+def parse_args():
+    """Arguments after Blender's own "--" separator."""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="batch_worker.py")
+    parser.add_argument("--shard", help="JSON list of jobs to generate")
+    parser.add_argument("--results", help="JSON-lines file the job results are appended to")
+    parser.add_argument("--warm", action="store_true",
+                        help="Only build the asset library (run once before parallel workers)")
+    return parser.parse_args(argv)
+
+
+def generate(app, job):
+    """
+    Generates one scene variant and writes its .blend, plan JSON and stats.
+
+    Args:
+        app: SceneManager reused for every job of the shard
+        job: {"id", "seed", "density", "season", "directory"} and optionally
+            "backend" ("objects" or "instances", see SceneManager.run)
+
+    Returns:
+        dict: Stats of the scene (also written to stats.json)
+    """
+    start = time.perf_counter()
+    os.makedirs(job["directory"], exist_ok=True)
+
+    config = GenerationConfig(seed=job["seed"], density=job["density"])
+    counts = SeasonalVariation(season=job["season"]).apply_to_config(config) if job["season"] else None
+    plan = app.run(config=config, counts=counts, backend=job.get("backend", "objects"))
+    generate_time = time.perf_counter() - start
+
+    with open(os.path.join(job["directory"], "plan.json"), "w", encoding="utf-8") as handle:
+        json.dump(plan.to_dict(), handle)
+
+    save_start = time.perf_counter()
+    profiler.operator(bpy.ops.wm.save_as_mainfile, filepath=os.path.join(job["directory"], "scene.blend"),
+                      copy=True, compress=True)
+
+    stats = {
+        "id": job["id"],
+        "seed": job["seed"],
+        "density": job["density"],
+        "season": job["season"],
+        "backend": job.get("backend", "objects"),
+        "counts": plan.counts(),
+        "datablocks": datablock_counts(),
+        "generate_seconds": generate_time,
+        "save_seconds": time.perf_counter() - save_start,
+    }
+    with open(os.path.join(job["directory"], "stats.json"), "w", encoding="utf-8") as handle:
+        json.dump(stats, handle, indent=2)
+    return stats
+
+
+def main():
+    args = parse_args()
+
+    # Start from an empty file instead of the default cube/camera/light scene
+    profiler.operator(bpy.ops.wm.read_homefile, use_empty=True)
+    app = SceneManager()
+
+    if args.warm:
+        if app.assets is not None:
+            app.assets.ensure()
+        return
+
+    with open(args.shard, "r", encoding="utf-8") as handle:
+        jobs = json.load(handle)
+
+    for job in jobs:
+        start = time.perf_counter()
+        try:
+            generate(app, job)
+            result = {"id": job["id"], "status": "done", "error": None}
+        except Exception as e:
+            traceback.print_exc()
+            result = {"id": job["id"], "status": "failed", "error": f"{type(e).__name__}: {e}"}
+        result["seconds"] = time.perf_counter() - start
+
+        # One line per job, flushed at once, so a crash loses only the running job
+        with open(args.results, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(result) + "\n")
+        print(f"📦 {job['id']}: {result['status']} ({result['seconds']:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,599 @@
+# benchmark.py
+"""
+Scaling benchmarks for the forest generator.
+Measures how generation cost grows with object count and keeps a history
+of results, flagging regressions against earlier runs on the same machine.
+
+Blender suite (needs Blender; started through `blender --background`
+automatically when run with plain Python):
+    preset/<density>          SceneManager.run for every GenerationConfig preset
+    scene/n=<n>               SceneManager.run with n objects requested per category
+    generate/<category>/n=<n> one generate_* / create_* method called n times
+
+Pure suite (--pure, plain Python + NumPy, e.g. on CI machines): the
+planning and sampling code (ScenePlanner, Poisson-disk placement, shading,
+WindField, Flock). A stub bpy module that raises on any use is installed
+first, so the pure path is guaranteed not to touch Blender.
+
+    python benchmark.py --pure --sizes 10,100,1000,10000,100000 --check
+    python benchmark.py --blender /path/to/blender --only preset,generate/trees
+    blender --background --python benchmark.py -- --sizes 10,100,1000
+
+Synthetic sizes run in ascending order. Before every size the cost of
+the case (all its passes) is projected from the sizes measured so far;
+sizes projected over --budget seconds are skipped, as are flock sizes over
+FLOCK_MAX_SIZE (the simulation is quadratic within a neighbourhood). Every
+case records the requested n next to the planned count, and us/obj is per
+requested object, so a planner that cuts counts shows up as a slowdown.
+"""
+import os
+import io
+import abc
+import math
+import sys
+import json
+import time
+import shutil
+import types
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+# Scripts live next to this file (also when started inside Blender)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import numpy as np
+
+DEFAULT_HISTORY = os.path.join(SCRIPT_DIR, "benchmark_history.jsonl")
+PRESETS = ("sparse", "medium", "dense")
+SIZES = (10, 100, 1000, 10000, 100000)
+# Largest flock the ladder simulates (about 2 s at 1000 birds, 9 s at 3000)
+FLOCK_MAX_SIZE = 1000
+# Plan categories in planning order (butterflies follow their flowers)
+CATEGORIES = ("trees", "rocks", "bushes", "flowers", "butterflies", "mushrooms", "clouds", "birds")
+# Categories with their own count (butterflies come from the flowers)
+COUNTED = tuple(category for category in CATEGORIES if category != "butterflies")
+
+# Allowed relative increase over the baseline before a metric is a regression
+THRESHOLDS = {"seconds": 0.25, "peak_alloc_mb": 0.5, "rss_delta_mb": 0.5, "datablocks": 0.0}
+# Absolute increases below these are noise, never regressions
+NOISE_FLOORS = {"seconds": 0.005, "peak_alloc_mb": 1.0, "rss_delta_mb": 10.0, "datablocks": 0}
+
+
+def in_blender():
+    """True when running inside Blender (bpy already imported by Blender itself)."""
+    bpy = sys.modules.get("bpy")
+    return bpy is not None and not isinstance(bpy, BpyGuard) and hasattr(bpy, "app")
+
+
+class BpyGuard(types.ModuleType):
+    """Stand-in bpy/bmesh module for the pure suite: importing works, any use raises."""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        raise RuntimeError(f"pure benchmark touched {self.__name__}.{name} - this code path needs Blender")
+
+
+def install_bpy_guard():
+    for name in ("bpy", "bmesh"):
+        sys.modules[name] = BpyGuard(name)
+
+
+def synthetic_rows(planner, category, n):
+    """
+    n plan rows of a category. When the scene area is full the planned rows
+    are repeated (renumbered), so realization cost can be measured for any n.
+    """
+    if category == "butterflies":
+        flowers = synthetic_rows(planner, "flowers", n)
+        rows = planner.plan_butterflies_at(np.column_stack((flowers["x"], flowers["y"], flowers["z"])))
+    else:
+        rows = planner.plan_category(category, n)
+    if 0 < len(rows) < n:
+        rows = np.resize(rows, n)
+        rows["id"] = np.arange(n)
+    return rows
+
+
+class BenchmarkSuite(abc.ABC):
+    """Runs named cases and collects one metrics dict per case."""
+
+    mode = None
+
+    def __init__(self, seed=42, sizes=SIZES, budget=30.0, repeat=1, only=None, verbose=False):
+        """
+        Args:
+            seed: GenerationConfig seed of every case
+            sizes: Synthetic object counts
+            budget: Seconds a case may be projected to take before it is skipped
+            repeat: Timed repetitions per case (the fastest one is kept)
+            only: Case name prefixes to run (None = all)
+            verbose: Keep the generator's console output
+        """
+        self.seed = seed
+        self.sizes = sorted(sizes)
+        self.budget = budget
+        self.repeat = max(1, repeat)
+        self.only = only
+        self.verbose = verbose
+        self.results = {}
+
+    def wanted(self, name):
+        return self.only is None or any(name.startswith(prefix) for prefix in self.only)
+
+    def quiet(self):
+        """Swallows the generators' emoji prints unless verbose."""
+        return redirect_stdout(sys.stdout if self.verbose else io.StringIO())
+
+    @property
+    def passes(self):
+        """Times work runs per case (subclasses add untimed passes)."""
+        return self.repeat
+
+    def measure(self, setup, work):
+        """Times work(setup()) and returns the case metrics (subclasses add memory)."""
+        best, count = None, None
+        for _ in range(self.repeat):
+            state = setup()
+            start = time.perf_counter()
+            count = work(state)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return {"seconds": best, "count": count}
+
+    def case(self, name, setup, work, n=None):
+        """Runs one case and records its metrics. Returns its seconds (None when not run)."""
+        if not self.wanted(name):
+            return None
+        with self.quiet():
+            metrics = self.measure(setup, work)
+        if n is not None:
+            metrics["n"] = n
+        # Per requested object: a case that delivers fewer objects is not cheaper
+        objects = n if n is not None else metrics.get("count")
+        if objects:
+            metrics["us_per_object"] = metrics["seconds"] / objects * 1e6
+        self.results[name] = metrics
+        print(format_result(name, metrics), flush=True)
+        return metrics["seconds"]
+
+    def projected(self, measured, n):
+        """
+        Projected seconds of one pass at size n from earlier (n, seconds) of
+        the same case: the growth exponent of the last two sizes (clamped to
+        1..2, i.e. linear to quadratic), linear after a single size.
+        """
+        if not measured:
+            return 0.0
+        last_n, last_seconds = measured[-1]
+        exponent = 1.0
+        if len(measured) > 1:
+            first_n, first_seconds = measured[-2]
+            if first_seconds > 0 and last_seconds > 0:
+                exponent = math.log(last_seconds / first_seconds) / math.log(last_n / first_n)
+        exponent = min(max(exponent, 1.0), 2.0)
+        return last_seconds * (n / last_n) ** exponent
+
+    def ladder(self, prefix, setup, work, max_n=None):
+        """
+        Runs a case for every size, skipping sizes over max_n and sizes
+        whose projected cost (every pass) exceeds the time budget.
+        """
+        measured = []
+        for n in self.sizes:
+            name = f"{prefix}/n={n}"
+            if not self.wanted(name):
+                continue
+            if max_n is not None and n > max_n:
+                self.results[name] = {"n": n, "skipped": f"n > {max_n}"}
+                print(format_result(name, self.results[name]), flush=True)
+                continue
+            projected = self.projected(measured, n) * self.passes
+            if projected > self.budget:
+                self.results[name] = {"n": n, "skipped": f"projected {projected:.0f} s"}
+                print(format_result(name, self.results[name]), flush=True)
+                continue
+            measured.append((n, self.case(name, lambda n=n: setup(n), work, n)))
+
+    @abc.abstractmethod
+    def run(self):
+        """Runs every wanted case and returns the results."""
+
+
+class PureSuite(BenchmarkSuite):
+    """Planning and sampling cases - NumPy only, bpy guarded."""
+
+    mode = "pure"
+
+    @property
+    def passes(self):
+        # The tracemalloc pass counts as three: tracing slows every allocation down
+        return self.repeat + 3
+
+    def measure(self, setup, work):
+        metrics = super().measure(setup, work)
+        # Separate untimed pass: tracemalloc slows down every allocation
+        state = setup()
+        tracemalloc.start()
+        try:
+            work(state)
+            metrics["peak_alloc_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+        return metrics
+
+    def plan_rows(self, state):
+        planner, category, n = state
+        return len(synthetic_rows(planner, category, n) if category == "butterflies"
+                   else planner.plan_category(category, n))
+
+    def planner(self, density="medium"):
+        from generation_config import GenerationConfig
+        from scene_plan import ScenePlanner
+        planner = ScenePlanner(GenerationConfig(seed=self.seed, density=density))
+        planner.new_plan()
+        return planner
+
+    def run(self):
+        from shading import SHADING_KINDS, sample_shading
+        from wind import WindField
+        from flocking import Flock
+
+        for density in PRESETS:
+            self.case(f"plan/preset/{density}", lambda density=density: self.planner(density),
+                      lambda planner: sum(planner.plan().counts().values()))
+
+        for category in CATEGORIES:
+            self.ladder(f"plan/{category}", lambda n, category=category: (self.planner(), category, n),
+                        self.plan_rows)
+
+        for kind in SHADING_KINDS:
+            self.ladder(f"shading/{kind}", lambda n: (np.random.default_rng(self.seed), n),
+                        lambda state, kind=kind: len(sample_shading(kind, state[1], state[0])["forest_color"]))
+
+        def wind_setup(n):
+            rng = np.random.default_rng(self.seed)
+            return WindField(np.random.default_rng(self.seed)), rng.uniform(-20, 20, (n, 2))
+
+        self.ladder("wind/sway", wind_setup, lambda state: len(state[0].sway(state[1], 60, 120)[1]))
+
+        def flock_setup(n):
+            planner = self.planner()
+            xmin, ymin, xmax, ymax = planner.placement.bounds
+            birds = planner.plan_category("birds", n)
+            return Flock.from_plan(birds, bounds=(xmin - 5, ymin - 5, 6.0, xmax + 5, ymax + 5, 16.0))
+
+        self.ladder("flock/simulate", flock_setup, lambda flock: len(flock.simulate(1, 120, 4)[1]),
+                    max_n=FLOCK_MAX_SIZE)
+        return self.results
+
+
+class BlenderSuite(BenchmarkSuite):
+    """SceneManager.run and per-generator cases - runs inside Blender."""
+
+    mode = "blender"
+
+    # Category -> one call of its generate_* / create_* method
+    GENERATORS = {
+        "trees": lambda app, spec: app.generate_tree(app.ground, spec),
+        "rocks": lambda app, spec: app.generate_rock(spec),
+        "bushes": lambda app, spec: app.generate_bush(spec),
+        "flowers": lambda app, spec: app.generate_flower(spec),
+        "butterflies": lambda app, spec: app.generate_butterfly_near_flower(None, spec),
+        "mushrooms": lambda app, spec: app.generate_mushroom(spec),
+        "clouds": lambda app, spec: app.material_engine.create_cloud(app.collection, spec=spec),
+        "birds": lambda app, spec: app.material_engine.create_bird(app.collection, spec=spec),
+    }
+
+    def __init__(self, backend="objects", **kwargs):
+        super().__init__(**kwargs)
+        from scene_manager import SceneManager
+        self.backend = backend
+        with self.quiet():
+            self.app = SceneManager(profile=True)
+
+    def clean(self):
+        """Empty scene and empty object pool; shared templates/materials stay loaded."""
+        self.app.reset_scene()
+        if self.app.pool is not None:
+            self.app.pool.trim()
+
+    def measure(self, setup, work):
+        from datablocks import datablock_counts
+        from profiler import Profiler
+        rss_before = Profiler.rss_mb()
+        metrics = super().measure(setup, work)
+        rss_after = Profiler.rss_mb()
+        counts = datablock_counts()
+        metrics.update({
+            "peak_rss_mb": Profiler.peak_rss_mb(),
+            "rss_delta_mb": None if rss_before is None else rss_after - rss_before,
+            "datablocks": sum(counts.values()),
+            "datablock_counts": counts,
+        })
+        report = self.app.profiler.report()
+        metrics["phases"] = {name: entry["seconds"] for name, entry in report["phases"].items()}
+        metrics["keyframes"] = report["counters"].get("keyframes", 0)
+        return metrics
+
+    def config(self, density="medium"):
+        from generation_config import GenerationConfig
+        return GenerationConfig(seed=self.seed, density=density)
+
+    def scene_setup(self, density="medium", counts=None):
+        """Empty scene, then (config, counts) for scene_run."""
+        self.clean()
+        return self.config(density), counts
+
+    def scene_run(self, state):
+        config, counts = state
+        plan = self.app.run(config=config, counts=counts, backend=self.backend)
+        return sum(plan.counts().values())
+
+    def generator_setup(self, category, n):
+        """Empty forest (ground, planner, wind) plus n rows of the category."""
+        self.clean()
+        self.app.run(config=self.config(), counts={name: 0 for name in COUNTED})
+        rows = synthetic_rows(self.app.planner, category, n)
+        if self.app.wind is not None and category in self.app.WIND_WINDOWS:
+            self.app.wind_rows[category] = self.app.wind_table(category, rows)
+        return category, rows
+
+    def generate(self, state):
+        """Calls the generator once per row and writes the keyframes, profiled like a run."""
+        import profiler
+        from profiler import Profiler
+        category, rows = state
+        generator = self.GENERATORS[category]
+        self.app.profiler = Profiler()
+        previous = profiler.activate(self.app.profiler)
+        try:
+            for spec in rows:
+                generator(self.app, spec)
+            self.app.keyframes.flush()
+        finally:
+            profiler.activate(previous)
+        return len(rows)
+
+    def run(self):
+        for density in PRESETS:
+            self.case(f"preset/{density}", lambda density=density: self.scene_setup(density), self.scene_run)
+
+        self.ladder("scene", lambda n: self.scene_setup(counts={name: n for name in COUNTED}), self.scene_run)
+
+        for category in CATEGORIES:
+            self.ladder(f"generate/{category}", lambda n, category=category: self.generator_setup(category, n),
+                        self.generate)
+        with self.quiet():
+            self.clean()
+        return self.results
+
+
+# ============ HISTORY ============
+
+class BenchmarkHistory:
+    """JSON-lines file of past benchmark runs, one run per line."""
+
+    def __init__(self, path=DEFAULT_HISTORY):
+        self.path = path
+
+    def load(self, mode, host, backend=None, seed=None):
+        """
+        Earlier comparable runs, oldest first: same suite, machine, backend
+        and seed (the case names alone do not tell an instances run from an
+        objects run).
+        """
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if (entry.get("mode"), entry.get("host"), entry.get("backend"), entry.get("seed")) == \
+                        (mode, host, backend, seed):
+                    entries.append(entry)
+        return entries
+
+    def append(self, entry):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(entry, sort_keys=True) + "\n")
+
+    @staticmethod
+    def baseline(entries, runs=5):
+        """Median of every case metric over the last `runs` runs that measured it."""
+        values = {}
+        for entry in entries:
+            for case, metrics in entry["results"].items():
+                if metrics.get("skipped"):
+                    continue
+                for metric, value in metrics.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        values.setdefault(case, {}).setdefault(metric, []).append(value)
+        return {
+            case: {metric: statistics.median(series[-runs:]) for metric, series in metrics.items()}
+            for case, metrics in values.items()
+        }
+
+    @staticmethod
+    def regressions(results, baseline, thresholds=THRESHOLDS):
+        """
+        Returns:
+            list: (case, metric, value, baseline value) for every metric that
+                grew by more than its threshold (plus its noise floor)
+        """
+        found = []
+        for case, metrics in results.items():
+            reference = baseline.get(case, {})
+            for metric, allowed in thresholds.items():
+                value, base = metrics.get(metric), reference.get(metric)
+                if value is None or base is None:
+                    continue
+                if value > base * (1.0 + allowed) + NOISE_FLOORS.get(metric, 0):
+                    found.append((case, metric, value, base))
+        return found
+
+
+def format_result(name, metrics):
+    if metrics.get("skipped"):
+        return f"   {name:<36} skipped ({metrics['skipped']})"
+    text = f"   {name:<36} {metrics['seconds'] * 1000:10.1f} ms"
+    if metrics.get("count") is not None:
+        text += f"  {metrics['count']:>7} obj"
+        if metrics.get("n") is not None and metrics["count"] != metrics["n"]:
+            text += f" of {metrics['n']}"
+    if metrics.get("us_per_object") is not None:
+        text += f"  {metrics['us_per_object']:9.1f} us/obj"
+    for key, unit in (("peak_alloc_mb", "MB alloc"), ("rss_delta_mb", "MB rss"), ("datablocks", "datablocks")):
+        if metrics.get(key) is not None:
+            text += f"  {metrics[key]:.1f} {unit}" if isinstance(metrics[key], float) else f"  {metrics[key]} {unit}"
+    return text
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_in_blender(args):
+    """Runs the Blender suite in `blender --background` and returns its results."""
+    if shutil.which(args.blender) is None and not os.path.exists(args.blender):
+        raise FileNotFoundError(f"Blender executable not found: {args.blender} (use --blender or --pure)")
+    with tempfile.TemporaryDirectory() as directory:
+        results_path = os.path.join(directory, "results.json")
+        command = [
+            args.blender, "--background", "--factory-startup", "--python", os.path.abspath(__file__), "--",
+            "--seed", str(args.seed), "--sizes", ",".join(map(str, args.sizes)), "--budget", str(args.budget),
+            "--repeat", str(args.repeat), "--backend", args.backend, "--results", results_path,
+        ]
+        if args.only:
+            command += ["--only", ",".join(args.only)]
+        if args.verbose:
+            command.append("--verbose")
+        completed = subprocess.run(command, check=False)
+        if not os.path.exists(results_path):
+            raise RuntimeError(f"Blender benchmark run failed (exit code {completed.returncode})")
+        with open(results_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+
+def parse_thresholds(values):
+    """["seconds=0.1", ...] -> THRESHOLDS with those overrides."""
+    thresholds = dict(THRESHOLDS)
+    for value in values or ():
+        metric, _, fraction = value.partition("=")
+        if not fraction:
+            raise argparse.ArgumentTypeError(f"threshold '{value}' is not metric=fraction")
+        thresholds[metric.strip()] = float(fraction)
+    return thresholds
+
+
+def parse_args(argv=None):
+    if argv is None:
+        # Inside Blender only the arguments after "--" are ours
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(prog="benchmark.py", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pure", action="store_true", help="Planning/sampling suite on plain Python (stub bpy)")
+    parser.add_argument("--seed", type=int, default=42, help="GenerationConfig seed of every case")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        type=lambda text: [int(part) for part in text.split(",") if part.strip()],
+                        help="Synthetic object counts per category")
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="Seconds a case may be projected to take (all passes) before it is skipped")
+    parser.add_argument("--repeat", type=int, default=None,
+                        help="Timed repetitions per case, fastest kept (default: 3 pure, 1 Blender)")
+    parser.add_argument("--only", type=lambda text: [part.strip() for part in text.split(",") if part.strip()],
+                        help='Comma-separated case name prefixes, e.g. "preset,generate/trees"')
+    parser.add_argument("--backend", default="objects", choices=("objects", "instances"),
+                        help="Backend of the preset/scene cases")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON-lines history file")
+    parser.add_argument("--baseline-runs", type=int, default=5, help="Earlier runs the baseline median uses")
+    parser.add_argument("--threshold", action="append", metavar="METRIC=FRACTION",
+                        help=f"Regression threshold override (defaults: "
+                             f"{', '.join(f'{key}={value}' for key, value in THRESHOLDS.items())})")
+    parser.add_argument("--check", action="store_true", help="Exit with code 1 when a regression is found")
+    parser.add_argument("--no-record", action="store_true", help="Compare only, do not append to the history")
+    parser.add_argument("--results", help=argparse.SUPPRESS)  # Set by run_in_blender for the child process
+    parser.add_argument("--verbose", action="store_true", help="Keep the generator's console output")
+    args = parser.parse_args(argv)
+    args.thresholds = parse_thresholds(args.threshold)
+    if args.repeat is None:
+        args.repeat = 3 if args.pure else 1
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = {"seed": args.seed, "sizes": args.sizes, "budget": args.budget, "repeat": args.repeat,
+               "only": args.only, "verbose": args.verbose}
+    blender_version = None
+    if args.pure:
+        install_bpy_guard()
+        mode = "pure"
+        print(f"⏱️ Pure benchmark suite (seed {args.seed}, sizes {args.sizes})")
+        results = PureSuite(**options).run()
+    elif in_blender():
+        import bpy
+        mode = "blender"
+        blender_version = bpy.app.version_string
+        print(f"⏱️ Blender {blender_version} benchmark suite (seed {args.seed}, sizes {args.sizes})")
+        results = BlenderSuite(backend=args.backend, **options).run()
+        if args.results:
+            # Child of run_in_blender: the parent compares and records
+            with open(args.results, "w", encoding="utf-8") as handle:
+                json.dump({"blender": blender_version, "results": results}, handle)
+            return 0
+    else:
+        mode = "blender"
+        output = run_in_blender(args)
+        blender_version, results = output["blender"], output["results"]
+
+    history = BenchmarkHistory(args.history)
+    host = platform.node()
+    backend = args.backend if mode == "blender" else None
+    baseline = history.baseline(history.load(mode, host, backend, args.seed), args.baseline_runs)
+    regressions = history.regressions(results, baseline, args.thresholds)
+    if not baseline:
+        print(f"📋 No earlier {mode} runs on {host} (backend {backend}, seed {args.seed}) in {args.history} "
+              f"- this run becomes the baseline")
+    for case, metric, value, base in regressions:
+        print(f"⚠️ Regression: {case} {metric} {value:.4g} (baseline {base:.4g}, "
+              f"threshold +{args.thresholds[metric]:.0%})")
+    if baseline and not regressions:
+        print("✅ No regressions against the baseline")
+
+    if not args.no_record:
+        history.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "mode": mode,
+            "host": host,
+            "python": platform.python_version(),
+            "blender": blender_version,
+            "commit": git_commit(),
+            "seed": args.seed,
+            "backend": backend,
+            "results": results,
+        })
+        print(f"📝 Recorded {len(results)} cases in {args.history}")
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+# client.py
+"""
+asyncio client for resident generation servers (server.py).
+Starts N background Blender processes once, then feeds them jobs from one
+queue: each server handles one job at a time, and a free server takes the
+next job right away, so small scenes cost their generation time instead
+of a Blender launch. Status messages ("started", "done", "failed") stream
+back per job. Runs with plain Python - no bpy.
+
+    python client.py --seeds 0-99 --density sparse --workers 4 --output variants/
+
+or from code:
+
+    async with GenerationClient(workers=4) as client:
+        results = await client.run([{"seed": 1, "output": "out/1"}, ...])
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+from batch import BatchRunner, parse_seeds, parse_choices, DENSITIES, SEASONS
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_SCRIPT = os.path.join(SCRIPT_DIR, "server.py")
+
+# Must match server.READY (server.py imports bpy, so it is not imported here)
+READY = "FOREST_SERVER_READY"
+# Statuses that end a request
+FINAL_STATUSES = ("done", "failed", "pong", "bye")
+
+
+class ServerProcess:
+    """One resident Blender generation server and its socket connection."""
+
+    def __init__(self, blender="blender", log_path=None, startup_timeout=120.0):
+        """
+        Args:
+            blender: Blender executable
+            log_path: File for the server's console output (discarded when None)
+            startup_timeout: Seconds to wait for Blender to start serving
+        """
+        self.blender = blender
+        self.log_path = log_path
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.reader = None
+        self.writer = None
+        self._drain_task = None
+
+    async def start(self):
+        """
+        Launches Blender, waits for the ready line and connects to the
+        announced port. A server that fails to start is stopped (killed if
+        need be) before the error is raised, so no Blender is left behind.
+        """
+        self.process = await asyncio.create_subprocess_exec(
+            self.blender, "--background", "--factory-startup",
+            "--python", SERVER_SCRIPT, "--", "--port", "0",
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )
+        try:
+            port = await asyncio.wait_for(self._wait_ready(), self.startup_timeout)
+            # Keep reading the console output, or a full pipe would block Blender
+            self._drain_task = asyncio.create_task(self._drain())
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+        except BaseException:
+            # Also on cancellation: the process must not outlive the failed start
+            await self.stop(timeout=5.0)
+            raise
+
+    async def _wait_ready(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"Generation server exited with code {await self.process.wait()}")
+            text = line.decode("utf-8", "replace").strip()
+            self._log(text)
+            if text.startswith(READY):
+                return int(text.split()[1])
+
+    async def _drain(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                return
+            self._log(line.decode("utf-8", "replace").rstrip())
+
+    def _log(self, text):
+        if self.log_path is not None:
+            with open(self.log_path, "a", encoding="utf-8") as handle:
+                handle.write(text + "\n")
+
+    async def request(self, message, on_status=None):
+        """
+        Sends one request and reads its status stream.
+
+        Args:
+            message: Request dict (a job or {"command": ...})
+            on_status: Optional callback(status dict) for every message, incl. the last
+
+        Returns:
+            dict: The final status message
+        """
+        self.writer.write((json.dumps(message) + "\n").encode("utf-8"))
+        await self.writer.drain()
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("generation server closed the connection")
+            status = json.loads(line)
+            if on_status is not None:
+                on_status(status)
+            if status.get("status") in FINAL_STATUSES:
+                return status
+
+    async def stop(self, timeout=30.0):
+        """Asks the server to shut down, killing it if it does not exit in time."""
+        if self.process is None:
+            return
+        try:
+            if self.writer is not None:
+                await asyncio.wait_for(self.request({"command": "shutdown"}), timeout)
+                self.writer.close()
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except (OSError, ConnectionError, asyncio.TimeoutError):
+            if self.process.returncode is None:
+                self.process.kill()
+                await self.process.wait()
+        if self._drain_task is not None:
+            await self._drain_task
+        self.process = None
+
+
+class GenerationClient:
+    """Queues jobs and keeps several resident generation servers busy."""
+
+    def __init__(self, workers=2, blender="blender", log_dir=None, on_status=None, job_timeout=None):
+        """
+        Args:
+            workers: Number of resident Blender servers
+            blender: Blender executable
+            log_dir: Directory for one console log per server (None = discard)
+            on_status: Optional callback(status dict) for every streamed message
+            job_timeout: Seconds a job may take before it fails and its
+                server is restarted (None = no limit)
+        """
+        self.workers = workers
+        self.blender = blender
+        self.log_dir = log_dir
+        self.on_status = on_status
+        self.job_timeout = job_timeout
+        self.servers = []
+        self.queue = asyncio.Queue()
+        self._tasks = []
+        self._alive = 0
+
+    def _server(self, index):
+        log_path = None
+        if self.log_dir is not None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            log_path = os.path.join(self.log_dir, f"server_{index:02d}.log")
+        return ServerProcess(self.blender, log_path)
+
+    async def start(self):
+        """
+        Starts the servers and one queue consumer per server. The first
+        server builds the asset library if needed; the rest start in
+        parallel once it is ready and only read it.
+        """
+        self.servers = [self._server(index) for index in range(self.workers)]
+        try:
+            await self.servers[0].start()
+            # Let every start finish (a failed one stops itself) before cleaning up
+            started = await asyncio.gather(*(server.start() for server in self.servers[1:]),
+                                           return_exceptions=True)
+            for result in started:
+                if isinstance(result, BaseException):
+                    raise result
+        except BaseException:
+            # __aexit__ never runs when __aenter__ raises - stop the servers that did start
+            await asyncio.gather(*(server.stop(timeout=5.0) for server in self.servers))
+            raise
+        self._alive = self.workers
+        self._tasks = [asyncio.create_task(self._consume(index)) for index in range(self.workers)]
+        return self
+
+    async def _consume(self, index):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            job, future = item
+            try:
+                result = await asyncio.wait_for(self.servers[index].request(job, self.on_status), self.job_timeout)
+            except (OSError, ConnectionError, ValueError, asyncio.TimeoutError) as e:
+                # The server died or hangs mid-job: report the job, then bring up a fresh server
+                error = (f"timed out after {self.job_timeout}s" if isinstance(e, asyncio.TimeoutError)
+                         else f"{type(e).__name__}: {e}")
+                self._fail(job, future, error)
+                if not await self._restart(index):
+                    return
+                continue
+            self._finish(future, result)
+
+    async def _restart(self, index):
+        """
+        Replaces a broken server. When Blender does not come back, this
+        consumer retires; the last one to retire fails every queued job, so
+        run() never waits on a queue nobody reads.
+
+        Returns:
+            bool: True when a fresh server is serving
+        """
+        await self.servers[index].stop(timeout=5.0)
+        self.servers[index] = self._server(index)
+        try:
+            await self.servers[index].start()
+            return True
+        except (OSError, RuntimeError, asyncio.TimeoutError) as e:
+            print(f"❌ Generation server {index} could not be restarted: {type(e).__name__}: {e}")
+            await self.servers[index].stop(timeout=5.0)
+            self._alive -= 1
+            if self._alive == 0:
+                while not self.queue.empty():
+                    item = self.queue.get_nowait()
+                    if item is not None:
+                        self._fail(*item, "no generation server left")
+            return False
+
+    def _fail(self, job, future, error):
+        """Resolves a job the servers could not finish as failed (and reports it like a streamed status)."""
+        self._finish(future, {"id": job.get("id"), "status": "failed", "error": error})
+        if self.on_status is not None:
+            self.on_status(future.result())
+
+    @staticmethod
+    def _finish(future, result):
+        if not future.done():
+            future.set_result(result)
+
+    def submit(self, job):
+        """
+        Queues a job ({"id", "seed", "density", "season", "backend", "output"}).
+
+        Returns:
+            asyncio.Future resolving to the job's final status message
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self._tasks and self._alive == 0:
+            self._fail(job, future, "no generation server left")
+        else:
+            self.queue.put_nowait((job, future))
+        return future
+
+    async def run(self, jobs):
+        """Queues every job and returns their final status messages in order."""
+        return await asyncio.gather(*(self.submit(job) for job in jobs))
+
+    async def close(self):
+        """Lets the servers finish the queued jobs, then shuts them down."""
+        for _ in self._tasks:
+            self.queue.put_nowait(None)
+        await asyncio.gather(*self._tasks)
+        await asyncio.gather(*(server.stop() for server in self.servers))
+        self._tasks = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def generate_matrix(args):
+    """Generates every seed x density x season job of the CLI arguments."""
+    jobs = []
+    for seed in args.seeds:
+        for density in args.density:
+            for season in args.season:
+                job_id = BatchRunner.job_id(seed, density, season)
+                jobs.append({
+                    "id": job_id, "seed": seed, "density": density, "season": season,
+                    "backend": args.backend, "output": os.path.join(args.output, job_id),
+                })
+
+    def report(status):
+        if status["status"] in ("done", "failed"):
+            detail = f"{status['seconds']:.2f}s" if status.get("seconds") is not None else ""
+            print(f"{'✅' if status['status'] == 'done' else '❌'} {status['id']} {detail} {status.get('error') or ''}")
+
+    log_dir = os.path.join(args.output, "server_logs")
+    async with GenerationClient(args.workers, args.blender, log_dir, on_status=report,
+                                job_timeout=args.job_timeout) as client:
+        results = await client.run(jobs)
+    return sum(result["status"] != "done" for result in results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seeds", required=True, type=parse_seeds, help='Seed range/list, e.g. "0-99" or "1,7,42"')
+    parser.add_argument("--density", default="medium", type=lambda text: parse_choices(text, DENSITIES),
+                        help=f"Comma-separated densities ({', '.join(DENSITIES)})")
+    parser.add_argument("--season", default="none", type=lambda text: parse_choices(text, SEASONS, True),
+                        help=f"Comma-separated seasons ({', '.join(SEASONS)}, none)")
+    parser.add_argument("--backend", default="objects", choices=("objects", "instances"))
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--workers", type=int, default=2, help="Resident Blender servers")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--job-timeout", type=float, default=None,
+                        help="Seconds before a job fails and its server is restarted")
+    args = parser.parse_args(argv)
+    args.output = os.path.abspath(args.output)
+    failed = asyncio.run(generate_matrix(args))
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import bpy
+
+# Custom property marking datablocks the generator created, with their lifetime:
+#   "scene"  - belongs to one generated forest (objects, actions, sun, ...)
+#   "shared" - reused across runs (template meshes, category materials, node groups)
+GENERATED_PROP = "forest_generated"
+SCENE = "scene"
+SHARED = "shared"
+
+# bpy.data collections the generator creates datablocks in
+DATABLOCK_TYPES = (
+    "objects", "meshes", "materials", "actions",
+    "lights", "node_groups", "collections", "images",
+)
+
+
+def tag(datablock, lifetime=SCENE):
+    """
+    Marks a datablock as generated so reset_scene can find and purge it.
+
+    Args:
+        datablock: Any bpy ID (object, mesh, material, action, ...)
+        lifetime: SCENE (purged on every reset) or SHARED (kept across runs)
+
+    Returns:
+        The same datablock, for inline use
+    """
+    datablock[GENERATED_PROP] = lifetime
+    return datablock
+
+
+def datablock_counts():
+    """Returns {type: len(bpy.data.<type>)} for every DATABLOCK_TYPES entry."""
+    return {name: len(getattr(bpy.data, name)) for name in DATABLOCK_TYPES}
+
+
+def tagged_datablocks(lifetimes=(SCENE,)):
+    """Returns every generated datablock whose lifetime is in lifetimes."""
+    found = []
+    if not lifetimes:
+        return found
+    for name in DATABLOCK_TYPES:
+        for datablock in getattr(bpy.data, name):
+            if datablock.get(GENERATED_PROP) in lifetimes:
+                found.append(datablock)
+    return found
+
+
+def collection_datablocks(collection):
+    """
+    Collects a collection, its child collections, their objects and the
+    per-scene data only those objects use (animation actions, light data,
+    point-cloud meshes, per-scene materials). Shared templates stay.
+
+    Returns:
+        list: Datablocks to pass to purge(extra=...)
+    """
+    found = []
+    for child in [collection] + list(collection.children_recursive):
+        found.append(child)
+        for obj in child.objects:
+            found.append(obj)
+            owners = [obj]
+            if obj.data is not None and obj.data.get(GENERATED_PROP) == SCENE:
+                found.append(obj.data)
+                owners.append(obj.data)
+            for owner in owners:
+                anim_data = getattr(owner, "animation_data", None)
+                if anim_data is not None and anim_data.action is not None:
+                    found.append(anim_data.action)
+            for slot in obj.material_slots:
+                if slot.material is not None and slot.material.get(GENERATED_PROP) == SCENE:
+                    found.append(slot.material)
+    return found
+
+
+def purge(lifetimes=(SCENE,), extra=()):
+    """
+    Frees generated datablocks in ONE bpy.data.batch_remove call (one
+    dependency-graph rebuild instead of one per remove()) and reports the
+    before/after count of every datablock type.
+
+    Args:
+        lifetimes: Which tagged lifetimes to free
+        extra: Untagged datablocks to free as well (e.g. data left by an older session)
+
+    Returns:
+        dict: type -> (before, after)
+    """
+    before = datablock_counts()
+    doomed = set(tagged_datablocks(lifetimes))
+    doomed.update(extra)
+    if doomed:
+        bpy.data.batch_remove(doomed)
+    after = datablock_counts()
+
+    report = {name: (before[name], after[name]) for name in DATABLOCK_TYPES}
+    freed = {name: b - a for name, (b, a) in report.items() if b != a}
+    if freed:
+        summary = ", ".join(f"{name} {before[name]}→{after[name]}" for name in freed)
+        print(f"🧹 Purged {sum(freed.values())} datablocks: {summary}")
+    return report
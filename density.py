@@ -0,0 +1,156 @@
+# density.py
+"""
+Spatially varying density maps.
+A DensityField is a 2D NumPy array of relative fertility (0 = barren,
+1 = lush) laid over a square of the ground. Every source is normalized to
+that range, so a painted 0-255 map, a 0-1 .npy and noise all mean the same.
+The field decides both WHERE objects go (inverse-CDF sampling over its
+cells) and, together with the GenerationConfig preset, HOW MANY a category
+gets (preset count x mean fertility). bpy is only imported when a map is
+loaded from an image.
+"""
+import os
+import numpy as np
+
+
+class DensityField:
+    """Relative density over the ground, stored as a (ny, nx) array (row 0 = ymin) with max 1."""
+
+    def __init__(self, values, bounds=(-15.0, -15.0, 15.0, 15.0)):
+        """
+        Args:
+            values: 2D array of densities in any units (negatives count as
+                barren; the field is rescaled so its densest cell is 1)
+            bounds: (xmin, ymin, xmax, ymax) the array is stretched over
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2:
+            raise ValueError(f"Density field must be 2D, got shape {values.shape}")
+        values = np.clip(values, 0.0, None)
+        peak = values.max() if values.size else 0.0
+        self.values = values / peak if peak > 0 else values
+        self.bounds = tuple(float(b) for b in bounds)
+        self._cdf = None
+
+    # ============ SOURCES ============
+
+    @classmethod
+    def from_noise(cls, rng, shape=(64, 64), bounds=(-15.0, -15.0, 15.0, 15.0),
+                   base_cells=4, octaves=4, persistence=0.5, contrast=1.5):
+        """
+        Fractal value noise (summed octaves of bilinearly upsampled random grids).
+
+        Args:
+            rng: numpy Generator
+            shape: (ny, nx) resolution of the field
+            bounds: Area the field covers
+            base_cells: Noise cells across the area in the first octave
+            octaves: Number of detail layers
+            persistence: Amplitude falloff per octave
+            contrast: Exponent applied after normalizing (>1 = sharper patches)
+        """
+        ny, nx = shape
+        field = np.zeros(shape)
+        amplitude = 1.0
+        for octave in range(octaves):
+            cells = base_cells * 2 ** octave
+            lattice = rng.random((cells + 1, cells + 1))
+
+            # Bilinear lookup of every output pixel in the lattice
+            gy = np.linspace(0, cells, ny)
+            gx = np.linspace(0, cells, nx)
+            y0 = np.minimum(gy.astype(np.int64), cells - 1)
+            x0 = np.minimum(gx.astype(np.int64), cells - 1)
+            ty = (gy - y0)[:, None]
+            tx = (gx - x0)[None, :]
+            top = lattice[y0][:, x0] * (1 - tx) + lattice[y0][:, x0 + 1] * tx
+            bottom = lattice[y0 + 1][:, x0] * (1 - tx) + lattice[y0 + 1][:, x0 + 1] * tx
+            field += amplitude * (top * (1 - ty) + bottom * ty)
+            amplitude *= persistence
+
+        field -= field.min()
+        if field.max() > 0:
+            field /= field.max()
+        return cls(field ** contrast, bounds)
+
+    @classmethod
+    def from_npy(cls, path, bounds=(-15.0, -15.0, 15.0, 15.0)):
+        """Loads a 2D array saved with np.save."""
+        return cls(np.load(path), bounds)
+
+    @classmethod
+    def from_image(cls, path, bounds=(-15.0, -15.0, 15.0, 15.0), channel=None):
+        """
+        Loads a painted density map through Blender's image loader.
+
+        Args:
+            path: Image file (any format Blender reads)
+            bounds: Area the image covers
+            channel: 0-3 for a single RGBA channel, None for luminance
+        """
+        import bpy  # Only needed for images - planning stays bpy-free otherwise
+        from datablocks import tag
+
+        image = tag(bpy.data.images.load(path, check_existing=True))
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        pixels = pixels.reshape(height, width, 4)  # Blender rows run bottom-up, like the field
+
+        if channel is None:
+            values = pixels[..., :3] @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+        else:
+            values = pixels[..., channel]
+        return cls(values, bounds)
+
+    @classmethod
+    def from_source(cls, source, rng=None, bounds=(-15.0, -15.0, 15.0, 15.0)):
+        """
+        Builds a field from whatever the caller has:
+        a DensityField, a 2D array, "noise", a .npy path or an image path.
+        """
+        if isinstance(source, DensityField):
+            return source
+        if isinstance(source, np.ndarray):
+            return cls(source, bounds)
+        if source == "noise":
+            return cls.from_noise(rng if rng is not None else np.random.default_rng(), bounds=bounds)
+        if os.path.splitext(source)[1].lower() == ".npy":
+            return cls.from_npy(source, bounds)
+        return cls.from_image(source, bounds)
+
+    # ============ QUERIES ============
+
+    def coverage(self):
+        """Mean density - 1.0 for a uniformly lush field, 0.0 for a barren one."""
+        return float(self.values.mean())
+
+    def expected_count(self, base_count):
+        """
+        Number of objects for this field. The preset's base_count is what a
+        uniformly lush field gets; the field only thins it out, so its
+        units never change the totals.
+        """
+        return int(round(base_count * self.coverage()))
+
+    def sample(self, n, rng):
+        """
+        Draws n positions distributed like the field (inverse CDF over cells,
+        then uniform jitter inside the chosen cell).
+
+        Returns:
+            (n, 2) array of x/y positions
+        """
+        if self._cdf is None:
+            self._cdf = np.cumsum(self.values.ravel())
+        if self._cdf[-1] <= 0:
+            raise ValueError("Density field is empty - nothing can be placed")
+
+        ny, nx = self.values.shape
+        xmin, ymin, xmax, ymax = self.bounds
+        cell = np.searchsorted(self._cdf, rng.random(n) * self._cdf[-1], side="right")
+        iy, ix = np.divmod(np.minimum(cell, ny * nx - 1), nx)
+        return np.column_stack((
+            xmin + (ix + rng.random(n)) * (xmax - xmin) / nx,
+            ymin + (iy + rng.random(n)) * (ymax - ymin) / ny
+        ))
@@ -1,43 +1,126 @@
 # diversity.py
-import random
 import math
+import numpy as np
 
 class RuntimeDiversity:
+    # Supported batch distributions (same low/high range parameters for all)
+    DISTRIBUTIONS = ("uniform", "normal", "truncated")
+
     def __init__(
         self,
         pos_range=15.0,
         scale_range=(0.7, 1.3),
         height_range=(2.0, 5.0),
         rotation_range=(0, 360),
-        seed=None
+        seed=None,
+        distribution="uniform",
+        rng=None
     ):
         """
         Handles all randomness and procedural realism.
         No hardcoded values outside this class.
+
+        Args:
+            distribution: Default batch distribution - "uniform", "normal" or "truncated"
+            rng: numpy.random.Generator for batch sampling (created from seed if omitted)
         """
 
         self.pos_range = pos_range
         self.scale_range = scale_range
         self.height_range = height_range
         self.rotation_range = rotation_range
+        self.distribution = distribution
+        # Own Generator (optional seed for reproducibility) - never the global random
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
 
-        # Optional reproducibility
-        if seed is not None:
-            random.seed(seed)
+    def with_rng(self, rng):
+        """Returns a copy with the same ranges that draws from another Generator."""
+        return RuntimeDiversity(
+            pos_range=self.pos_range,
+            scale_range=self.scale_range,
+            height_range=self.height_range,
+            rotation_range=self.rotation_range,
+            distribution=self.distribution,
+            rng=rng
+        )
 
     def random_position(self):
         return (
-            random.uniform(-self.pos_range, self.pos_range),
-            random.uniform(-self.pos_range, self.pos_range)
+            float(self.rng.uniform(-self.pos_range, self.pos_range)),
+            float(self.rng.uniform(-self.pos_range, self.pos_range))
         )
 
     def random_scale(self):
-        return random.uniform(*self.scale_range)
+        return float(self.rng.uniform(*self.scale_range))
 
     def random_height(self):
-        return random.uniform(*self.height_range)
+        return float(self.rng.uniform(*self.height_range))
 
     def random_rotation(self):
         return math.radians(
-            random.uniform(*self.rotation_range)
+            self.rng.uniform(*self.rotation_range)
         )
+
+    # ============ BATCH SAMPLING ============
+
+    def sample(self, n, low, high, distribution=None):
+        """
+        Draws n values for a [low, high] range in one vectorized call.
+
+        uniform   - flat over [low, high]
+        normal    - centred on the midpoint, sigma = (high - low) / 4 (unbounded)
+        truncated - the same normal cut to [low, high] (inverse CDF)
+
+        Every distribution takes exactly one batched draw per value, so a
+        per-object seeding.KeyedRandom works as the rng as well.
+
+        Args:
+            n: Number of values
+            low, high: Range parameters
+            distribution: Overrides the instance default
+
+        Returns:
+            np.ndarray of shape (n,)
+        """
+        distribution = distribution or self.distribution
+        if distribution == "uniform":
+            return self.rng.uniform(low, high, n)
+
+        mean = (low + high) / 2
+        sigma = (high - low) / 4
+        if distribution == "normal":
+            return self.rng.normal(mean, sigma, n)
+        if distribution != "truncated":
+            raise ValueError(f"Unknown distribution '{distribution}', expected one of {self.DISTRIBUTIONS}")
+
+        # Inverse CDF instead of rejection: the normal CDF tabulated over
+        # [low, high], then one interpolated lookup per uniform draw
+        grid = np.linspace(low, high, 257)
+        cdf = np.array([math.erf((x - mean) / (sigma * math.sqrt(2.0))) for x in grid])
+        cdf = (cdf - cdf[0]) / (cdf[-1] - cdf[0])
+        return np.interp(self.rng.random(n), cdf, grid)
+
+    def choice(self, n, options):
+        """Draws n indices into a sequence of options (palettes, shapes, patterns)."""
+        return self.rng.integers(0, len(options), n)
+
+    def chance(self, n, probability):
+        """Draws n booleans that are True with the given probability."""
+        return self.rng.random(n) < probability
+
+    def random_positions(self, n, distribution=None):
+        """Returns an (n, 2) array of x/y positions inside +/- pos_range."""
+        return np.column_stack((
+            self.sample(n, -self.pos_range, self.pos_range, distribution),
+            self.sample(n, -self.pos_range, self.pos_range, distribution)
+        ))
+
+    def random_scales(self, n, distribution=None):
+        return self.sample(n, *self.scale_range, distribution)
+
+    def random_heights(self, n, distribution=None):
+        return self.sample(n, *self.height_range, distribution)
+
+    def random_rotations(self, n, distribution=None):
+        """Returns n rotations in radians."""
+        return np.radians(self.sample(n, *self.rotation_range, distribution))
@@ -0,0 +1,201 @@
+# flocking.py
+"""
+Vectorized boids for the sky layer.
+All birds advance together, one step per timeline frame: neighbours come
+from the SpatialHashGrid used for placement (a 2D grid over x/y, refined
+by the true 3D distance), and separation / alignment / cohesion / bounds /
+tree avoidance are summed with bincount instead of per-bird Python loops.
+Cost per frame grows with birds x neighbours, not birds^2. bpy-free.
+"""
+import numpy as np
+
+from placement import SpatialHashGrid
+
+
+class Flock:
+    """Boids simulation over (n, 3) positions and velocities (meters, meters per frame)."""
+
+    def __init__(self, positions, velocities, bounds=(-25.0, -25.0, 6.0, 25.0, 25.0, 16.0),
+                 neighbor_radius=3.0, separation_radius=1.2, min_speed=0.2, max_speed=0.5,
+                 separation=1.5, alignment=0.6, cohesion=0.4, containment=0.02, avoidance=0.3,
+                 max_force=0.05, level=0.05):
+        """
+        Args:
+            positions: (n, 3) start positions
+            velocities: (n, 3) start velocities
+            bounds: (xmin, ymin, zmin, xmax, ymax, zmax) the flock is steered back into
+            neighbor_radius: Alignment / cohesion range
+            separation_radius: Personal space
+            min_speed: Birds never hover
+            max_speed: Top speed per frame
+            separation: Weight of keeping personal space
+            alignment: Weight of matching neighbours' velocity
+            cohesion: Weight of steering to the neighbours' centre
+            containment: Weight of steering back inside bounds
+            avoidance: Weight of steering away from obstacles
+            max_force: Largest velocity change per frame (flocking rules)
+            level: Share of the vertical speed damped per frame (birds glide level)
+        """
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 3)
+        self.velocities = np.array(velocities, dtype=np.float64).reshape(-1, 3)
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.neighbor_radius = float(neighbor_radius)
+        self.separation_radius = float(separation_radius)
+        self.min_speed = float(min_speed)
+        self.max_speed = float(max_speed)
+        self.weights = {
+            "separation": separation, "alignment": alignment, "cohesion": cohesion,
+            "containment": containment, "avoidance": avoidance,
+        }
+        self.max_force = float(max_force)
+        self.level = float(level)
+
+        xmin, ymin, _, xmax, ymax, _ = self.bounds
+        margin = self.neighbor_radius * 2
+        self.grid = SpatialHashGrid((xmin - margin, ymin - margin, xmax + margin, ymax + margin),
+                                    cell_size=self.neighbor_radius)
+        self.obstacles = None
+
+    @classmethod
+    def from_plan(cls, birds, speed=0.35, **kwargs):
+        """
+        Flock starting from planned bird rows (ScenePlan["birds"]): each bird
+        sets off from x/y/z along its planned direction.
+        """
+        positions = np.column_stack((birds["x"], birds["y"], birds["z"]))
+        direction = np.asarray(birds["direction"], dtype=np.float64)
+        velocities = speed * np.column_stack((np.cos(direction), np.sin(direction), np.zeros(len(direction))))
+        return cls(positions, velocities, **kwargs)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def set_obstacles(self, points, radii, tops, clearance=1.5):
+        """
+        Vertical cylinders birds steer around (tree crowns).
+
+        Args:
+            points: (m, 2) x/y centres
+            radii: (m,) cylinder radii
+            tops: (m,) cylinder heights; birds above a top fly over it
+            clearance: Extra distance kept from the surface
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(points) == 0:
+            self.obstacles = None
+            return
+        radii = np.asarray(radii, dtype=np.float64).reshape(-1) + clearance
+        xmin, ymin, _, xmax, ymax, _ = self.bounds
+        grid = SpatialHashGrid((xmin, ymin, xmax, ymax), cell_size=max(2.0, float(radii.max())))
+        grid.build(points, radii)
+        self.obstacles = (grid, np.asarray(tops, dtype=np.float64).reshape(-1))
+
+    def avoid_trees(self, trees):
+        """Uses the crowns of planned tree rows (ScenePlan["trees"]) as obstacles."""
+        height = np.asarray(trees["trunk_height"], dtype=np.float64)
+        # Same crown placement as VariationEngine.apply_tree_transform
+        self.set_obstacles(
+            np.column_stack((trees["x"], trees["y"])),
+            np.asarray(trees["scale"], dtype=np.float64) * 2.5,
+            height * 2 + height * 1.1,
+        )
+
+    # ============ FORCES ============
+
+    def neighbour_pairs(self):
+        """(i, j, delta, distance) for every ordered pair of birds closer than neighbor_radius."""
+        half = np.full(len(self), self.neighbor_radius / 2)
+        self.grid.build(self.positions[:, :2], half)
+        i, j = self.grid.query_pairs(self.positions[:, :2], half)
+        keep = i != j
+        i, j = i[keep], j[keep]
+        delta = self.positions[i] - self.positions[j]
+        distance = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+        close = distance < self.neighbor_radius
+        return i[close], j[close], delta[close], distance[close]
+
+    def steering(self):
+        """Sums every rule's steering into one (n, 3) acceleration."""
+        n = len(self)
+        force = np.zeros((n, 3))
+        i, j, delta, distance = self.neighbour_pairs()
+
+        if len(i):
+            # Every rule is a per-pair term, so all three are summed per bird in
+            # one bincount per axis. With delta = p_i - p_j:
+            #   separation  sum(delta / d^2) over neighbours closer than separation_radius
+            #   alignment   mean(v_j) - v_i
+            #   cohesion    mean(p_j) - p_i = -mean(delta)
+            count = np.bincount(i, minlength=n)
+            share = 1.0 / count[i]
+            near = distance < self.separation_radius
+            separation = np.where(near, 1.0 / np.maximum(distance, 1e-6) ** 2, 0.0)
+            w = self.weights
+            pair = (w["separation"] * separation - w["cohesion"] * 0.1 * share)[:, None] * delta
+            pair += (w["alignment"] * share)[:, None] * self.velocities[j]
+            for k in range(3):
+                force[:, k] = np.bincount(i, weights=pair[:, k], minlength=n)
+            force[count > 0] -= w["alignment"] * self.velocities[count > 0]
+
+        # Tree avoidance: radial push out of any crown cylinder the bird is inside
+        if self.obstacles is not None:
+            grid, tops = self.obstacles
+            b, o = grid.query_pairs(self.positions[:, :2], np.zeros(n))
+            below = self.positions[b, 2] < tops[o]
+            b, o = b[below], o[below]
+            if len(b):
+                away = np.zeros((len(b), 3))
+                away[:, :2] = self.positions[b, :2] - grid.points[o]
+                away /= np.maximum(np.linalg.norm(away, axis=1), 1e-6)[:, None]
+                away[:, 2] = 0.5  # and climb over it
+                force += self.weights["avoidance"] * np.column_stack(
+                    [np.bincount(b, weights=away[:, k], minlength=n) for k in range(3)]
+                )
+
+        # Limit the steering per frame
+        magnitude = np.linalg.norm(force, axis=1, keepdims=True)
+        force *= np.minimum(1.0, self.max_force / np.maximum(magnitude, 1e-9))
+
+        # Containment on top of the limit, so no crowd can push a bird out of the box
+        low, high = self.bounds[:3], self.bounds[3:]
+        outside = np.clip(self.positions, low, high) - self.positions
+        return force + np.clip(self.weights["containment"] * outside, -self.max_force, self.max_force)
+
+    # ============ INTEGRATION ============
+
+    def step(self):
+        """Advances every bird by one frame."""
+        self.velocities += self.steering()
+        self.velocities[:, 2] *= 1.0 - self.level
+        speed = np.linalg.norm(self.velocities, axis=1, keepdims=True)
+        clamped = np.clip(speed, self.min_speed, self.max_speed)
+        self.velocities *= clamped / np.maximum(speed, 1e-9)
+        self.positions += self.velocities
+
+    def simulate(self, frame_start, frame_end, key_step=4):
+        """
+        Runs one step per frame and records a key every key_step frames.
+
+        Returns:
+            (frames, positions, headings): (m,) frames, (n, m, 3) positions and
+            (n, m) heading angles around Z (unwrapped, so keys never spin)
+        """
+        frames = np.arange(frame_start, frame_end + 1)
+        keyed = frames[(frames - frame_start) % key_step == 0]
+        if keyed[-1] != frame_end:
+            keyed = np.append(keyed, frame_end)
+
+        positions = np.empty((len(self), len(keyed), 3))
+        velocities = np.empty((len(self), len(keyed), 3))
+        slot = 0
+        for frame in frames:
+            if frame == keyed[slot]:
+                positions[:, slot] = self.positions
+                velocities[:, slot] = self.velocities
+                slot += 1
+                if slot == len(keyed):
+                    break
+            self.step()
+
+        headings = np.unwrap(np.arctan2(velocities[..., 1], velocities[..., 0]), axis=1)
+        return keyed.astype(np.float64), positions, headings
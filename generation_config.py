@@ -1,4 +1,5 @@
 import random
+from seeding import SeedHierarchy
 
 class GenerationConfig:
     """
@@ -18,8 +19,9 @@ class GenerationConfig:
         self.seed = seed
         self.density = density
         
-        if seed is not None:
-            random.seed(seed)
+        # Own stream hierarchy - no global random.seed, so nothing else shifts
+        self.seeds = SeedHierarchy(seed)
+        self.rng = self.seeds.generator("config")
         
         # Define density presets (ranges, not fixed values!)
         self.density_presets = {
@@ -76,21 +78,29 @@ class GenerationConfig:
             self.density = "medium"  # Fallback
         
         min_count, max_count = self.density_presets[self.density][object_type]
-        count = random.randint(min_count, max_count)
+        # One stream per category: other categories never change this count
+        count = int(self.seeds.generator("counts", object_type).integers(min_count, max_count + 1))
         
         return count
     
-    def get_all_counts(self):
+    def get_all_counts(self, density_fields=None):
         """
         Returns a dictionary of ALL object counts for this generation run.
         Each run produces different numbers!
         
+        Args:
+            density_fields: Optional {"trees": DensityField, ...}; the preset
+                count is scaled by how fertile that category's field is
+        
         Returns:
             dict: {"trees": 12, "rocks": 7, ...}
         """
+        density_fields = density_fields or {}
         counts = {}
         for obj_type in ["trees", "rocks", "bushes", "flowers", "mushrooms", "clouds", "birds"]:
             counts[obj_type] = self.get_object_count(obj_type)
+            if obj_type in density_fields:
+                counts[obj_type] = density_fields[obj_type].expected_count(counts[obj_type])
         
         return counts
     
@@ -105,7 +115,7 @@ class GenerationConfig:
         if self.seed:
             print(f"Seed: {self.seed} (reproducible)")
         else:
-            print("Seed: Random (unique each run)")
+            print(f"Seed: Random (unique each run, entropy {self.seeds.entropy})")
         print("-"*50)
         
         total = 0
@@ -126,28 +136,34 @@ class GenerationConfig:
         print(f"📊 TOTAL OBJECTS: {total}")
         print("="*50 + "\n")
     
-    def get_density_multiplier(self):
+    def get_density_multiplier(self, rng=None):
         """
         Returns a random multiplier based on environmental factors.
         Simulates "fertile" vs "barren" areas of the forest.
         
+        Args:
+            rng: Generator to draw from (the config stream when omitted)
+        
         Returns:
             float: Multiplier between 0.5 and 1.5
         """
-        return random.uniform(0.5, 1.5)
+        rng = rng if rng is not None else self.rng
+        return float(rng.uniform(0.5, 1.5))
     
-    def should_generate_cluster(self, probability=0.3):
+    def should_generate_cluster(self, probability=0.3, rng=None):
         """
         Randomly determines if objects should spawn in clusters.
         Adds natural grouping variation.
         
         Args:
             probability: Chance of clustering (0.0-1.0)
+            rng: Generator to draw from (the config stream when omitted)
         
         Returns:
             bool: True if this generation should use clustering
         """
-        return random.random() < probability
+        rng = rng if rng is not None else self.rng
+        return bool(rng.random() < probability)
     
     @staticmethod
     def create_random_config():
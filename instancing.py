@@ -0,0 +1,300 @@
+import bpy
+import numpy as np
+from scene_plan import CROWN_TEMPLATES
+from shading import sample_shading, shading_rng
+from datablocks import tag, SHARED
+
+
+class InstanceScatter:
+    """
+    Geometry Nodes realization backend for massive scatter.
+    Instead of one Blender object per forest element, every PART of a ground
+    category (trunks, crowns, rocks, ...) becomes ONE point-cloud mesh whose
+    points carry position + instance_scale / instance_rotation /
+    template_index / palette attributes and the forest_* shading values the
+    shared category materials read. A single shared node group
+    instances the template meshes on those points, so 100k trees cost about
+    as much as one object. Layout only - per-object animation stays with the
+    object backend.
+    """
+
+    NODE_GROUP = "Forest_Instancer"
+
+    # Part -> (template meshes in template_index order, shading kind)
+    PARTS = {
+        "Tree_Trunks": (("cylinder_15_smooth",), "bark"),
+        "Tree_Crowns": (CROWN_TEMPLATES, "leaf"),
+        "Rocks": (("uv_sphere_8x6",), "rock"),
+        "Bushes": (("ico_sphere_2",), "bush"),
+        "Flower_Stems": (("cylinder_15",), "flower_stem"),
+        "Flower_Petals": (("cone_5",), "flower_petal"),
+        "Mushroom_Stalks": (("cylinder_5",), "mushroom_stalk"),
+        "Mushroom_Caps": (("uv_sphere_12x5",), "mushroom_cap"),
+    }
+
+    def __init__(self, templates, material_engine, prefix="Forest_Instances"):
+        """
+        Args:
+            templates: MeshTemplateLibrary providing the shared meshes
+            material_engine: MaterialAssigner for the template materials
+            prefix: Name prefix for point clouds and template collections
+        """
+        self.templates = templates
+        self.material_engine = material_engine
+        self.prefix = prefix
+
+    # ============ PLAN -> PER-PART TRANSFORMS ============
+
+    def part_transforms(self, plan, categories=None):
+        """
+        Computes the parts' instance transforms from a ScenePlan in NumPy,
+        mirroring what the object backend does per object.
+
+        Args:
+            plan: ScenePlan
+            categories: Plan categories to compute (all ground categories when None)
+
+        Returns:
+            dict: part -> {"location", "scale", "rotation": (n, 3) arrays,
+                           "template_index", "palette": (n,) arrays,
+                           "shading": sample_shading() values}
+        """
+        def vec(*columns):
+            return np.column_stack(np.broadcast_arrays(*columns)).astype(np.float64)
+
+        def wanted(category):
+            return categories is None or category in categories
+
+        parts = {}
+        trees = plan["trees"]
+        if wanted("trees") and len(trees):
+            # One keyed stream per category, its parts shaded in the object
+            # backend's order (see MaterialAssigner.apply_*_materials)
+            rng = shading_rng(trees["seed"])
+            h, s = trees["trunk_height"], trees["scale"]
+            parts["Tree_Trunks"] = {
+                "location": vec(trees["x"], trees["y"], h / 2),
+                "scale": vec(s, s, h),
+                "rotation": np.zeros((len(trees), 3)),
+                "template_index": np.zeros(len(trees), dtype=np.int32),
+                "palette": trees["bark_palette"],
+                "shading": sample_shading("bark", len(trees), rng, trees["bark_palette"]),
+            }
+            parts["Tree_Crowns"] = {
+                "location": vec(trees["x"], trees["y"], h * 2),
+                "scale": vec(s * 2.5, s * 2.5, h * 1.1),
+                "rotation": vec(0.0, 0.0, trees["crown_rotation"]),
+                "template_index": trees["crown_type"],
+                "palette": trees["leaf_palette"],
+                "shading": sample_shading("leaf", len(trees), rng, trees["leaf_palette"]),
+            }
+
+        rocks = plan["rocks"]
+        if wanted("rocks") and len(rocks):
+            rng = shading_rng(rocks["seed"])
+            r = rocks["radius"]
+            parts["Rocks"] = {
+                "location": vec(rocks["x"], rocks["y"], rocks["z"]),
+                "scale": vec(r, r, r),
+                "rotation": vec(rocks["rotation_x"], rocks["rotation_y"], rocks["rotation_z"]),
+                "template_index": np.zeros(len(rocks), dtype=np.int32),
+                "palette": rocks["palette"],
+                "shading": sample_shading("rock", len(rocks), rng, rocks["palette"]),
+            }
+
+        bushes = plan["bushes"]
+        if wanted("bushes") and len(bushes):
+            rng = shading_rng(bushes["seed"])
+            parts["Bushes"] = {
+                "location": vec(bushes["x"], bushes["y"], bushes["z"]),
+                "scale": vec(bushes["scale_x"], bushes["scale_y"], bushes["scale_z"]),
+                "rotation": np.zeros((len(bushes), 3)),
+                "template_index": np.zeros(len(bushes), dtype=np.int32),
+                "palette": bushes["palette"],
+                "shading": sample_shading("bush", len(bushes), rng, bushes["palette"]),
+            }
+
+        flowers = plan["flowers"]
+        if wanted("flowers") and len(flowers):
+            h = flowers["stem_height"]
+            pr = flowers["petal_radius"]
+            rng = shading_rng(flowers["seed"])
+            parts["Flower_Stems"] = {
+                "location": vec(flowers["x"], flowers["y"], flowers["z"]),
+                "scale": vec(0.12, 0.12, h / 2),
+                "rotation": np.zeros((len(flowers), 3)),
+                "template_index": np.zeros(len(flowers), dtype=np.int32),
+                "palette": np.zeros(len(flowers), dtype=np.int16),
+                "shading": sample_shading("flower_stem", len(flowers), rng),
+            }
+            parts["Flower_Petals"] = {
+                "location": vec(flowers["x"], flowers["y"], flowers["z"] + h / 2 + 0.25),
+                "scale": vec(pr, pr, 0.25),
+                "rotation": vec(0.0, 0.0, flowers["petal_rotation"]),
+                "template_index": np.zeros(len(flowers), dtype=np.int32),
+                "palette": flowers["petal_palette"],
+                "shading": sample_shading("flower_petal", len(flowers), rng, flowers["petal_palette"]),
+            }
+
+        mushrooms = plan["mushrooms"]
+        if wanted("mushrooms") and len(mushrooms):
+            sr, sh = mushrooms["stalk_radius"], mushrooms["stalk_height"]
+            cr = mushrooms["cap_radius"]
+            rng = shading_rng(mushrooms["seed"])
+            parts["Mushroom_Stalks"] = {
+                "location": vec(mushrooms["x"], mushrooms["y"], mushrooms["z"]),
+                "scale": vec(sr, sr, sh / 2),
+                "rotation": np.zeros((len(mushrooms), 3)),
+                "template_index": np.zeros(len(mushrooms), dtype=np.int32),
+                "palette": np.zeros(len(mushrooms), dtype=np.int16),
+                "shading": sample_shading("mushroom_stalk", len(mushrooms), rng),
+            }
+            parts["Mushroom_Caps"] = {
+                "location": vec(mushrooms["x"], mushrooms["y"], mushrooms["z"] + sh / 2),
+                "scale": vec(cr, cr, cr * 0.5),
+                "rotation": np.zeros((len(mushrooms), 3)),
+                "template_index": np.zeros(len(mushrooms), dtype=np.int32),
+                "palette": mushrooms["cap_palette"],
+                "shading": sample_shading("mushroom_cap", len(mushrooms), rng, mushrooms["cap_palette"]),
+            }
+
+        return parts
+
+    # ============ BLENDER DATA ============
+
+    def template_collection(self, part, parent):
+        """
+        Hidden collection holding one object per template of a part.
+        Collection Info orders children by NAME, so the zero-padded index in
+        each object name is what template_index points at.
+        """
+        template_names, shading_kind = self.PARTS[part]
+        collection = tag(bpy.data.collections.new(f"{self.prefix}_{part}_Templates"))
+        parent.children.link(collection)
+        collection.hide_viewport = True
+        collection.hide_render = True
+
+        # Shared category material - instance variation comes from point attributes
+        material = self.material_engine.category_material(shading_kind)
+        for index, template in enumerate(template_names):
+            obj = self.templates.new_object(
+                template, f"{self.prefix}_{part}_{index:02d}_{template}", collection
+            )
+            self.material_engine.assign_material_to_object(obj, material)
+        return collection
+
+    def node_group(self):
+        """
+        Shared Geometry Nodes group:
+        Points -> Instance on Points (Collection Info, pick by template_index,
+        rotation/scale from named attributes) -> Instances.
+        """
+        group = bpy.data.node_groups.get(self.NODE_GROUP)
+        if group is not None:
+            return group
+
+        group = tag(bpy.data.node_groups.new(self.NODE_GROUP, 'GeometryNodeTree'), SHARED)
+        group.interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+        group.interface.new_socket("Templates", in_out='INPUT', socket_type='NodeSocketCollection')
+        group.interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+        nodes = group.nodes
+        links = group.links
+        group_input = nodes.new('NodeGroupInput')
+        group_input.location = (-600, 0)
+        group_output = nodes.new('NodeGroupOutput')
+        group_output.location = (400, 0)
+
+        collection_info = nodes.new('GeometryNodeCollectionInfo')
+        collection_info.location = (-300, -200)
+        collection_info.transform_space = 'ORIGINAL'
+        collection_info.inputs['Separate Children'].default_value = True
+        collection_info.inputs['Reset Children'].default_value = True
+
+        instancer = nodes.new('GeometryNodeInstanceOnPoints')
+        instancer.location = (100, 0)
+        instancer.inputs['Pick Instance'].default_value = True
+
+        links.new(group_input.outputs['Geometry'], instancer.inputs['Points'])
+        links.new(group_input.outputs['Templates'], collection_info.inputs['Collection'])
+        links.new(collection_info.outputs['Instances'], instancer.inputs['Instance'])
+
+        # Per-point attributes written by scatter()
+        for row, (socket, name, data_type) in enumerate((
+            ("Instance Index", "template_index", 'INT'),
+            ("Rotation", "instance_rotation", 'FLOAT_VECTOR'),
+            ("Scale", "instance_scale", 'FLOAT_VECTOR'),
+        )):
+            attribute = nodes.new('GeometryNodeInputNamedAttribute')
+            attribute.location = (-300, -400 - row * 150)
+            attribute.data_type = data_type
+            attribute.inputs['Name'].default_value = name
+            links.new(attribute.outputs['Attribute'], instancer.inputs[socket])
+
+        links.new(instancer.outputs['Instances'], group_output.inputs['Geometry'])
+        return group
+
+    def scatter(self, part, data, collection, templates_collection):
+        """
+        Writes one part into a point-cloud object driven by the shared node group.
+
+        Args:
+            part: Key of PARTS
+            data: Arrays from part_transforms()
+            collection: Collection to link the point cloud into
+            templates_collection: Collection with the part's template objects
+
+        Returns:
+            bpy.types.Object
+        """
+        count = len(data["location"])
+        mesh = tag(bpy.data.meshes.new(f"{self.prefix}_{part}"))
+        mesh.vertices.add(count)
+        mesh.vertices.foreach_set("co", data["location"].astype(np.float32).ravel())
+
+        # Bulk attribute writes - one foreach_set per attribute
+        attributes = [
+            ("instance_scale", 'FLOAT_VECTOR', "vector", data["scale"]),
+            ("instance_rotation", 'FLOAT_VECTOR', "vector", data["rotation"]),
+            ("template_index", 'INT', "value", data["template_index"]),
+            ("palette", 'INT', "value", data["palette"]),
+        ]
+        for name, values in data["shading"].items():
+            if name == "forest_color":
+                attributes.append((name, 'FLOAT_COLOR', "color", values))
+            else:
+                attributes.append((name, 'FLOAT', "value", values))
+        for name, attr_type, key, values in attributes:
+            attribute = mesh.attributes.new(name, attr_type, 'POINT')
+            dtype = np.int32 if attr_type == 'INT' else np.float32
+            attribute.data.foreach_set(key, np.asarray(values, dtype=dtype).ravel())
+        mesh.update()
+
+        obj = tag(bpy.data.objects.new(f"{self.prefix}_{part}", mesh))
+        collection.objects.link(obj)
+
+        group = self.node_group()
+        modifier = obj.modifiers.new("Forest_Instances", 'NODES')
+        modifier.node_group = group
+        modifier[group.interface.items_tree["Templates"].identifier] = templates_collection
+        return obj
+
+    def realize(self, plan, collection, categories=None):
+        """
+        Realizes the ground categories of a ScenePlan as instanced point clouds.
+
+        Args:
+            plan: ScenePlan
+            collection: Collection to link the point clouds into
+            categories: Plan categories to realize (all ground categories when None)
+
+        Returns:
+            int: Number of instances created
+        """
+        total = 0
+        for part, data in self.part_transforms(plan, categories).items():
+            templates_collection = self.template_collection(part, collection)
+            self.scatter(part, data, collection, templates_collection)
+            print(f"🧬 {part}: {len(data['location'])} instances")
+            total += len(data["location"])
+        return total
@@ -4,11 +4,14 @@ import os
 import importlib
 
 # 1. SETUP PATHS
-# Get the folder where your .blend file is saved
+# Get the folder this script lives in (falls back to the .blend folder when
+# run from a Text Editor block), so no saved .blend is needed in --background
 # This allows Python to find your other scripts (scene_manager.py)
-blend_dir = os.path.dirname(bpy.data.filepath)
-if blend_dir not in sys.path:
-    sys.path.append(blend_dir)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if not os.path.exists(os.path.join(script_dir, "scene_manager.py")):
+    script_dir = os.path.dirname(bpy.data.filepath)
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
 
 # 2. IMPORT & RELOAD
 # We use 'importlib.reload' to ensure Blender uses the latest version of your code
@@ -1,177 +1,92 @@
 import bpy
-import random
 import math
+import numpy as np
+import palettes
+import profiler
+from templates import MeshTemplateLibrary
+from animation import KeyframeWriter
+from scene_plan import ScenePlanner, FLIGHT_PATTERNS
+from shading import SHADING_INPUTS, sample_shading, shading_rng
+from datablocks import tag, SHARED
 
 class MaterialAssigner:
     """
     ENHANCED: Now includes materials for rocks, bushes, flowers, mushrooms, AND BUTTERFLIES!
     Handles all procedural material creation and assignment.
+    One shared material per category (constant material count); the
+    per-object variation lives in forest_* custom properties.
     """
     
-    def __init__(self):
+    def __init__(self, templates=None, keyframes=None):
         self.material_cache = {}
-        
-        # Existing color variants
-        self.bark_color_variants = [
-            (0.25, 0.15, 0.08), (0.15, 0.08, 0.03), (0.30, 0.20, 0.10),
-            (0.12, 0.08, 0.05), (0.20, 0.12, 0.08),
-        ]
-        
-        self.leaf_base_colors = [
-            (0.03, 0.25, 0.03),  
-            (0.04, 0.30, 0.04),
-            (0.05, 0.35, 0.05),  
-        ]
-        
-        self.ground_colors = [
-            (0.15, 0.25, 0.10), (0.20, 0.30, 0.12), (0.12, 0.20, 0.08),
-        ]
-        
-        # Rock color variants
-        self.rock_colors = [
-            (0.3, 0.3, 0.3),
-            (0.2, 0.2, 0.2),
-            (0.15, 0.15, 0.15),
-            (0.25, 0.22, 0.18),
-            (0.18, 0.18, 0.20),
-        ]
-        
-        # Bush color variants
-        self.bush_colors = [
-            (0.08, 0.40, 0.08),
-            (0.12, 0.50, 0.10),
-            (0.15, 0.55, 0.12),
-            (0.10, 0.45, 0.15),
-        ]
-        
-        # Flower petal colors
-        self.flower_colors = [
-            (0.9, 0.2, 0.3),
-            (0.95, 0.7, 0.2),
-            (0.8, 0.3, 0.8),
-            (1.0, 0.5, 0.0),
-            (0.9, 0.1, 0.5),
-            (1.0, 1.0, 0.9),
-        ]
-        
-        # Mushroom colors
-        self.mushroom_cap_colors = [
-            (0.8, 0.2, 0.2),
-            (0.9, 0.6, 0.3),
-            (0.7, 0.5, 0.3),
-            (0.95, 0.95, 0.9),
-        ]
-        
-        # NEW: Butterfly wing colors
-        self.butterfly_colors = [
-            (0.95, 0.6, 0.1),   # Orange Monarch
-            (0.2, 0.6, 0.95),   # Blue Morpho
-            (0.95, 0.9, 0.3),   # Yellow Swallowtail
-            (0.9, 0.3, 0.7),    # Pink
-            (0.3, 0.8, 0.4),    # Green
-            (0.95, 0.5, 0.2),   # Orange-Red
-        ]
+        # Shared mesh templates for sky elements (clouds, birds)
+        self.templates = templates if templates is not None else MeshTemplateLibrary()
+        # Bulk keyframe writer (flushed by whoever owns it)
+        self.keyframes = keyframes if keyframes is not None else KeyframeWriter()
+        # Planner for standalone sky calls (scene runs pass planned rows in)
+        self.planner = None
+        # Fallback stream for materials created without a per-object seed
+        self.rng = np.random.default_rng()
+        
+        # Color variants (palettes live in palettes.py so planning stays bpy-free)
+        self.bark_color_variants = palettes.BARK_COLORS
+        self.leaf_base_colors = palettes.LEAF_COLORS
+        self.ground_colors = palettes.GROUND_COLORS
+        self.rock_colors = palettes.ROCK_COLORS
+        self.bush_colors = palettes.BUSH_COLORS
+        self.flower_colors = palettes.FLOWER_COLORS
+        self.mushroom_cap_colors = palettes.MUSHROOM_CAP_COLORS
+        self.butterfly_colors = palettes.BUTTERFLY_COLORS
     
     def apply_smooth_shading(self, obj):
-        """Removes harsh edges."""
+        """
+        Removes harsh edges by smooth-shading the object's mesh at the data level.
+        Objects from "smooth" templates are already smooth (shaded once per
+        template mesh) and need no call; on a shared template mesh this
+        changes every object using it.
+        """
         if obj and obj.type == 'MESH':
-            bpy.context.view_layer.objects.active = obj
-            obj.select_set(True)
-            bpy.ops.object.shade_smooth()
-            obj.select_set(False)
+            self.templates.set_smooth(obj.data)
     
-    # ============ EXISTING MATERIALS ============
+    def object_rng(self, seed=None):
+        """
+        Returns the material stream for one object.
+        A planned seed gives the object its own keyed stream (shading_rng),
+        so its material never depends on how many objects were shaded
+        before it and matches the instancing backend.
+        """
+        if seed is None:
+            return self.rng
+        return shading_rng([seed])
     
-    def create_bark_material(self, name_suffix=""):
-        mat_name = f"Bark_Material_{name_suffix}_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        base_color = random.choice(self.bark_color_variants)
-        color_variation = random.uniform(-0.05, 0.08)
-        final_color = (
-            max(0, min(1, base_color[0] + color_variation)),
-            max(0, min(1, base_color[1] + color_variation)),
-            max(0, min(1, base_color[2] + color_variation)),
-            1.0
-        )
-        
-        bsdf_node.inputs['Base Color'].default_value = final_color
-        bsdf_node.inputs['Roughness'].default_value = random.uniform(0.6, 0.95)
-        bsdf_node.inputs['Specular IOR Level'].default_value = random.uniform(0.1, 0.4)
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
+    def pick_color(self, palette, palette_index=None, rng=None):
+        """Returns the planned palette entry, or a random one when no plan index is given."""
+        if palette_index is None:
+            rng = rng if rng is not None else self.rng
+            return palette[int(rng.integers(len(palette), size=1)[0])]
+        return palette[palette_index]
     
-    def create_leaf_material(self, name_suffix=""):
-        mat_name = f"Leaf_Material_{name_suffix}_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        base_color = random.choice(self.leaf_base_colors)
-        hue_shift = random.uniform(-0.08, 0.12)
-        brightness_shift = random.uniform(-0.10, 0.15)
-        final_color = (
-            max(0, min(1, base_color[0] + hue_shift)),
-            max(0, min(1, base_color[1] + brightness_shift)),
-            max(0, min(1, base_color[2] + hue_shift)),
-            1.0
-        )
-        
-        bsdf_node.inputs['Base Color'].default_value = final_color
-        bsdf_node.inputs['Roughness'].default_value = random.uniform(0.2, 0.7)
-        bsdf_node.inputs['Subsurface Weight'].default_value = random.uniform(0.15, 0.4)
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
+    # ============ SHARED CATEGORY MATERIALS ============
     
-    def create_ground_material(self):
-        mat_name = "Ground_Material_Base"
-        if mat_name in bpy.data.materials:
-            return bpy.data.materials[mat_name]
-        
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        base_color = random.choice(self.ground_colors)
-        final_color = (base_color[0], base_color[1], base_color[2], 1.0)
-        
-        bsdf_node.inputs['Base Color'].default_value = final_color
-        bsdf_node.inputs['Roughness'].default_value = 0.85
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
+    def category_material_name(self, kind):
+        """Datablock name of a shading kind's shared material (e.g. Forest_FlowerPetal_Material)."""
+        return f"Forest_{kind.title().replace('_', '')}_Material"
     
-    def create_cloud_material(self):
-        mat_name = f"Cloud_Material_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
+    def category_material(self, kind):
+        """
+        Returns THE material for a shading kind ("bark", "rock", ...), built once.
+        Its Principled BSDF inputs come from Attribute nodes in INSTANCER mode,
+        which read the forest_* custom properties of each object - or the
+        point attributes of Geometry Nodes instances - so per-object variation
+        costs no extra node trees or shader compiles.
+        Materials appended from the AssetLibrary are found by name and reused.
+        """
+        mat_name = self.category_material_name(kind)
+        mat = bpy.data.materials.get(mat_name)
+        if mat is not None:
+            return mat
+        
+        mat = tag(bpy.data.materials.new(name=mat_name), SHARED)
         mat.use_nodes = True
         nodes = mat.node_tree.nodes
         links = mat.node_tree.links
@@ -182,230 +97,50 @@ class MaterialAssigner:
         bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
         bsdf_node.location = (0, 0)
         
-        whiteness = random.uniform(0.85, 0.98)
-        cloud_color = (whiteness, whiteness, whiteness, 1.0)
-        
-        bsdf_node.inputs['Base Color'].default_value = cloud_color
-        bsdf_node.inputs['Roughness'].default_value = 0.9
-        bsdf_node.inputs['Subsurface Weight'].default_value = 0.3
+        for row, (attribute_name, bsdf_input) in enumerate(SHADING_INPUTS):
+            attribute_node = nodes.new(type='ShaderNodeAttribute')
+            attribute_node.location = (-300, -row * 160)
+            attribute_node.attribute_type = 'INSTANCER'
+            attribute_node.attribute_name = attribute_name
+            output = 'Color' if attribute_name == "forest_color" else 'Fac'
+            links.new(attribute_node.outputs[output], bsdf_node.inputs[bsdf_input])
         links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
         
         self.material_cache[mat_name] = mat
         return mat
     
-    def create_bird_material(self):
-        mat_name = f"Bird_Material_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        darkness = random.uniform(0.05, 0.15)
-        bird_color = (darkness, darkness * 0.8, darkness * 0.6, 1.0)
-        
-        bsdf_node.inputs['Base Color'].default_value = bird_color
-        bsdf_node.inputs['Roughness'].default_value = 0.7
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
+    def apply_shading(self, obj, kind, palette_index=None, rng=None):
+        """
+        Gives one object its category material and per-object values.
+        
+        Args:
+            obj: Object to shade
+            kind: Key of shading.SHADING_KINDS
+            palette_index: Planned palette entry (random when omitted)
+            rng: Object's own stream (see object_rng)
+        """
+        rng = rng if rng is not None else self.rng
+        values = sample_shading(kind, 1, rng, None if palette_index is None else [palette_index])
+        self.write_shading(obj, values)
+        self.assign_material_to_object(obj, self.category_material(kind))
     
-    # ============ MATERIALS FOR NEW OBJECTS ============
+    def write_shading(self, obj, values, index=0):
+        """Stores one row of sample_shading() values as the object's forest_* properties."""
+        with profiler.phase("shading"):
+            for name, column in values.items():
+                value = column[index]
+                obj[name] = value.tolist() if np.ndim(value) else float(value)
     
-    def create_rock_material(self):
-        """Creates realistic rock material with gray/brown tones."""
-        mat_name = f"Rock_Material_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        base_color = random.choice(self.rock_colors)
-        variation = random.uniform(-0.03, 0.03)
-        final_color = (
-            max(0, min(1, base_color[0] + variation)),
-            max(0, min(1, base_color[1] + variation)),
-            max(0, min(1, base_color[2] + variation)),
-            1.0
-        )
-        
-        bsdf_node.inputs['Base Color'].default_value = final_color
-        bsdf_node.inputs['Roughness'].default_value = random.uniform(0.8, 1.0)
-        bsdf_node.inputs['Specular IOR Level'].default_value = random.uniform(0.05, 0.15)
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
+    # ============ GROUND MATERIAL ============
     
-    def create_bush_material(self):
-        """Creates leafy bush material with green variations."""
-        mat_name = f"Bush_Material_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        base_color = random.choice(self.bush_colors)
-        variation = random.uniform(-0.05, 0.08)
-        final_color = (
-            max(0, min(1, base_color[0] + variation)),
-            max(0, min(1, base_color[1] + variation)),
-            max(0, min(1, base_color[2] + variation)),
-            1.0
-        )
-        
-        bsdf_node.inputs['Base Color'].default_value = final_color
-        bsdf_node.inputs['Roughness'].default_value = random.uniform(0.4, 0.7)
-        bsdf_node.inputs['Subsurface Weight'].default_value = random.uniform(0.2, 0.4)
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
-    
-    def create_flower_petal_material(self):
-        """Creates vibrant flower petal material."""
-        mat_name = f"Flower_Petal_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        base_color = random.choice(self.flower_colors)
-        final_color = (base_color[0], base_color[1], base_color[2], 1.0)
-        
-        bsdf_node.inputs['Base Color'].default_value = final_color
-        bsdf_node.inputs['Roughness'].default_value = random.uniform(0.3, 0.6)
-        bsdf_node.inputs['Specular IOR Level'].default_value = random.uniform(0.4, 0.7)
-        bsdf_node.inputs['Subsurface Weight'].default_value = random.uniform(0.3, 0.5)
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
-    
-    def create_flower_stem_material(self):
-        """Creates green stem material for flowers."""
-        mat_name = "Flower_Stem_Material"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        stem_color = (0.1, 0.4, 0.1, 1.0)
-        
-        bsdf_node.inputs['Base Color'].default_value = stem_color
-        bsdf_node.inputs['Roughness'].default_value = 0.6
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
-    
-    def create_mushroom_cap_material(self):
-        """Creates colorful mushroom cap material."""
-        mat_name = f"Mushroom_Cap_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        base_color = random.choice(self.mushroom_cap_colors)
-        final_color = (base_color[0], base_color[1], base_color[2], 1.0)
-        
-        bsdf_node.inputs['Base Color'].default_value = final_color
-        bsdf_node.inputs['Roughness'].default_value = random.uniform(0.4, 0.7)
-        bsdf_node.inputs['Specular IOR Level'].default_value = random.uniform(0.3, 0.5)
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
-    
-    def create_mushroom_stalk_material(self):
-        """Creates white/cream mushroom stalk material."""
-        mat_name = "Mushroom_Stalk_Material"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        stalk_color = (0.9, 0.88, 0.85, 1.0)
-        
-        bsdf_node.inputs['Base Color'].default_value = stalk_color
-        bsdf_node.inputs['Roughness'].default_value = 0.7
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        self.material_cache[mat_name] = mat
-        return mat
-    
-    # ============ NEW: BUTTERFLY MATERIALS ============
-    
-    def create_butterfly_body_material(self):
-        """Creates dark body material for butterfly."""
-        mat_name = f"Butterfly_Body_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-        nodes.clear()
-        
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf_node.location = (0, 0)
-        
-        body_color = (0.05, 0.05, 0.05, 1.0)  # Dark brown/black
-        
-        bsdf_node.inputs['Base Color'].default_value = body_color
-        bsdf_node.inputs['Roughness'].default_value = 0.8
-        links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
+    def create_ground_material(self, rng=None):
+        rng = rng if rng is not None else self.rng
+        mat_name = "Ground_Material_Base"
+        if mat_name in bpy.data.materials:
+            return bpy.data.materials[mat_name]
         
-        self.material_cache[mat_name] = mat
-        return mat
-    
-    def create_butterfly_wing_material(self):
-        """Creates vibrant wing material for butterfly."""
-        mat_name = f"Butterfly_Wing_{random.randint(1000, 9999)}"
-        mat = bpy.data.materials.new(name=mat_name)
+        # Per-scene: its color is drawn per run, so reset_scene frees it
+        mat = tag(bpy.data.materials.new(name=mat_name))
         mat.use_nodes = True
         nodes = mat.node_tree.nodes
         links = mat.node_tree.links
@@ -416,13 +151,11 @@ class MaterialAssigner:
         bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
         bsdf_node.location = (0, 0)
         
-        base_color = random.choice(self.butterfly_colors)
+        base_color = self.pick_color(self.ground_colors, rng=rng)
         final_color = (base_color[0], base_color[1], base_color[2], 1.0)
         
         bsdf_node.inputs['Base Color'].default_value = final_color
-        bsdf_node.inputs['Roughness'].default_value = random.uniform(0.2, 0.4)
-        bsdf_node.inputs['Specular IOR Level'].default_value = random.uniform(0.5, 0.8)
-        bsdf_node.inputs['Metallic'].default_value = random.uniform(0.1, 0.3)  # Slight shimmer
+        bsdf_node.inputs['Roughness'].default_value = 0.85
         links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
         
         self.material_cache[mat_name] = mat
@@ -431,94 +164,98 @@ class MaterialAssigner:
     # ============ MATERIAL APPLICATION METHODS ============
     
     def assign_material_to_object(self, obj, material):
-        """Safely assigns material to a Blender object."""
+        """
+        Safely assigns material to a Blender object.
+        Objects share template meshes, so the material is linked to the
+        OBJECT slot instead of the mesh (otherwise every duplicate changes).
+        """
         if obj is None or not hasattr(obj, 'data'):
             print(f"Warning: Invalid object for material assignment")
             return
         
         try:
-            obj.data.materials.clear()
-            obj.data.materials.append(material)
+            with profiler.phase("materials"):
+                if len(obj.data.materials) == 0:
+                    obj.data.materials.append(None)
+                slot = obj.material_slots[0]
+                slot.link = 'OBJECT'
+                slot.material = material
         except Exception as e:
             print(f"Error assigning material to {obj.name}: {e}")
     
-    def apply_tree_materials(self, trunk_obj, leaves_obj):
+    def apply_tree_materials(self, trunk_obj, leaves_obj, bark_palette=None, leaf_palette=None, seed=None):
         """Applies materials to tree components."""
-        bark_mat = self.create_bark_material(name_suffix=trunk_obj.name)
-        leaf_mat = self.create_leaf_material(name_suffix=leaves_obj.name)
-        
-        self.assign_material_to_object(trunk_obj, bark_mat)
-        self.assign_material_to_object(leaves_obj, leaf_mat)
-        self.apply_smooth_shading(trunk_obj)
-        self.apply_smooth_shading(leaves_obj)
+        rng = self.object_rng(seed)
+        self.apply_shading(trunk_obj, "bark", bark_palette, rng)
+        self.apply_shading(leaves_obj, "leaf", leaf_palette, rng)
     
-    def apply_ground_material(self, ground_obj):
+    def apply_ground_material(self, ground_obj, seed=None):
         """Applies ground material to ground plane."""
-        ground_mat = self.create_ground_material()
+        ground_mat = self.create_ground_material(rng=self.object_rng(seed))
         self.assign_material_to_object(ground_obj, ground_mat)
     
-    def apply_rock_material(self, rock_obj):
+    def apply_rock_material(self, rock_obj, palette_index=None, seed=None):
         """Applies rock material."""
-        rock_mat = self.create_rock_material()
-        self.assign_material_to_object(rock_obj, rock_mat)
-        self.apply_smooth_shading(rock_obj)
+        self.apply_shading(rock_obj, "rock", palette_index, self.object_rng(seed))
     
-    def apply_bush_material(self, bush_obj):
+    def apply_bush_material(self, bush_obj, palette_index=None, seed=None):
         """Applies bush material."""
-        bush_mat = self.create_bush_material()
-        self.assign_material_to_object(bush_obj, bush_mat)
-        self.apply_smooth_shading(bush_obj)
+        self.apply_shading(bush_obj, "bush", palette_index, self.object_rng(seed))
     
-    def apply_flower_materials(self, stem_obj, petal_obj):
+    def apply_flower_materials(self, stem_obj, petal_obj, petal_palette=None, seed=None):
         """Applies materials to flower parts."""
-        stem_mat = self.create_flower_stem_material()
-        petal_mat = self.create_flower_petal_material()
-        
-        self.assign_material_to_object(stem_obj, stem_mat)
-        self.assign_material_to_object(petal_obj, petal_mat)
-        self.apply_smooth_shading(petal_obj)
+        rng = self.object_rng(seed)
+        self.apply_shading(stem_obj, "flower_stem", rng=rng)
+        self.apply_shading(petal_obj, "flower_petal", petal_palette, rng)
     
-    def apply_mushroom_materials(self, stalk_obj, cap_obj):
+    def apply_mushroom_materials(self, stalk_obj, cap_obj, cap_palette=None, seed=None):
         """Applies materials to mushroom parts."""
-        stalk_mat = self.create_mushroom_stalk_material()
-        cap_mat = self.create_mushroom_cap_material()
-        
-        self.assign_material_to_object(stalk_obj, stalk_mat)
-        self.assign_material_to_object(cap_obj, cap_mat)
-        self.apply_smooth_shading(stalk_obj)
-        self.apply_smooth_shading(cap_obj)
+        rng = self.object_rng(seed)
+        self.apply_shading(stalk_obj, "mushroom_stalk", rng=rng)
+        self.apply_shading(cap_obj, "mushroom_cap", cap_palette, rng)
     
-    def apply_butterfly_materials(self, body_obj, left_wing_obj, right_wing_obj):
+    def apply_butterfly_materials(self, body_obj, left_wing_obj, right_wing_obj, wing_palette=None, seed=None):
         """Applies materials to butterfly parts."""
-        body_mat = self.create_butterfly_body_material()
-        wing_mat = self.create_butterfly_wing_material()  # Same color for both wings
-        
-        self.assign_material_to_object(body_obj, body_mat)
-        self.assign_material_to_object(left_wing_obj, wing_mat)
-        self.assign_material_to_object(right_wing_obj, wing_mat)
-        self.apply_smooth_shading(body_obj)
+        rng = self.object_rng(seed)
+        self.apply_shading(body_obj, "butterfly_body", rng=rng)
+        # Same color for both wings
+        wing_values = sample_shading("butterfly_wing", 1, rng,
+                                     None if wing_palette is None else [wing_palette])
+        for wing in (left_wing_obj, right_wing_obj):
+            self.write_shading(wing, wing_values)
+            self.assign_material_to_object(wing, self.category_material("butterfly_wing"))
     
     # ============ SKY ELEMENTS ============
     
-    def create_cloud(self, collection, position):
-        """Creates a cloud with slow drifting animation."""
-        bpy.ops.mesh.primitive_uv_sphere_add(radius=random.uniform(1.5, 2.5), location=position)
-        cloud = bpy.context.active_object
-        cloud.name = f"Cloud_{random.randint(100, 999)}"
-
-        for c in cloud.users_collection:
-            c.objects.unlink(cloud)
-        collection.objects.link(cloud)
+    def plan_one(self, category, spec=None):
+        """Returns the given plan row, or plans a single sky element."""
+        if spec is not None:
+            return spec
+        if self.planner is None:
+            self.planner = ScenePlanner()
+        return self.planner.plan_category(category, 1)[0]
+    
+    def create_cloud(self, collection, position=None, spec=None):
+        """
+        Creates a cloud with slow drifting animation.
+        
+        Args:
+            collection: Target collection
+            position: (x, y, z) start position; the planned one when None
+            spec: Planned cloud row (planned on the spot when None)
+        """
+        spec = self.plan_one("clouds", spec)
+        if position is None:
+            position = (spec["x"], spec["y"], spec["z"])
+        position = tuple(float(value) for value in position)
+        cloud = self.templates.new_object(
+            "uv_sphere_32x16", f"Cloud_{spec['id']}", collection, location=position
+        )
 
         # Scale cloud for fluffy shape
-        cloud.scale = (
-            random.uniform(2.5, 4.0),
-            random.uniform(1.5, 3.0),
-            random.uniform(0.8, 1.5)
-        )
+        cloud.scale = (spec["scale_x"], spec["scale_y"], spec["scale_z"])
 
-        cloud_mat = self.create_cloud_material()
-        self.assign_material_to_object(cloud, cloud_mat)
+        self.apply_shading(cloud, "cloud", rng=self.object_rng(spec["seed"]))
 
         # ==========================
         # ☁️ CLOUD ANIMATION
@@ -529,140 +266,156 @@ class MaterialAssigner:
         start_x, start_y, start_z = position
 
         # Random wind direction
-        wind_dir = random.uniform(0, math.pi * 2)
-        drift_distance = random.uniform(8, 15)
-        vertical_wobble = random.uniform(0.5, 1.2)
+        wind_dir = spec["wind_direction"]
+        drift_distance = spec["drift_distance"]
+        vertical_wobble = spec["vertical_wobble"]
 
         end_x = start_x + math.cos(wind_dir) * drift_distance
         end_y = start_y + math.sin(wind_dir) * drift_distance
 
-        # Start keyframe
-        cloud.location = (start_x, start_y, start_z)
-        cloud.keyframe_insert(data_path="location", frame=start_frame)
+        # Start and end keyframes
+        self.keyframes.add_vector(cloud, "location", [start_frame, end_frame], [
+            (start_x, start_y, start_z),
+            (end_x, end_y, start_z)
+        ])
 
-        # End keyframe
-        cloud.location = (end_x, end_y, start_z)
-        cloud.keyframe_insert(data_path="location", frame=end_frame)
-
-        # Gentle vertical wobble
-        for frame in range(start_frame, end_frame + 1, 40):
-            z_offset = math.sin(frame * 0.05) * vertical_wobble
-            cloud.location = (
-                start_x + math.cos(wind_dir) * drift_distance * (frame / end_frame),
-                start_y + math.sin(wind_dir) * drift_distance * (frame / end_frame),
-                start_z + z_offset
-            )
-            cloud.keyframe_insert(data_path="location", frame=frame)
+        # Gentle vertical wobble (replaces the start key on the shared frame)
+        frames = np.arange(start_frame, end_frame + 1, 40)
+        drift = drift_distance * (frames / end_frame)
+        self.keyframes.add_vector(cloud, "location", frames, np.column_stack((
+            start_x + math.cos(wind_dir) * drift,
+            start_y + math.sin(wind_dir) * drift,
+            start_z + np.sin(frames * 0.05) * vertical_wobble
+        )))
 
         return cloud
 
         
-    def create_bird(self, collection, position):
-        """Creates an animated bird that flies across the sky."""
-        bpy.ops.mesh.primitive_uv_sphere_add(radius=0.5, location=position)
-        bird = bpy.context.active_object
-        bird.name = f"Bird_{random.randint(100, 999)}"
+    def create_bird(self, collection, position=None, spec=None, trajectory=None):
+        """
+        Creates an animated bird that flies across the sky.
+        
+        Args:
+            collection: Target collection
+            position: (x, y, z) start position; the planned one when None
+            spec: Planned bird row (planned on the spot when None)
+            trajectory: (frames, positions, headings) from a flocking.Flock
+                simulation; when None the bird flies its planned flight pattern
+        """
+        spec = self.plan_one("birds", spec)
+        if position is None:
+            position = (spec["x"], spec["y"], spec["z"])
+        position = tuple(float(value) for value in position)
+        bird = self.templates.new_object(
+            "uv_sphere_32x16", f"Bird_{spec['id']}", collection, location=position
+        )
         
-        for c in bird.users_collection:
-            c.objects.unlink(bird)
-        collection.objects.link(bird)
+        # Scale to bird-like proportions (template radius 1, bird radius 0.5)
+        bird.scale = (0.75, 0.15, 0.1)
+        bird.rotation_euler.z = spec["heading"]
         
-        # Scale to bird-like proportions
-        bird.scale = (1.5, 0.3, 0.2)
-        bird.rotation_euler.z = random.uniform(0, math.pi * 2)
+        self.apply_shading(bird, "bird", rng=self.object_rng(spec["seed"]))
         
-        bird_mat = self.create_bird_material()
-        self.assign_material_to_object(bird, bird_mat)
+        if trajectory is not None:
+            # ANIMATION: Simulated flock path, written as bulk keys
+            frames, locations, headings = trajectory
+            self.keyframes.add_vector(bird, "location", frames, locations)
+            self.keyframes.add(bird, "rotation_euler", frames, headings, index=2)
+            return bird
         
         # ANIMATION: Bird flies in a path across the sky
         start_pos = position
         
         # Choose random flight pattern
-        flight_pattern = random.choice(['straight', 'circular', 'wavy'])
+        flight_pattern = FLIGHT_PATTERNS[spec["flight_pattern"]]
+        direction = spec["direction"]
+        distance = spec["distance"]
         
         if flight_pattern == 'straight':
             # Straight line flight
-            direction = random.uniform(0, math.pi * 2)
-            distance = random.uniform(30, 50)
-            
             end_x = start_pos[0] + math.cos(direction) * distance
             end_y = start_pos[1] + math.sin(direction) * distance
-            end_z = start_pos[2] + random.uniform(-2, 3)
+            end_z = start_pos[2] + spec["end_dz"]
             
-            # Start position
-            bird.location = start_pos
+            # Start and end position (heading stays constant)
             bird.rotation_euler.z = direction
-            bird.keyframe_insert(data_path="location", frame=1)
-            bird.keyframe_insert(data_path="rotation_euler", frame=1)
-            
-            # End position
-            bird.location = (end_x, end_y, end_z)
-            bird.keyframe_insert(data_path="location", frame=120)
+            self.keyframes.add_vector(bird, "location", [1, 120], [
+                start_pos,
+                (end_x, end_y, end_z)
+            ])
             
         elif flight_pattern == 'circular':
             # Circular flight pattern
-            radius = random.uniform(8, 15)
+            radius = spec["circle_radius"]
             center_x = start_pos[0]
             center_y = start_pos[1]
             base_z = start_pos[2]
             
-            for frame in range(1, 121, 10):
-                angle = (frame / 120) * math.pi * 4  # 2 full circles
-                x = center_x + radius * math.cos(angle)
-                y = center_y + radius * math.sin(angle)
-                z = base_z + math.sin(frame / 15) * 2  # Up and down motion
-                
-                bird.location = (x, y, z)
-                bird.rotation_euler.z = angle + math.pi/2  # Face direction of movement
-                bird.keyframe_insert(data_path="location", frame=frame)
-                bird.keyframe_insert(data_path="rotation_euler", frame=frame)
+            frames = np.arange(1, 121, 10)
+            angle = (frames / 120) * math.pi * 4  # 2 full circles
+            self.keyframes.add_vector(bird, "location", frames, np.column_stack((
+                center_x + radius * np.cos(angle),
+                center_y + radius * np.sin(angle),
+                base_z + np.sin(frames / 15) * 2  # Up and down motion
+            )))
+            # Face direction of movement
+            self.keyframes.add(bird, "rotation_euler", frames, angle + math.pi/2, index=2)
         
         else:  # wavy
             # Wavy flight pattern
-            direction = random.uniform(0, math.pi * 2)
-            distance = random.uniform(30, 50)
-            wave_amplitude = random.uniform(3, 6)
+            wave_amplitude = spec["wave_amplitude"]
+            
+            frames = np.arange(1, 121, 10)
+            progress = frames / 120
+            
+            # Main direction movement
+            base_x = start_pos[0] + math.cos(direction) * distance * progress
+            base_y = start_pos[1] + math.sin(direction) * distance * progress
             
-            for frame in range(1, 121, 10):
-                progress = frame / 120
-                
-                # Main direction movement
-                base_x = start_pos[0] + math.cos(direction) * distance * progress
-                base_y = start_pos[1] + math.sin(direction) * distance * progress
-                
-                # Add wavy motion perpendicular to direction
-                wave = math.sin(progress * math.pi * 6) * wave_amplitude
-                x = base_x + math.cos(direction + math.pi/2) * wave
-                y = base_y + math.sin(direction + math.pi/2) * wave
-                z = start_pos[2] + math.sin(progress * math.pi * 4) * 2
-                
-                bird.location = (x, y, z)
-                bird.rotation_euler.z = direction + math.sin(progress * math.pi * 6) * 0.3
-                bird.keyframe_insert(data_path="location", frame=frame)
-                bird.keyframe_insert(data_path="rotation_euler", frame=frame)
+            # Add wavy motion perpendicular to direction
+            wave = np.sin(progress * math.pi * 6) * wave_amplitude
+            self.keyframes.add_vector(bird, "location", frames, np.column_stack((
+                base_x + math.cos(direction + math.pi/2) * wave,
+                base_y + math.sin(direction + math.pi/2) * wave,
+                start_pos[2] + np.sin(progress * math.pi * 4) * 2
+            )))
+            self.keyframes.add(bird, "rotation_euler", frames,
+                               direction + np.sin(progress * math.pi * 6) * 0.3, index=2)
         
         return bird
 
-    def generate_sky_elements(self, collection, count_clouds=3, count_birds=6):
-        """Generates clouds and animated birds in the sky."""
-        print(f"Generating {count_clouds} clouds and {count_birds} birds...")
+    def generate_sky_elements(self, collection, count_clouds=3, count_birds=6, clouds=None, birds=None,
+                              trajectories=None):
+        """
+        Generates clouds and animated birds in the sky.
+        
+        Args:
+            collection: Target collection
+            count_clouds: Number of clouds to plan when no plan is given
+            count_birds: Number of birds to plan when no plan is given
+            clouds: Planned cloud rows (ScenePlan["clouds"])
+            birds: Planned bird rows (ScenePlan["birds"])
+            trajectories: (frames, positions, headings) of Flock.simulate for
+                all birds; None keeps the independent flight patterns
+        """
+        if self.planner is None:
+            self.planner = ScenePlanner()
+        if clouds is None:
+            clouds = self.planner.plan_clouds(count_clouds)
+        if birds is None:
+            birds = self.planner.plan_birds(count_birds)
+        print(f"Generating {len(clouds)} clouds and {len(birds)} birds...")
         
         # Generate clouds at higher altitude
-        for i in range(count_clouds):
-            pos = (
-                random.uniform(-20, 20),
-                random.uniform(-20, 20),
-                random.uniform(15, 25)  # Higher up for clouds
-            )
-            self.create_cloud(collection, pos)
+        for spec in clouds:
+            self.create_cloud(collection, spec=spec)
         
         # Generate birds at lower altitude (below clouds) with ANIMATION
-        for i in range(count_birds):
-            pos = (
-                random.uniform(-15, 15),
-                random.uniform(-15, 15),
-                random.uniform(8, 14)  # Lower than clouds
-            )
-            self.create_bird(collection, pos)
+        for index, spec in enumerate(birds):
+            trajectory = None
+            if trajectories is not None:
+                frames, positions, headings = trajectories
+                trajectory = (frames, positions[index], headings[index])
+            self.create_bird(collection, spec=spec, trajectory=trajectory)
         
         print("✅ Sky elements with animated birds generated!")
\ No newline at end of file
@@ -0,0 +1,65 @@
+# palettes.py
+"""
+Color palettes shared by the planner (palette indices) and MaterialAssigner (colors).
+Kept free of bpy so scene planning can run outside Blender.
+"""
+
+BARK_COLORS = [
+    (0.25, 0.15, 0.08), (0.15, 0.08, 0.03), (0.30, 0.20, 0.10),
+    (0.12, 0.08, 0.05), (0.20, 0.12, 0.08),
+]
+
+LEAF_COLORS = [
+    (0.03, 0.25, 0.03),
+    (0.04, 0.30, 0.04),
+    (0.05, 0.35, 0.05),
+]
+
+GROUND_COLORS = [
+    (0.15, 0.25, 0.10), (0.20, 0.30, 0.12), (0.12, 0.20, 0.08),
+]
+
+# Rock color variants
+ROCK_COLORS = [
+    (0.3, 0.3, 0.3),
+    (0.2, 0.2, 0.2),
+    (0.15, 0.15, 0.15),
+    (0.25, 0.22, 0.18),
+    (0.18, 0.18, 0.20),
+]
+
+# Bush color variants
+BUSH_COLORS = [
+    (0.08, 0.40, 0.08),
+    (0.12, 0.50, 0.10),
+    (0.15, 0.55, 0.12),
+    (0.10, 0.45, 0.15),
+]
+
+# Flower petal colors
+FLOWER_COLORS = [
+    (0.9, 0.2, 0.3),
+    (0.95, 0.7, 0.2),
+    (0.8, 0.3, 0.8),
+    (1.0, 0.5, 0.0),
+    (0.9, 0.1, 0.5),
+    (1.0, 1.0, 0.9),
+]
+
+# Mushroom colors
+MUSHROOM_CAP_COLORS = [
+    (0.8, 0.2, 0.2),
+    (0.9, 0.6, 0.3),
+    (0.7, 0.5, 0.3),
+    (0.95, 0.95, 0.9),
+]
+
+# Butterfly wing colors
+BUTTERFLY_COLORS = [
+    (0.95, 0.6, 0.1),   # Orange Monarch
+    (0.2, 0.6, 0.95),   # Blue Morpho
+    (0.95, 0.9, 0.3),   # Yellow Swallowtail
+    (0.9, 0.3, 0.7),    # Pink
+    (0.3, 0.8, 0.4),    # Green
+    (0.95, 0.5, 0.2),   # Orange-Red
+]
@@ -0,0 +1,364 @@
+# placement.py
+"""
+Blue-noise placement on the ground plane.
+Objects are discs (a footprint radius each); a placement is valid when no
+two discs overlap - across ALL categories, so mushrooms stay out of trunks
+and bushes stop swallowing rocks. Everything is vectorized NumPy and
+bpy-free, so it runs inside the planning stage.
+"""
+import numpy as np
+
+
+class SpatialHashGrid:
+    """
+    Uniform grid over 2D discs, stored CSR-style: points sorted by cell plus
+    dense cell_start / cell_count arrays. A neighbour query touches only the
+    cells within reach, so checking n candidates costs O(n), not O(n * m).
+    """
+
+    def __init__(self, bounds, cell_size=2.0):
+        """
+        Args:
+            bounds: (xmin, ymin, xmax, ymax) of the area (points outside are
+                clamped into the border cells, queries stay exact)
+            cell_size: Grid spacing in meters
+        """
+        self.xmin, self.ymin, xmax, ymax = bounds
+        self.cell_size = float(cell_size)
+        self.nx = max(1, int(np.ceil((xmax - self.xmin) / self.cell_size)))
+        self.ny = max(1, int(np.ceil((ymax - self.ymin) / self.cell_size)))
+        self.build(np.zeros((0, 2)), np.zeros(0))
+
+    def __len__(self):
+        return len(self.points)
+
+    def cells(self, points):
+        """Returns (ix, iy) cell coordinates for an (n, 2) array of points."""
+        ix = np.floor((points[:, 0] - self.xmin) / self.cell_size).astype(np.int64)
+        iy = np.floor((points[:, 1] - self.ymin) / self.cell_size).astype(np.int64)
+        return np.clip(ix, 0, self.nx - 1), np.clip(iy, 0, self.ny - 1)
+
+    def build(self, points, radii):
+        """Replaces the grid contents with new discs (one sort, one bincount)."""
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.radii = np.asarray(radii, dtype=np.float64).reshape(-1)
+        self.max_radius = float(self.radii.max()) if len(self.radii) else 0.0
+
+        ix, iy = self.cells(self.points)
+        cell = ix * self.ny + iy
+        self.order = np.argsort(cell, kind="stable")
+        self.cell_count = np.bincount(cell, minlength=self.nx * self.ny)
+        self.cell_start = np.concatenate(([0], np.cumsum(self.cell_count)[:-1]))
+
+    def add(self, points, radii):
+        """Appends discs and rebuilds the cell arrays."""
+        self.build(
+            np.concatenate((self.points, np.asarray(points, dtype=np.float64).reshape(-1, 2))),
+            np.concatenate((self.radii, np.asarray(radii, dtype=np.float64).reshape(-1)))
+        )
+
+    def query_pairs(self, points, radii):
+        """
+        Finds every (query, stored) pair of overlapping discs.
+
+        Args:
+            points: (n, 2) query centres
+            radii: (n,) query radii
+
+        Returns:
+            (query_index, stored_index) integer arrays
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        radii = np.asarray(radii, dtype=np.float64).reshape(-1)
+        empty = np.zeros(0, dtype=np.int64)
+        if len(points) == 0 or len(self.points) == 0:
+            return empty, empty
+
+        reach = int(np.ceil((radii.max() + self.max_radius) / self.cell_size))
+        ix, iy = self.cells(points)
+        queries, stored = [], []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                cx, cy = ix + dx, iy + dy
+                inside = np.flatnonzero((cx >= 0) & (cx < self.nx) & (cy >= 0) & (cy < self.ny))
+                cell = cx[inside] * self.ny + cy[inside]
+                count = self.cell_count[cell]
+                total = int(count.sum())
+                if total == 0:
+                    continue
+
+                # Expand every query's cell range into flat (query, stored) pairs
+                q = np.repeat(inside, count)
+                within = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+                p = self.order[np.repeat(self.cell_start[cell], count) + within]
+
+                delta = points[q] - self.points[p]
+                limit = radii[q] + self.radii[p]
+                hit = np.einsum("ij,ij->i", delta, delta) < limit * limit
+                queries.append(q[hit])
+                stored.append(p[hit])
+
+        if not queries:
+            return empty, empty
+        return np.concatenate(queries), np.concatenate(stored)
+
+    def overlaps(self, points, radii):
+        """Returns a bool mask: True where a query disc overlaps any stored disc."""
+        mask = np.zeros(len(np.asarray(points).reshape(-1, 2)), dtype=bool)
+        queries, _ = self.query_pairs(points, radii)
+        mask[queries] = True
+        return mask
+
+
+class PoissonDiskSampler:
+    """
+    Batch dart-throwing Poisson-disk sampler with per-object radii.
+
+    Every round proposes candidates for each still unplaced object (one in
+    the first round, more in later ones), rejects candidates that hit the
+    grid or a lower object's candidate of the same round (keeping at most
+    one per object and cell), and commits the survivors in one grid
+    rebuild. The grid is shared by every category placed with this sampler,
+    which gives cross-category exclusion for free.
+
+    Conflicts always go to the lower object index and the dart schedule is
+    the same for every object, so with per-object proposals (candidates
+    keyed by object and attempt) an object's position only depends on the
+    objects before it: appending objects never moves the earlier ones.
+
+    Random dart throwing cannot fill an area: discs jam at roughly half
+    coverage and the last few percent take many rounds. capacity() and
+    required_extent() budget with PACKING so callers can size the area (or
+    cut the count) BEFORE placing, and place() gives up once a long run of
+    candidates was rejected.
+    """
+
+    # Share of an area dart throwing reliably covers within max_rounds
+    PACKING = 0.35
+
+    def __init__(self, bounds=(-20.0, -20.0, 20.0, 20.0), cell_size=2.0, rng=None,
+                 max_rounds=30, max_object_darts=32, max_idle_darts=1024):
+        """
+        Args:
+            bounds: (xmin, ymin, xmax, ymax) covered by the hash grid
+            cell_size: Grid spacing (about one large footprint diameter)
+            rng: numpy Generator for the default proposal
+            max_rounds: Rounds before the still unplaced objects are dropped
+            max_object_darts: Candidates per object and round double every
+                round (1, 2, 4, ...) up to this limit
+            max_idle_darts: Give up early once this many candidates in a row
+                (over whole rounds) were all rejected - the area is full
+        """
+        self.bounds = bounds
+        self.cell_size = cell_size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.max_rounds = max_rounds
+        self.max_object_darts = max_object_darts
+        self.max_idle_darts = max_idle_darts
+        self.base_bounds = bounds
+        self.grid = SpatialHashGrid(bounds, cell_size)
+
+    def reset(self, bounds=None):
+        """
+        Forgets every placed disc and any growth of the grid (start of a new
+        scene). bounds replaces the area the grid starts from, for this and
+        every later reset.
+        """
+        if bounds is not None:
+            self.base_bounds = bounds
+        self.bounds = self.base_bounds
+        self.grid = SpatialHashGrid(self.bounds, self.cell_size)
+
+    def cover(self, half_extent):
+        """Grows the grid (keeping its discs) until it covers the square +/- half_extent."""
+        xmin, ymin, xmax, ymax = self.bounds
+        if min(-xmin, -ymin, xmax, ymax) >= half_extent:
+            return
+        self.bounds = (min(xmin, -half_extent), min(ymin, -half_extent),
+                       max(xmax, half_extent), max(ymax, half_extent))
+        grid = SpatialHashGrid(self.bounds, self.cell_size)
+        grid.build(self.grid.points, self.grid.radii)
+        self.grid = grid
+
+    def required_extent(self, radii):
+        """
+        Half-width of the square that holds radii plus every disc already in
+        the grid at PACKING coverage.
+        """
+        area = np.pi * (np.sum(np.square(radii)) + np.sum(np.square(self.grid.radii)))
+        return float(np.sqrt(area / self.PACKING)) / 2.0
+
+    def capacity(self, radii, bounds):
+        """
+        Up-front estimate of how many of radii (in order) fit into bounds
+        next to the discs already placed there.
+
+        Args:
+            radii: (n,) footprint radius per object
+            bounds: (xmin, ymin, xmax, ymax) the proposal draws from
+
+        Returns:
+            int: Number of leading objects worth trying to place
+        """
+        xmin, ymin, xmax, ymax = bounds
+        points = self.grid.points
+        inside = ((points[:, 0] >= xmin) & (points[:, 0] <= xmax)
+                  & (points[:, 1] >= ymin) & (points[:, 1] <= ymax))
+        free = self.PACKING * (xmax - xmin) * (ymax - ymin) - np.pi * np.sum(np.square(self.grid.radii[inside]))
+        needed = np.cumsum(np.pi * np.square(np.asarray(radii, dtype=np.float64).reshape(-1)))
+        return int(np.searchsorted(needed, free, side="right"))
+
+    def exclude(self, points, radii):
+        """Adds keep-out discs (objects placed elsewhere, paths, clearings)."""
+        self.grid.add(points, radii)
+
+    def uniform_proposal(self, half_extent):
+        """Returns a proposal drawing uniformly inside the square +/- half_extent."""
+        def propose(objects, attempts):
+            return self.rng.uniform(-half_extent, half_extent, (len(objects), 2))
+        return propose
+
+    def place(self, radii, proposal):
+        """
+        Places one disc per radius.
+
+        Args:
+            radii: (n,) footprint radius per object
+            proposal: Callable (objects, attempts) -> (len(objects), 2)
+                candidate positions. objects index radii (repeated when an
+                object gets several darts), attempts numbers each object's
+                candidates 0, 1, 2, ... over the whole call
+
+        Returns:
+            (points, placed): (n, 2) positions and a bool mask of objects
+            that found room (unplaced rows keep NaN positions)
+        """
+        radii = np.asarray(radii, dtype=np.float64).reshape(-1)
+        n = len(radii)
+        points = np.full((n, 2), np.nan)
+        placed = np.zeros(n, dtype=bool)
+        attempts = np.zeros(n, dtype=np.int64)
+
+        idle = 0
+        for round_index in range(self.max_rounds):
+            pending = np.flatnonzero(~placed)
+            if len(pending) == 0:
+                break
+
+            # Object-major darts, as many per object as the round allows
+            darts = min(self.max_object_darts, 2 ** round_index)
+            owner = np.repeat(pending, darts)
+            attempt = np.repeat(attempts[pending], darts) + np.tile(np.arange(darts), len(pending))
+            attempts[pending] += darts
+            candidates = np.asarray(proposal(owner, attempt), dtype=np.float64).reshape(-1, 2)
+            survivors = np.flatnonzero(~self.grid.overlaps(candidates, radii[owner]))
+
+            # First surviving dart per object, then at most one candidate per
+            # cell and round (the lowest object): keeps the in-round pair
+            # check bounded even when far more objects are asked for than fit
+            _, first = np.unique(owner[survivors], return_index=True)
+            survivors = survivors[first]
+            ix, iy = self.grid.cells(candidates[survivors])
+            _, first = np.unique(ix * self.grid.ny + iy, return_index=True)
+            survivors = survivors[np.sort(first)]
+
+            # Within the round, the lower-index candidate wins every conflict
+            round_grid = SpatialHashGrid(self.bounds, self.cell_size)
+            round_grid.build(candidates[survivors], radii[owner[survivors]])
+            q, p = round_grid.query_pairs(candidates[survivors], radii[owner[survivors]])
+            loser = np.zeros(len(survivors), dtype=bool)
+            loser[q[p < q]] = True
+            accepted = survivors[~loser]
+
+            # The area is full - stop burning rounds on hopeless candidates.
+            # Counted in darts, not rounds: a few stragglers may well miss for
+            # a round, thousands of darts missing in a row means full
+            idle = 0 if len(accepted) else idle + len(owner)
+            if idle >= self.max_idle_darts:
+                break
+
+            points[owner[accepted]] = candidates[accepted]
+            placed[owner[accepted]] = True
+            self.grid.add(candidates[accepted], radii[owner[accepted]])
+
+        return points, placed
+
+    def sample(self, n, radius, half_extent):
+        """Convenience wrapper: n discs of one radius, uniform proposals in a square."""
+        points, placed = self.place(np.full(n, radius), self.uniform_proposal(half_extent))
+        return points[placed]
+
+
+class ClusterProcess:
+    """
+    Neyman-Scott cluster process used as a placement proposal.
+    Parent points are scattered once; every call draws children around
+    randomly chosen parents in one vectorized pass:
+
+        thomas - Gaussian offsets (groves, bush thickets)
+        matern - uniform inside a disc (flower patches, rock fields)
+        ring   - on a circle around the parent (mushroom fairy rings)
+
+    PoissonDiskSampler still rejects overlapping children, so clusters
+    tighten without objects intersecting.
+    """
+
+    STYLES = ("thomas", "matern", "ring")
+
+    def __init__(self, style, parents, spread, rng):
+        """
+        Args:
+            style: One of STYLES
+            parents: (m, 2) cluster centres
+            spread: Thomas sigma / Matern radius / ring radius, in meters
+            rng: numpy Generator
+        """
+        if style not in self.STYLES:
+            raise ValueError(f"Unknown cluster style '{style}', expected one of {self.STYLES}")
+        self.style = style
+        self.parents = np.asarray(parents, dtype=np.float64).reshape(-1, 2)
+        self.spread = spread
+        self.rng = rng
+
+    @classmethod
+    def scatter(cls, style, n, children_per_parent, spread, half_extent, rng):
+        """
+        Creates a process with enough uniformly placed parents for n children.
+
+        Args:
+            style: One of STYLES
+            n: Expected number of children
+            children_per_parent: Mean cluster size
+            spread: Cluster size in meters
+            half_extent: Parents fall inside the square +/- half_extent
+            rng: numpy Generator
+        """
+        count = max(1, int(np.ceil(n / children_per_parent)))
+        parents = rng.uniform(-half_extent, half_extent, (count, 2))
+        return cls(style, parents, spread, rng)
+
+    def __call__(self, objects, attempts=None):
+        """Draws one candidate per entry of objects (the PoissonDiskSampler proposal interface)."""
+        return self.draw(len(objects), self.rng)
+
+    def draw(self, n, rng, parent=None):
+        """
+        Draws n candidate positions.
+
+        Args:
+            n: Number of candidates
+            rng: numpy Generator, or a seeding.KeyedRandom for per-object candidates
+            parent: Parent index per candidate (random parents when None)
+        """
+        if parent is None:
+            parent = rng.integers(0, len(self.parents), n)
+        centres = self.parents[parent]
+        if self.style == "thomas":
+            return centres + rng.normal(0.0, self.spread, (n, 2))
+
+        angle = rng.uniform(0.0, 2 * np.pi, n)
+        if self.style == "matern":
+            radius = self.spread * np.sqrt(rng.random(n))
+        else:  # ring - slightly ragged circle
+            radius = self.spread * (1.0 + 0.1 * rng.standard_normal(n))
+        return centres + np.column_stack((radius * np.cos(angle), radius * np.sin(angle)))
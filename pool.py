@@ -0,0 +1,169 @@
+import bpy
+import profiler
+from datablocks import tag, GENERATED_PROP, SCENE, SHARED
+
+# Lifetime of parked objects - purge() leaves them alone
+POOLED = "pooled"
+
+
+class ObjectPool:
+    """
+    Recycles generated objects across regenerations.
+    reset_scene parks every pooled object in one hidden collection instead
+    of deleting it; the next run takes objects back out by (category,
+    template) and only rewrites their name, transforms, materials and
+    animation. New objects are created - and parked ones freed - only for
+    the difference in counts, so rerolling a forest barely allocates.
+    """
+
+    CATEGORY_PROP = "forest_pool_category"
+    TEMPLATE_PROP = "forest_pool_template"
+
+    def __init__(self, collection_name="Forest_Object_Pool"):
+        self.collection_name = collection_name
+        # (category, template) -> {object name: object}
+        self.parked = {}
+        self.reused = 0
+        self.created = 0
+        self.restore()
+
+    def restore(self):
+        """Re-indexes objects parked by an earlier session (e.g. a previous main.py run)."""
+        collection = bpy.data.collections.get(self.collection_name)
+        if collection is None:
+            return
+        for obj in collection.objects:
+            key = (obj.get(self.CATEGORY_PROP), obj.get(self.TEMPLATE_PROP))
+            self.parked.setdefault(key, {})[obj.name] = obj
+
+    @staticmethod
+    def category_of(name):
+        """Object category from its generated name ("Tree_Trunk_12" -> "Tree_Trunk")."""
+        base, _, suffix = name.rpartition("_")
+        return base if base and suffix.isdigit() else name
+
+    def collection(self):
+        """Hidden collection holding parked objects (kept across scene resets)."""
+        collection = bpy.data.collections.get(self.collection_name)
+        if collection is None:
+            collection = tag(bpy.data.collections.new(self.collection_name), SHARED)
+            bpy.context.scene.collection.children.link(collection)
+            collection.hide_viewport = True
+            collection.hide_render = True
+        return collection
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.parked.values())
+
+    # ============ PARK ============
+
+    def park(self, objects):
+        """
+        Moves pooled objects out of the scene into the pool collection.
+        Objects not created through the pool (sun, point clouds) are skipped.
+
+        Returns:
+            int: Number of objects parked
+        """
+        pool_collection = self.collection()
+        count = 0
+        for obj in objects:
+            template = obj.get(self.TEMPLATE_PROP)
+            if template is None or obj.get(GENERATED_PROP) == POOLED:
+                continue
+
+            for collection in list(obj.users_collection):
+                collection.objects.unlink(obj)
+            pool_collection.objects.link(obj)
+
+            # Drop per-run state; the actions themselves are purged with the scene
+            obj.animation_data_clear()
+            obj.parent = None
+            obj[GENERATED_PROP] = POOLED
+
+            key = (obj[self.CATEGORY_PROP], template)
+            self.parked.setdefault(key, {})[obj.name] = obj
+            count += 1
+        return count
+
+    def park_collection(self, collection):
+        """Parks every pooled object of a collection and its children."""
+        objects = []
+        for child in [collection] + list(collection.children_recursive):
+            objects.extend(child.objects)
+        return self.park(objects)
+
+    # ============ ACQUIRE ============
+
+    def acquire(self, template, name, mesh, collection):
+        """
+        Returns a recycled object for (category of name, template) linked
+        into collection, or a new one when the pool has none left.
+
+        Args:
+            template: Key of MeshTemplateLibrary.TEMPLATE_SPECS
+            name: Object name (its category is derived from it)
+            mesh: Shared template mesh for newly created objects
+            collection: Collection to link the object into
+
+        Returns:
+            bpy.types.Object with identity rotation and no animation
+        """
+        category = self.category_of(name)
+        bucket = self.parked.get((category, template))
+        if not bucket:
+            obj = tag(bpy.data.objects.new(name, mesh))
+            obj[self.CATEGORY_PROP] = category
+            obj[self.TEMPLATE_PROP] = template
+            with profiler.phase("linking"):
+                collection.objects.link(obj)
+            self.created += 1
+            return obj
+
+        # Prefer the object that already carries the wanted name (no rename)
+        obj = bucket.pop(name, None)
+        if obj is None:
+            obj = bucket.pop(next(iter(bucket)))
+            holder = bpy.data.objects.get(name)
+            if holder is not None and holder.get(GENERATED_PROP) == POOLED:
+                # A parked object of another template holds the name - move it aside
+                holder_bucket = self.parked[(holder[self.CATEGORY_PROP], holder[self.TEMPLATE_PROP])]
+                del holder_bucket[holder.name]
+                holder.name = f"{self.collection_name}_{holder.name}"
+                holder_bucket[holder.name] = holder
+            obj.name = name
+
+        if obj.data is not mesh:
+            obj.data = mesh  # Template rebuilt since the object was parked
+        with profiler.phase("linking"):
+            self.collection().objects.unlink(obj)
+            collection.objects.link(obj)
+        obj[GENERATED_PROP] = SCENE
+        obj.rotation_euler = (0.0, 0.0, 0.0)
+        obj.delta_location = (0.0, 0.0, 0.0)
+        obj.delta_rotation_euler = (0.0, 0.0, 0.0)
+        obj.delta_scale = (1.0, 1.0, 1.0)
+        self.reused += 1
+        return obj
+
+    # ============ FREE ============
+
+    def trim(self):
+        """
+        Frees every object still parked (the surplus of the last reroll) in
+        one batch_remove.
+
+        Returns:
+            int: Number of objects freed
+        """
+        surplus = [obj for bucket in self.parked.values() for obj in bucket.values()]
+        self.parked.clear()
+        if surplus:
+            bpy.data.batch_remove(surplus)
+        return len(surplus)
+
+    def report(self):
+        """Prints and resets the reuse counters of the last run."""
+        print(f"♻️ Object pool: {self.reused} reused, {self.created} created")
+        self.reused = 0
+        self.created = 0
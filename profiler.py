@@ -0,0 +1,221 @@
+# profiler.py
+"""
+Generation-phase profiler.
+Times named phases (primitives, linking, materials, shading, keyframing,
+planning, ...) with their build group / category, keeps counters (operator
+calls, keyframes, vertices, faces, ...) and peak RSS, and writes a JSON
+report plus an optional Chrome trace (chrome://tracing, Perfetto).
+
+The generator modules report to the ACTIVE profiler through the module
+functions phase() and count(); SceneManager activates its own profiler for
+the length of a run. The default profiler is disabled: phase() then hands
+out one shared no-op context, so instrumented code costs next to nothing
+when nobody is profiling. bpy-free.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+# Returned by phase() while profiling is off (reusable, no per-call allocation)
+_NO_PHASE = nullcontext()
+
+
+class Profiler:
+    """Collects phase timings, counters and trace events of one or more runs."""
+
+    def __init__(self, enabled=True, trace=True):
+        """
+        Args:
+            enabled: False turns phase()/count() into no-ops
+            trace: Keep every phase as a trace event (needed for write_trace)
+        """
+        self.enabled = enabled
+        self.trace = trace
+        self.reset()
+
+    def reset(self):
+        """Drops everything recorded so far and restarts the wall clock."""
+        self.start = time.perf_counter()
+        # name -> [calls, seconds]
+        self.phases = {}
+        # category -> name -> [calls, seconds]
+        self.categories = {}
+        self.counters = {}
+        self.events = []
+        # Free-form JSON-ready sections (config, datablocks, geometry, ...)
+        self.meta = {}
+        self.stats = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _category_stack(self):
+        stack = getattr(self._local, "categories", None)
+        if stack is None:
+            stack = self._local.categories = []
+        return stack
+
+    def phase(self, name, category=None):
+        """
+        Times the enclosed block (use as a with statement). Nested phases
+        inherit the category of the enclosing one, so primitives/materials/...
+        add up per build group. Times are inclusive (a phase includes its
+        nested phases).
+        """
+        if not self.enabled:
+            return _NO_PHASE
+        return self._timed(name, category)
+
+    @contextmanager
+    def _timed(self, name, category):
+        stack = self._category_stack()
+        if category is None and stack:
+            category = stack[-1]
+        stack.append(category)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                entry = self.phases.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += duration
+                if category is not None:
+                    entry = self.categories.setdefault(category, {}).setdefault(name, [0, 0.0])
+                    entry[0] += 1
+                    entry[1] += duration
+                if self.trace:
+                    self.events.append((name, category, threading.get_ident(), start - self.start, duration))
+
+    def count(self, name, n=1):
+        """Adds n to a counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @staticmethod
+    def rss_mb():
+        """Current resident set size in MB (Linux only, None elsewhere)."""
+        try:
+            with open("/proc/self/statm", "r") as handle:
+                pages = int(handle.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            return None
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+    @staticmethod
+    def peak_rss_mb():
+        """
+        Peak resident set size of this process in MB (None where unavailable).
+        This is the peak of the whole process, so in a long-lived Blender
+        session it only ever grows; compare rss_mb() before/after a run too.
+        """
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+    # ============ OUTPUT ============
+
+    def report(self):
+        """
+        Returns:
+            dict: JSON-ready report (phases and categories sorted by time)
+        """
+        def table(phases):
+            ordered = sorted(phases.items(), key=lambda item: -item[1][1])
+            return {name: {"calls": calls, "seconds": round(seconds, 6)} for name, (calls, seconds) in ordered}
+
+        with self._lock:
+            return {
+                "meta": dict(self.meta),
+                "wall_seconds": round(time.perf_counter() - self.start, 6),
+                "peak_rss_mb": self.peak_rss_mb(),
+                "phases": table(self.phases),
+                "categories": {category: table(phases) for category, phases in self.categories.items()},
+                "counters": dict(sorted(self.counters.items())),
+                **self.stats,
+            }
+
+    def write_report(self, path):
+        """Writes report() as JSON and returns it."""
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        return report
+
+    def write_trace(self, path):
+        """Writes the phases as Chrome trace events (one row per thread)."""
+        pid = os.getpid()
+        with self._lock:
+            events = [
+                {
+                    "name": name, "cat": category or "run", "ph": "X", "pid": pid, "tid": tid,
+                    "ts": round(start * 1e6, 3), "dur": round(duration * 1e6, 3),
+                    "args": {"category": category} if category else {},
+                }
+                for name, category, tid, start, duration in self.events
+            ]
+            counters = dict(self.counters)
+        events.append({"name": "counters", "ph": "C", "pid": pid, "tid": 0,
+                       "ts": round((time.perf_counter() - self.start) * 1e6, 3), "args": counters})
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, handle)
+
+    def print_summary(self, top=8):
+        """Prints the slowest phases and the counters."""
+        report = self.report()
+        print(f"⏱️ Profile: {report['wall_seconds'] * 1000:.1f} ms wall"
+              + (f", peak RSS {report['peak_rss_mb']:.0f} MB" if report["peak_rss_mb"] is not None else ""))
+        for name, entry in list(report["phases"].items())[:top]:
+            print(f"   {name:<14} {entry['seconds'] * 1000:9.1f} ms  ({entry['calls']} calls)")
+        if report["counters"]:
+            print("   " + ", ".join(f"{name} {value}" for name, value in report["counters"].items()))
+
+
+# The profiler instrumented code reports to (disabled unless activated)
+_active = Profiler(enabled=False)
+
+
+def active():
+    return _active
+
+
+def activate(profiler):
+    """Makes profiler the active one and returns the previous one (for restoring)."""
+    global _active
+    previous = _active
+    _active = profiler
+    return previous
+
+
+def phase(name, category=None):
+    """Times a block on the active profiler (see Profiler.phase)."""
+    return _active.phase(name, category)
+
+
+def count(name, n=1):
+    """Adds to a counter of the active profiler."""
+    _active.count(name, n)
+
+
+def operator(op, *args, **kwargs):
+    """
+    Calls a bpy.ops operator, counted as operator_calls on the active
+    profiler. Every bpy.ops call site goes through here, so the counter
+    shows when an operator (context polling, undo push, view-layer update)
+    sneaks back into generation.
+    """
+    _active.count("operator_calls")
+    return op(*args, **kwargs)
@@ -1,509 +1,574 @@
 import bpy
 import math
+import json
+import hashlib
+import time
+import queue
+import threading
+import contextlib
+import numpy as np
 import importlib
-import random
 import variations 
 import materials
 import generation_config
+import templates
+import animation
+import action_library
+import palettes
+import shading
+import seeding
+import placement
+import density
+import diversity
+import scene_plan
+import instancing
+import wind
+import flocking
+import datablocks
+import asset_library
+import pool
+import profiler
 
+importlib.reload(profiler)
+importlib.reload(palettes)
+importlib.reload(datablocks)
+importlib.reload(shading)
+importlib.reload(seeding)
+importlib.reload(density)
+importlib.reload(placement)
+importlib.reload(wind)
+importlib.reload(flocking)
+importlib.reload(diversity)
+importlib.reload(scene_plan)
+importlib.reload(templates)
+importlib.reload(action_library)
+importlib.reload(animation)
 importlib.reload(variations)
 importlib.reload(materials)
+importlib.reload(instancing)
+importlib.reload(pool)
+importlib.reload(asset_library)
 importlib.reload(generation_config)
 from variations import VariationEngine
 from materials import MaterialAssigner
 from generation_config import GenerationConfig, SeasonalVariation
+from templates import MeshTemplateLibrary
+from animation import KeyframeWriter
+from instancing import InstanceScatter
+from asset_library import AssetLibrary
+from pool import ObjectPool, POOLED
+from wind import WindField
+from flocking import Flock
+from profiler import Profiler
+from datablocks import (tag, purge, collection_datablocks, datablock_counts, DATABLOCK_TYPES,
+                        GENERATED_PROP, SCENE, SHARED)
+from shading import SHADING_KINDS
+from scene_plan import ScenePlanner, CROWN_TEMPLATES, SPIN_STYLES
 
 
 class SceneManager:
-    def __init__(self):
+    def __init__(self, procedural_animation=False, use_asset_library=True, use_object_pool=True,
+                 animation_mode=None, use_wind_field=True, use_flocking=True, profile=False):
+        """
+        Args:
+            procedural_animation: Drive wind sway/wobble with F-curve modifiers
+                instead of baked sine keyframes (same as animation_mode="procedural")
+            use_asset_library: Append template meshes and category materials
+                from the on-disk AssetLibrary instead of rebuilding them
+            use_object_pool: Park objects on reset and recycle them in the
+                next run instead of deleting and recreating them
+            animation_mode: "baked", "procedural" or "nla" (grow/sway/... play
+                shared pattern Actions through per-object NLA strips)
+            use_wind_field: Sway all vegetation with one scene-wide WindField
+                (coherent gusts) instead of a random sine per plant
+            use_flocking: Simulate all birds as one boids Flock (separation,
+                alignment, cohesion, tree avoidance) instead of independent
+                flight patterns
+            profile: Profile every run (phase timers, counters, peak RSS);
+                the report is in self.profiler after run()
+        """
         self.collection_name = "Procedural_Forest_Project"
         self.collection = None
         self.var_engine = VariationEngine()
-        self.material_engine = MaterialAssigner() 
-        
+        # Recycled objects by (category, template); None = always create new ones
+        self.pool = ObjectPool() if use_object_pool else None
+        self.templates = MeshTemplateLibrary(pool=self.pool)
+        # Keyframes are queued per channel and written in bulk on flush
+        self.keyframes = KeyframeWriter(procedural=procedural_animation, mode=animation_mode)
+        self.material_engine = MaterialAssigner(templates=self.templates, keyframes=self.keyframes)
+        # Pure NumPy planning stage (created per run from the GenerationConfig)
+        self.planner = None
+        # Last GenerationConfig (reused by incremental runs) and ground plane
+        self.config = None
+        self.ground = None
+        # Scene wind (built per run) and its batched sway rows per category
+        self.use_wind_field = use_wind_field
+        self.wind = None
+        self.wind_rows = {}
+        self.use_flocking = use_flocking
+        # Geometry Nodes backend for massive scatter (run(backend="instances"))
+        self.instancer = InstanceScatter(self.templates, self.material_engine)
+        # Cross-session cache of the shared datablocks (None = always rebuild)
+        self.assets = AssetLibrary(self.templates, self.material_engine) if use_asset_library else None
+        # Phase timers and counters of the last run (see run(profile_report=...))
+        self.profile = profile
+        self.profiler = Profiler(enabled=False)
+        
+        self.ensure_object_mode()
+
+    def ensure_object_mode(self):
+        """Leaves edit/sculpt/... mode: the data API edits below need OBJECT mode."""
         if bpy.ops.object.mode_set.poll():
-            bpy.ops.object.mode_set(mode='OBJECT')
+            profiler.operator(bpy.ops.object.mode_set, mode='OBJECT')
 
-    def reset_scene(self):
-        """Cleans previous project data and resets timeline."""
+    def reset_scene(self, purge_shared=False):
+        """
+        Cleans previous project data and resets timeline.
+        Every datablock the generator tagged (objects, meshes, actions, sun
+        light, ...) is freed in one bpy.data.batch_remove, so repeated runs
+        in one session leave no orphans behind.
+        
+        Args:
+            purge_shared: Also free the shared template meshes, category
+                materials and node group (rebuilt or re-appended on demand)
+        
+        Returns:
+            dict: datablock type -> (before, after) counts
+        """
+        if self.pool is not None and purge_shared:
+            # The pool collection goes with the shared data - free what it holds
+            self.pool.trim()
+        
+        # Untagged leftovers in the project collection (e.g. from older sessions)
+        leftovers = []
         if self.collection_name in bpy.data.collections:
             coll = bpy.data.collections[self.collection_name]
-            for obj in coll.objects:
-                bpy.data.objects.remove(obj, do_unlink=True)
-            bpy.data.collections.remove(coll)
+            if self.pool is not None and not purge_shared:
+                # Park recyclable objects instead of deleting them
+                self.pool.park_collection(coll)
+            # Child collections hold the instancing templates
+            for child in [coll] + list(coll.children_recursive):
+                leftovers.append(child)
+                leftovers.extend(child.objects)
+        
+        lifetimes = (SCENE, SHARED) if purge_shared else (SCENE,)
+        report = purge(lifetimes, extra=leftovers)
+        self.material_engine.material_cache.clear()
 
-        self.collection = bpy.data.collections.new(self.collection_name)
+        self.collection = tag(bpy.data.collections.new(self.collection_name))
         bpy.context.scene.collection.children.link(self.collection)
         
         # Mandatory timeline setup 
         bpy.context.scene.frame_start = 1
         bpy.context.scene.frame_end = 160
+        return report
+
+    def plan_one(self, category, spec=None):
+        """Returns the given plan row, or plans a single object when called standalone."""
+        if spec is not None:
+            return spec
+        if self.planner is None:
+            self.planner = ScenePlanner(diversity=self.var_engine.diversity)
+        return self.planner.plan_category(category, 1)[0]
 
-    def generate_tree(self, ground):
+    def generate_tree(self, ground, spec=None):
         """Procedurally creates tree geometry with RANDOM SHAPES!"""
-        # Create Cylinder for Trunk
-        bpy.ops.mesh.primitive_cylinder_add(vertices=15)
-        trunk = bpy.context.active_object
-        trunk.name = f"Tree_Trunk_{random.randint(100, 9999)}"
-        
-        # RANDOM TREE CROWN SHAPES!
-        tree_type = random.choice(['cone', 'sphere', 'ico_sphere', 'round_cone'])
-        
-        if tree_type == 'cone':
-            # Classic cone tree
-            bpy.ops.mesh.primitive_cone_add(vertices=15)
-            leaves = bpy.context.active_object
-        elif tree_type == 'sphere':
-            # Round bushy tree
-            bpy.ops.mesh.primitive_uv_sphere_add(segments=16, ring_count=15)
-            leaves = bpy.context.active_object
-        elif tree_type == 'ico_sphere':
-            # Dense rounded tree
-            bpy.ops.mesh.primitive_ico_sphere_add(subdivisions=2)
-            leaves = bpy.context.active_object
-        else:  # round_cone
-            # Rounded cone hybrid
-            bpy.ops.mesh.primitive_cone_add(vertices=20)
-            leaves = bpy.context.active_object
-            # Make it rounder at the top
-            leaves.scale = (1.2, 1.2, 0.8)
-        
-        leaves.name = f"Tree_Leaves_{random.randint(100, 9999)}"
-        
-        for part in [trunk, leaves]:
-            for c in part.users_collection:
-                c.objects.unlink(part)
-            self.collection.objects.link(part)
-            
-        self.var_engine.apply_random_transform(trunk, leaves, tree_type)
-        self.var_engine.apply_materials(trunk, leaves, ground)
+        spec = self.plan_one("trees", spec)
+        
+        # Create Cylinder for Trunk (shared template mesh)
+        trunk = self.templates.new_object(
+            "cylinder_15_smooth", f"Tree_Trunk_{spec['id']}", self.collection
+        )
+        
+        # RANDOM TREE CROWN SHAPES (drawn by the planner)
+        leaves = self.templates.new_object(
+            CROWN_TEMPLATES[spec["crown_type"]], f"Tree_Leaves_{spec['id']}", self.collection
+        )
+        
+        self.var_engine.apply_tree_transform(trunk, leaves, spec)
+        self.var_engine.apply_materials(
+            trunk, leaves, ground,
+            bark_palette=spec["bark_palette"], leaf_palette=spec["leaf_palette"],
+            seed=spec["seed"]
+        )
         
         # NEW: Enhanced growth and wind animations
-        self.animate_tree_with_wind(trunk, leaves)
+        self.animate_tree_with_wind(trunk, leaves, spec)
         
         return trunk, leaves
 
-    def generate_rock(self):
+    def generate_rock(self, spec=None):
         """Creates procedural rocks with subtle settling animation."""
-        bpy.ops.mesh.primitive_uv_sphere_add(
-            segments=8,
-            ring_count=6,
-            radius=random.uniform(0.5, 1.5),
-            location=(
-                random.uniform(-15, 15),
-                random.uniform(-15, 15),
-                random.uniform(0.3, 0.8)
-            )
+        spec = self.plan_one("rocks", spec)
+        radius = spec["radius"]
+        rock = self.templates.new_object(
+            "uv_sphere_8x6",
+            f"Rock_{spec['id']}",
+            self.collection,
+            location=(spec["x"], spec["y"], spec["z"]),
+            scale=(radius, radius, radius)
         )
-        rock = bpy.context.active_object
-        rock.name = f"Rock_{random.randint(100, 999)}"
-        
-        # Link to collection
-        for c in rock.users_collection:
-            c.objects.unlink(rock)
-        self.collection.objects.link(rock)
-        
-        # Deform to look like rock (squashed, irregular)
-        final_scale = (
-            random.uniform(0.8, 1.5),
-            random.uniform(0.8, 1.5),
-            random.uniform(0.4, 0.8)
-        )
-        rock.rotation_euler = (
-            random.uniform(0, math.pi/4),
-            random.uniform(0, math.pi/4),
-            random.uniform(0, math.pi*2)
-        )
-        
-        # Apply rock material
-        self.material_engine.apply_rock_material(rock)
-        
-        # # Animate: rock appears from underground (grows up)
-        # start_z = rock.location.z
-        # rock.location.z = -0.5  # Start underground
-        # rock.scale = (0.1, 0.1, 0.1)
-        # rock.keyframe_insert(data_path="location", frame=1)
-        # rock.keyframe_insert(data_path="scale", frame=1)
         
-        # # Pop up to surface
-        # rock.location.z = start_z + 0.2  # Slight overshoot
-        # rock.scale = final_scale
-        # rock.keyframe_insert(data_path="location", frame=35)
-        # rock.keyframe_insert(data_path="scale", frame=35)
+        # Irregular resting orientation
+        rock.rotation_euler = (spec["rotation_x"], spec["rotation_y"], spec["rotation_z"])
         
-        # # Settle down
-        # rock.location.z = start_z
-        # rock.keyframe_insert(data_path="location", frame=45)
+        # Apply rock material
+        self.material_engine.apply_rock_material(rock, spec["palette"], seed=spec["seed"])
         
         return rock
 
-    def generate_bush(self):
+    def generate_bush(self, spec=None):
         """Creates procedural bushes using ico spheres with wind animation."""
-        bpy.ops.mesh.primitive_ico_sphere_add(
-            subdivisions=2,
-            radius=random.uniform(0.8, 1.5),
-            location=(
-                random.uniform(-12, 12),
-                random.uniform(-12, 12),
-                random.uniform(0.5, 1.0)
-            )
+        spec = self.plan_one("bushes", spec)
+        bush = self.templates.new_object(
+            "ico_sphere_2",
+            f"Bush_{spec['id']}",
+            self.collection,
+            location=(spec["x"], spec["y"], spec["z"])
         )
-        bush = bpy.context.active_object
-        bush.name = f"Bush_{random.randint(100, 999)}"
-        
-        # Link to collection
-        for c in bush.users_collection:
-            c.objects.unlink(bush)
-        self.collection.objects.link(bush)
         
         # Make it bushy (wider than tall)
-        final_scale = (
-            random.uniform(1.2, 2.0),
-            random.uniform(1.2, 2.0),
-            random.uniform(0.6, 1.0)
-        )
+        final_scale = (spec["scale_x"], spec["scale_y"], spec["scale_z"])
         
         # Apply bush material
-        self.material_engine.apply_bush_material(bush)
+        self.material_engine.apply_bush_material(bush, spec["palette"], seed=spec["seed"])
         
         # Animate: bush grows
-        bush.scale = (0, 0, 0)
-        bush.keyframe_insert(data_path="scale", frame=1)
         bush.scale = final_scale
-        bush.keyframe_insert(data_path="scale", frame=50)
+        self.keyframes.add_vector(bush, "scale", [1, 50], [(0, 0, 0), final_scale], pattern="grow")
         
         # Wind animation - bushes sway side to side
         base_rotation = bush.rotation_euler.copy()
-        sway_angle = math.radians(random.uniform(8.0, 15.0))  # Bushes sway a lot
-        wind_speed = random.uniform(1.0, 1.8)
+        sway_angle = spec["sway_angle"]  # Bushes sway a lot
+        wind_frequency = math.pi * 4 * spec["wind_speed"] / 70  # radians per frame
         
-        for frame in range(50, 121, 5):
-            progress = (frame - 50) / 70
-            wind_phase = progress * math.pi * 4 * wind_speed
-            
-            # Sway on both axes for natural movement
-            bush.rotation_euler.y = base_rotation.y + math.sin(wind_phase) * sway_angle
-            bush.rotation_euler.x = base_rotation.x + math.sin(wind_phase * 1.2) * sway_angle * 0.6
-            bush.keyframe_insert(data_path="rotation_euler", frame=frame)
+        # Sway on both axes for natural movement
+        self.wind_sway(bush, "bushes", spec, base_rotation, sway_angle, sway_angle * 0.6,
+                       wind_frequency, x_speedup=1.2)
         
         return bush
 
-    def generate_flower(self):
+    def generate_flower(self, spec=None):
         """Creates flowers with spinning petals and stem bending in wind."""
-        # Flower stem (thicker and taller cylinder)
-        stem_location = (
-            random.uniform(-10, 10),
-            random.uniform(-10, 10),
-            random.uniform(0.4, 0.6) 
-        )
+        spec = self.plan_one("flowers", spec)
         
-        bpy.ops.mesh.primitive_cylinder_add(
-            vertices=15,
-            radius=0.12,  
-            depth=random.uniform(0.8, 1.2), 
-            location=stem_location
+        # Flower stem (thicker and taller cylinder)
+        stem_height = spec["stem_height"]
+        stem_scale = (0.12, 0.12, stem_height / 2)
+        stem = self.templates.new_object(
+            "cylinder_15",
+            f"Flower_Stem_{spec['id']}",
+            self.collection,
+            location=(spec["x"], spec["y"], spec["z"]),
+            scale=stem_scale
         )
-        stem = bpy.context.active_object
-        stem.name = f"Flower_Stem_{random.randint(100, 999)}"
-        
-        # Link to collection
-        for c in stem.users_collection:
-            c.objects.unlink(stem)
-        self.collection.objects.link(stem)
         
         # Flower petals (MUCH BIGGER cone on top)
-        stem_height = stem.dimensions.z
         petal_location = (
             stem.location.x,
             stem.location.y,
             stem.location.z + stem_height/2 + 0.25
         )
         
-        bpy.ops.mesh.primitive_cone_add(
-            vertices=5,
-            radius1=random.uniform(0.4, 0.6),
-            depth=0.5,
-            location=petal_location
+        petal_radius = spec["petal_radius"]
+        petal_scale = (petal_radius, petal_radius, 0.25)
+        petals = self.templates.new_object(
+            "cone_5",
+            f"Flower_Petals_{spec['id']}",
+            self.collection,
+            location=petal_location,
+            scale=petal_scale
         )
-        petals = bpy.context.active_object
-        petals.name = f"Flower_Petals_{random.randint(100, 999)}"
-        
-        # Link to collection
-        for c in petals.users_collection:
-            c.objects.unlink(petals)
-        self.collection.objects.link(petals)
         
         # Apply flower materials
-        self.material_engine.apply_flower_materials(stem, petals)
+        self.material_engine.apply_flower_materials(stem, petals, spec["petal_palette"], seed=spec["seed"])
         
         # Animate: flowers bloom
-        for obj in [stem, petals]:
-            obj.scale = (0, 0, 0)
-            obj.keyframe_insert(data_path="scale", frame=1)
-            obj.scale = (1, 1, 1)
-            obj.keyframe_insert(data_path="scale", frame=70)
+        for obj, final_scale in [(stem, stem_scale), (petals, petal_scale)]:
+            self.keyframes.add_vector(obj, "scale", [1, 70], [(0, 0, 0), final_scale], pattern="bloom")
         
         # NEW: Stem bends in wind
         stem_base_rotation = stem.rotation_euler.copy()
-        stem_sway = math.radians(random.uniform(5.0, 12.0))
+        stem_sway = spec["stem_sway"]
+        wind_frequency = math.pi * 3 / 50  # radians per frame
         
-        for frame in range(70, 121, 5):
-            progress = (frame - 70) / 50
-            wind_phase = progress * math.pi * 3
-            
-            stem.rotation_euler.y = stem_base_rotation.y + math.sin(wind_phase) * stem_sway
-            stem.rotation_euler.x = stem_base_rotation.x + math.sin(wind_phase * 1.5) * stem_sway * 0.7
-            stem.keyframe_insert(data_path="rotation_euler", frame=frame)
+        self.wind_sway(stem, "flowers", spec, stem_base_rotation, stem_sway, stem_sway * 0.7,
+                       wind_frequency, x_speedup=1.5)
         
         # NEW: Petals spin slowly in wind
-        petal_base_rotation = random.uniform(0, math.pi * 2)
+        petal_base_rotation = spec["petal_rotation"]
         petals.rotation_euler.z = petal_base_rotation
-        petals.keyframe_insert(data_path="rotation_euler", frame=70)
         
         # Spin animation
-        spin_choice = random.choice(['full_spin', 'wiggle'])
+        spin_choice = SPIN_STYLES[spec["spin_style"]]
         
         if spin_choice == 'full_spin':
-            # Full rotation
-            petals.rotation_euler.z = petal_base_rotation + math.pi * 4  # 2 full rotations
-            petals.keyframe_insert(data_path="rotation_euler", frame=120)
+            # Full rotation - 2 full rotations
+            self.keyframes.add(petals, "rotation_euler", [70, 120],
+                               [petal_base_rotation, petal_base_rotation + math.pi * 4], index=2,
+                               pattern="spin")
         else:
             # Wiggle back and forth
-            for frame in range(70, 121, 5):
-                progress = (frame - 70) / 50
-                wiggle = math.sin(progress * math.pi * 6) * math.radians(30)
-                petals.rotation_euler.z = petal_base_rotation + wiggle
-                petals.keyframe_insert(data_path="rotation_euler", frame=frame)
-        
-        # Generate butterfly near this flower (30% chance)
-        if random.random() < 0.3:
-            self.generate_butterfly_near_flower(stem.location)
+            self.keyframes.add_sine(petals, "rotation_euler", 2, petal_base_rotation,
+                                    math.radians(30), math.pi * 6 / 50, 70, 120, pattern="wiggle")
         
         return stem, petals
 
-    def generate_butterfly_near_flower(self, flower_position):
-        """Creates animated butterfly near flower."""
-        # Create butterfly body (small cylinder)
-        bpy.ops.mesh.primitive_cylinder_add(
-            vertices=6,
-            radius=0.08,
-            depth=0.3,
-            location=(
-                flower_position.x + random.uniform(-0.5, 0.5),
-                flower_position.y + random.uniform(-0.5, 0.5),
-                flower_position.z + random.uniform(0.8, 1.5)
-            )
-        )
-        body = bpy.context.active_object
-        body.name = f"Butterfly_Body_{random.randint(100, 999)}"
-        body.rotation_euler.x = math.pi / 2
+    # Flight keys of every butterfly: the planned start, then two circles keyed every 20 frames
+    BUTTERFLY_FRAMES = np.arange(20, 121, 20)
+    
+    def butterfly_flight(self, butterflies):
+        """
+        Flight paths of many butterflies in one batch.
         
-        # Link to collection
-        for c in body.users_collection:
-            c.objects.unlink(body)
-        self.collection.objects.link(body)
+        Args:
+            butterflies: Planned butterfly rows (ScenePlan["butterflies"]) or a single row
         
-        # Create wings (two flat cubes)
-        start_pos = body.location.copy()
+        Returns:
+            (path_frames, paths, headings): (m,) frames, (n, m, 3) root positions
+            and (n, m - 1) heading keys on the circle frames
+        """
+        start = np.column_stack([np.atleast_1d(butterflies[axis]) for axis in ("x", "y", "z")])
+        radius = np.atleast_1d(butterflies["flight_radius"])[:, None]
+        frames = self.BUTTERFLY_FRAMES
+        angle = (frames / 120) * math.pi * 4  # Two full circles
+        
+        paths = np.empty((len(start), len(frames) + 1, 3))
+        paths[:, 0] = start  # Initial position
+        paths[:, 1:, 0] = np.atleast_1d(butterflies["center_x"])[:, None] + radius * np.cos(angle)
+        paths[:, 1:, 1] = np.atleast_1d(butterflies["center_y"])[:, None] + radius * np.sin(angle)
+        paths[:, 1:, 2] = start[:, 2:] + np.sin(frames / 10) * 0.3  # Bobbing motion
+        headings = np.broadcast_to(angle + math.pi / 2, (len(start), len(frames)))
+        return np.concatenate(([1], frames)), paths, headings
+    
+    def generate_butterfly_near_flower(self, flower_position, spec=None, flight=None):
+        """
+        Creates animated butterfly near flower.
+        The butterfly is a small rig: an animated empty root carries the flight
+        path and heading, the body and both wings are its children, and the
+        wings only add their flap rotation.
+        
+        Args:
+            flower_position: Flower to circle when no spec is given
+            spec: Planned butterfly row
+            flight: (path_frames, path, headings) of this butterfly from
+                butterfly_flight(); computed for the single row when None
+        """
+        if spec is None:
+            if self.planner is None:
+                self.planner = ScenePlanner(diversity=self.var_engine.diversity)
+            spec = self.planner.plan_butterflies_at(tuple(flower_position))[0]
+        if flight is None:
+            path_frames, paths, headings = self.butterfly_flight(spec)
+            flight = (path_frames, paths[0], headings[0])
+        path_frames, path, headings = flight
+        
+        # Root empty: the only object with a flight path
+        root = tag(bpy.data.objects.new(f"Butterfly_{spec['id']}", None))
+        root.empty_display_type = 'PLAIN_AXES'
+        root.empty_display_size = 0.2
+        root.location = path[0]
+        self.collection.objects.link(root)
+        
+        # Create butterfly body (small cylinder) lying along the root's Y axis
+        body = self.templates.new_object(
+            "cylinder_6",
+            f"Butterfly_Body_{spec['id']}",
+            self.collection,
+            scale=(0.08, 0.08, 0.15)
+        )
+        body.rotation_euler.x = math.pi / 2
         
-        # Left wing
-        bpy.ops.mesh.primitive_cube_add(
-            size=0.4,
-            location=(start_pos.x - 0.25, start_pos.y, start_pos.z)
+        # Wings: template cube is size 2, wings are size 0.4 cubes flattened
+        wing_scale = (0.2 * 0.15, 0.2 * 1.2, 0.2 * 0.02)
+        left_wing = self.templates.new_object(
+            "cube", f"Butterfly_Wing_L_{spec['id']}", self.collection,
+            location=(-0.25, 0.0, 0.0), scale=wing_scale
         )
-        left_wing = bpy.context.active_object
-        left_wing.name = f"Butterfly_Wing_L_{random.randint(100, 999)}"
-        left_wing.scale = (0.15, 1.2, 0.02)
-        
-        for c in left_wing.users_collection:
-            c.objects.unlink(left_wing)
-        self.collection.objects.link(left_wing)
-        
-        # Right wing
-        bpy.ops.mesh.primitive_cube_add(
-            size=0.4,
-            location=(start_pos.x + 0.25, start_pos.y, start_pos.z)
+        right_wing = self.templates.new_object(
+            "cube", f"Butterfly_Wing_R_{spec['id']}", self.collection,
+            location=(0.25, 0.0, 0.0), scale=wing_scale
         )
-        right_wing = bpy.context.active_object
-        right_wing.name = f"Butterfly_Wing_R_{random.randint(100, 999)}"
-        right_wing.scale = (0.15, 1.2, 0.02)
-        
-        for c in right_wing.users_collection:
-            c.objects.unlink(right_wing)
-        self.collection.objects.link(right_wing)
+        for part in (body, left_wing, right_wing):
+            part.parent = root  # Locations above are local to the root
         
         # Apply butterfly materials
-        self.material_engine.apply_butterfly_materials(body, left_wing, right_wing)
-        
-        # Animate butterfly: flying in circles around flower
-        butterfly_parts = [body, left_wing, right_wing]
-        
-        # Initial position
-        for part in butterfly_parts:
-            part.keyframe_insert(data_path="location", frame=1)
+        self.material_engine.apply_butterfly_materials(body, left_wing, right_wing, spec["wing_palette"], seed=spec["seed"])
         
-        # Create circular flight path
-        radius = random.uniform(0.8, 1.5)
-        center_x = flower_position.x
-        center_y = flower_position.y
-        height = start_pos.z
-        
-        for frame in range(20, 121, 20):
-            angle = (frame / 120) * math.pi * 4  # Two full circles
-            
-            new_x = center_x + radius * math.cos(angle)
-            new_y = center_y + radius * math.sin(angle)
-            new_z = height + math.sin(frame / 10) * 0.3  # Bobbing motion
-            
-            for part in butterfly_parts:
-                offset_x = part.location.x - body.location.x
-                offset_z = part.location.z - body.location.z
-                
-                part.location = (new_x + offset_x, new_y, new_z + offset_z)
-                part.keyframe_insert(data_path="location", frame=frame)
-                
-                # Rotate body to face direction of movement
-                if part == body:
-                    part.rotation_euler.z = angle + math.pi/2
-                    part.keyframe_insert(data_path="rotation_euler", frame=frame)
+        # Animate the root: circling the flower, facing the direction of movement
+        self.keyframes.add_vector(root, "location", path_frames, path)
+        self.keyframes.add(root, "rotation_euler", path_frames[1:], headings, index=2)
         
         # Wing flapping animation
-        for wing in [left_wing, right_wing]:
-            for frame in range(1, 121, 5):
-                flap = math.sin(frame / 2) * 0.4
-                if wing == left_wing:
-                    wing.rotation_euler.y = flap
-                else:
-                    wing.rotation_euler.y = -flap
-                wing.keyframe_insert(data_path="rotation_euler", frame=frame)
+        flap_frames = np.arange(1, 121, 5)
+        flap = np.sin(flap_frames / 2) * 0.4
+        self.keyframes.add(left_wing, "rotation_euler", flap_frames, flap, index=1, pattern="flap")
+        self.keyframes.add(right_wing, "rotation_euler", flap_frames, -flap, index=1, pattern="flap")
 
-    def generate_mushroom(self):
+    def generate_mushroom(self, spec=None):
         """Creates procedural mushrooms with wobble animation."""
+        spec = self.plan_one("mushrooms", spec)
+        
         # Mushroom stalk (THICKER)
-        bpy.ops.mesh.primitive_cylinder_add(
-            vertices=5,
-            radius=random.uniform(0.2, 0.35),
-            depth=random.uniform(0.7, 1.0),
-            location=(
-                random.uniform(-8, 8),
-                random.uniform(-8, 8),
-                random.uniform(0.35, 0.5)
-            )
+        stalk_radius = spec["stalk_radius"]
+        stalk_height = spec["stalk_height"]
+        stalk_scale = (stalk_radius, stalk_radius, stalk_height / 2)
+        stalk = self.templates.new_object(
+            "cylinder_5",
+            f"Mushroom_Stalk_{spec['id']}",
+            self.collection,
+            location=(spec["x"], spec["y"], spec["z"]),
+            scale=stalk_scale
         )
-        stalk = bpy.context.active_object
-        stalk.name = f"Mushroom_Stalk_{random.randint(100, 999)}"
-        
-        # Link to collection
-        for c in stalk.users_collection:
-            c.objects.unlink(stalk)
-        self.collection.objects.link(stalk)
         
         # Mushroom cap (BIGGER squashed sphere)
-        stalk_height = stalk.dimensions.z
-        bpy.ops.mesh.primitive_uv_sphere_add(
-            segments=12,
-            ring_count=5,
-            radius=random.uniform(0.5, 0.8),
+        cap_radius = spec["cap_radius"]
+        cap_scale = (cap_radius, cap_radius, cap_radius * 0.5)  # Flatten the cap
+        cap = self.templates.new_object(
+            "uv_sphere_12x5",
+            f"Mushroom_Cap_{spec['id']}",
+            self.collection,
             location=(
                 stalk.location.x,
                 stalk.location.y,
                 stalk.location.z + stalk_height/2
-            )
+            ),
+            scale=cap_scale
         )
-        cap = bpy.context.active_object
-        cap.name = f"Mushroom_Cap_{random.randint(100, 999)}"
-        cap.scale.z = 0.5  # Flatten the cap
-        
-        # Link to collection
-        for c in cap.users_collection:
-            c.objects.unlink(cap)
-        self.collection.objects.link(cap)
         
         # Apply mushroom materials
-        self.material_engine.apply_mushroom_materials(stalk, cap)
+        self.material_engine.apply_mushroom_materials(stalk, cap, spec["cap_palette"], seed=spec["seed"])
         
         # Animate: mushrooms pop up
-        for obj in [stalk, cap]:
-            obj.scale = (0, 0, 0)
-            obj.keyframe_insert(data_path="scale", frame=1)
-            final_scale = obj.scale.copy()
-            if obj == cap:
-                final_scale.z = 0.5
-            obj.scale = final_scale if obj == cap else (1, 1, 1)
-            obj.keyframe_insert(data_path="scale", frame=80)
+        for obj, final_scale in [(stalk, stalk_scale), (cap, cap_scale)]:
+            self.keyframes.add_vector(obj, "scale", [1, 80], [(0, 0, 0), final_scale], pattern="pop")
         
         # NEW: Mushroom wobble animation (they're flexible!)
         stalk_base_rotation = stalk.rotation_euler.copy()
-        wobble_angle = math.radians(random.uniform(3.0, 8.0))
+        wobble_angle = spec["wobble_angle"]
+        wobble_frequency = math.pi * 5 / 40  # radians per frame
         
-        for frame in range(80, 121, 5):
-            progress = (frame - 80) / 40
-            wobble_phase = progress * math.pi * 5
-            
-            stalk.rotation_euler.y = stalk_base_rotation.y + math.sin(wobble_phase) * wobble_angle
-            stalk.rotation_euler.x = stalk_base_rotation.x + math.sin(wobble_phase * 1.3) * wobble_angle * 0.8
-            stalk.keyframe_insert(data_path="rotation_euler", frame=frame)
-            
-            # Cap follows stalk movement
-            cap.rotation_euler.y = stalk.rotation_euler.y * 0.8
-            cap.rotation_euler.x = stalk.rotation_euler.x * 0.8
-            cap.keyframe_insert(data_path="rotation_euler", frame=frame)
+        # Cap follows stalk movement at 80%
+        for obj, follow in [(stalk, 1.0), (cap, 0.8)]:
+            self.wind_sway(obj, "mushrooms", spec,
+                           (stalk_base_rotation.x * follow, stalk_base_rotation.y * follow),
+                           wobble_angle * follow, wobble_angle * 0.8 * follow,
+                           wobble_frequency, pattern="wobble")
         
         return stalk, cap
 
-    def animate_tree_with_wind(self, trunk, leaves):
+    def animate_tree_with_wind(self, trunk, leaves, spec=None):
         """Enhanced tree animation: grows from roots + continuous wind sway."""
+        spec = self.plan_one("trees", spec)
+        
         # Store final scales
         trunk_final = trunk.scale.copy()
         leaves_final = leaves.scale.copy()
         
         # Growth from roots (bottom up)
-        trunk.scale = (trunk_final.x, trunk_final.y, 0.001)  # Start flat
-        trunk.keyframe_insert(data_path="scale", frame=1)
-        trunk.scale = trunk_final
-        trunk.keyframe_insert(data_path="scale", frame=50)
+        self.keyframes.add_vector(trunk, "scale", [1, 50], [
+            (trunk_final.x, trunk_final.y, 0.001),  # Start flat
+            trunk_final
+        ], pattern="grow")
         
-        leaves.scale = (0.001, 0.001, 0.001)  # Start invisible
-        leaves.keyframe_insert(data_path="scale", frame=1)
-        leaves.scale = leaves_final
-        leaves.keyframe_insert(data_path="scale", frame=60)
+        self.keyframes.add_vector(leaves, "scale", [1, 60], [
+            (0.001, 0.001, 0.001),  # Start invisible
+            leaves_final
+        ], pattern="grow")
         
         # Wind sway animation (continuous throughout)
         base_rotation_trunk = trunk.rotation_euler.copy()
         base_rotation_leaves = leaves.rotation_euler.copy()
         
         # Wind parameters - trees sway in Y and X axes
-        trunk_sway_y = math.radians(random.uniform(1.5, 3.0))  # Trunk sways less
-        trunk_sway_x = math.radians(random.uniform(0.5, 1.5))
-        leaves_sway_y = math.radians(random.uniform(4.0, 8.0))  # Leaves sway more
-        leaves_sway_x = math.radians(random.uniform(2.0, 5.0))
+        trunk_sway_y = spec["trunk_sway_y"]  # Trunk sways less
+        trunk_sway_x = spec["trunk_sway_x"]
+        leaves_sway_y = spec["leaves_sway_y"]  # Leaves sway more
+        leaves_sway_x = spec["leaves_sway_x"]
         
-        wind_speed = random.uniform(0.8, 1.5)  # Random wind speed per tree
+        wind_speed = spec["wind_speed"]  # Random wind speed per tree
         
-        for frame in range(60, 121, 5):
-            progress = (frame - 60) / 60
-            wind_phase = progress * math.pi * 4 * wind_speed
-            
-            # Trunk sway (gentle)
-            trunk.rotation_euler.y = base_rotation_trunk.y + math.sin(wind_phase) * trunk_sway_y
-            trunk.rotation_euler.x = base_rotation_trunk.x + math.sin(wind_phase * 1.3) * trunk_sway_x
-            trunk.keyframe_insert(data_path="rotation_euler", frame=frame)
-            
-            # Leaves sway (more dramatic)
-            leaves.rotation_euler.y = base_rotation_leaves.y + math.sin(wind_phase) * leaves_sway_y
-            leaves.rotation_euler.x = base_rotation_leaves.x + math.sin(wind_phase * 1.3) * leaves_sway_x
-            leaves.keyframe_insert(data_path="rotation_euler", frame=frame)
+        wind_frequency = math.pi * 4 * wind_speed / 60  # radians per frame
+        
+        # Trunk sway (gentle)
+        self.wind_sway(trunk, "trees", spec, base_rotation_trunk, trunk_sway_y, trunk_sway_x, wind_frequency)
+        
+        # Leaves sway (more dramatic)
+        self.wind_sway(leaves, "trees", spec, base_rotation_leaves, leaves_sway_y, leaves_sway_x, wind_frequency)
+
+    # Frame window of the wind sway per vegetation category
+    WIND_WINDOWS = {"trees": (60, 120), "bushes": (50, 120), "flowers": (70, 120), "mushrooms": (80, 120)}
+
+    def wind_table(self, category, array):
+        """
+        Samples the WindField for every plant of a category in one batched
+        interpolation.
+
+        Returns:
+            dict: "ids", "frames", "along" (n, m) unit sway, "mean", "phase" (n,)
+        """
+        frame_start, frame_end = self.WIND_WINDOWS[category]
+        points = np.column_stack((array["x"], array["y"]))
+        frames, along = self.wind.sway(points, frame_start, frame_end)
+        mean, phase = self.wind.sine_parameters(points, frame_start, frame_end)
+        return {"ids": array["id"], "frames": frames, "along": along, "mean": mean, "phase": phase}
+
+    def wind_sway(self, obj, category, spec, base_rotation, amplitude_y, amplitude_x,
+                  frequency, x_speedup=1.3, pattern="sway"):
+        """
+        Sways one plant around its rest rotation.
+        With a WindField it bends downwind with the local gusts (baked curves,
+        or the matching sine in procedural/NLA modes); without one it keeps
+        its own sine on both axes.
+        
+        Args:
+            obj: Object to animate
+            category: Key of WIND_WINDOWS
+            spec: The plant's plan row
+            base_rotation: Rest rotation (x, y used)
+            amplitude_y: Sway amplitude around Y (radians)
+            amplitude_x: Sway amplitude around X (radians)
+            frequency: Own sine speed when there is no wind field
+            x_speedup: X-axis speed factor of the own sine
+            pattern: Pattern name for shared NLA actions
+        """
+        frame_start, frame_end = self.WIND_WINDOWS[category]
+        if self.wind is None:
+            self.keyframes.add_sine(obj, "rotation_euler", 1, base_rotation[1], amplitude_y,
+                                    frequency, frame_start, frame_end, pattern=pattern)
+            self.keyframes.add_sine(obj, "rotation_euler", 0, base_rotation[0], amplitude_x,
+                                    frequency * x_speedup, frame_start, frame_end, pattern=pattern)
+            return
+        
+        # Row from the category's batched table (standalone plants sample their own)
+        table = self.wind_rows.get(category)
+        row = int(spec["id"])
+        if table is None or row >= len(table["ids"]) or table["ids"][row] != spec["id"]:
+            table = self.wind_table(category, np.array([spec], dtype=spec.dtype))
+            row = 0
+        
+        # Tilt downwind: around Y for the heading's x part, around X for its y part
+        heading_x, heading_y = self.wind.heading
+        weights = ((1, heading_x * amplitude_y), (0, -heading_y * amplitude_x))
+        if self.keyframes.mode == "baked":
+            for index, weight in weights:
+                self.keyframes.add(obj, "rotation_euler", table["frames"],
+                                   base_rotation[index] + weight * table["along"][row], index=index)
+            return
+        
+        mean, phase = table["mean"][row], table["phase"][row]
+        for index, weight in weights:
+            self.keyframes.add_sine(obj, "rotation_euler", index,
+                                    base_rotation[index] + weight * self.wind.lean * mean,
+                                    weight * (1.0 - self.wind.lean) * mean, self.wind.frequency,
+                                    frame_start, frame_end, phase=phase, pattern=pattern)
 
     def setup_sun_light(self):
         """Creates animated sun with warm lighting."""
         # Create sun light
-        bpy.ops.object.light_add(type='SUN', location=(15, -15, 25))
-        sun = bpy.context.active_object
-        sun.name = "Sun_Light"
-        
-        # Link to collection
-        for c in sun.users_collection:
-            c.objects.unlink(sun)
+        sun_data = tag(bpy.data.lights.new(name="Sun_Light", type='SUN'))
+        sun = tag(bpy.data.objects.new("Sun_Light", sun_data))
+        sun.location = (15, -15, 25)
         self.collection.objects.link(sun)
         
         # Configure sun properties
@@ -512,91 +577,538 @@ class SceneManager:
         sun.data.angle = 0.009  # Soft shadows
         
         # Animate sun movement (sunrise to sunset arc)
-        # Starting position (sunrise)
-        sun.location = (20, -20, 10)
+        sun_frames = [1, 60, 120]
+        self.keyframes.add_vector(sun, "location", sun_frames, [
+            (20, -20, 10),   # Starting position (sunrise)
+            (5, 0, 30),      # Noon position (overhead)
+            (-20, 20, 10)    # Sunset position
+        ])
+        self.keyframes.add_vector(sun, "rotation_euler", sun_frames, [
+            (math.radians(60), math.radians(45)),
+            (math.radians(30), 0),
+            (math.radians(60), math.radians(-45))
+        ], indices=(0, 2))
         sun.rotation_euler = (math.radians(60), 0, math.radians(45))
-        sun.keyframe_insert(data_path="location", frame=1)
-        sun.keyframe_insert(data_path="rotation_euler", frame=1)
-        
-        # Noon position (overhead)
-        sun.location = (5, 0, 30)
-        sun.rotation_euler = (math.radians(30), 0, 0)
-        sun.keyframe_insert(data_path="location", frame=60)
-        sun.keyframe_insert(data_path="rotation_euler", frame=60)
-        
-        # Sunset position
-        sun.location = (-20, 20, 10)
-        sun.rotation_euler = (math.radians(60), 0, math.radians(-45))
-        sun.keyframe_insert(data_path="location", frame=120)
-        sun.keyframe_insert(data_path="rotation_euler", frame=120)
         
         # Animate sun intensity (brighter at noon)
-        sun.data.energy = 2.0
-        sun.data.keyframe_insert(data_path="energy", frame=1)
-        sun.data.energy = 4.5
-        sun.data.keyframe_insert(data_path="energy", frame=60)
-        sun.data.energy = 2.0
-        sun.data.keyframe_insert(data_path="energy", frame=120)
+        self.keyframes.add(sun.data, "energy", sun_frames, [2.0, 4.5, 2.0])
         
         print("☀️ Animated sun created!")
         return sun
 
-    def run(self):
+    BACKENDS = ("objects", "instances")
+    
+    # Build group -> (plan categories, shading kinds, templates) it is made of.
+    # Each group lives in its own sub-collection stamped with a fingerprint of
+    # these inputs, so an incremental run only rebuilds the groups that changed.
+    BUILD_GROUPS = {
+        "environment": ((), (), ("plane",)),
+        "trees": (("trees",), ("bark", "leaf"), ("cylinder_15_smooth",) + CROWN_TEMPLATES),
+        "rocks": (("rocks",), ("rock",), ("uv_sphere_8x6",)),
+        "bushes": (("bushes",), ("bush",), ("ico_sphere_2",)),
+        "flowers": (("flowers", "butterflies"),
+                    ("flower_stem", "flower_petal", "butterfly_body", "butterfly_wing"),
+                    ("cylinder_15", "cone_5", "cylinder_6", "cube")),
+        "mushrooms": (("mushrooms",), ("mushroom_stalk", "mushroom_cap"), ("cylinder_5", "uv_sphere_12x5")),
+        "sky": (("clouds", "birds"), ("cloud", "bird"), ("uv_sphere_32x16",)),
+    }
+    
+    # Bump when a generator changes in a way its inputs above do not capture
+    BUILD_VERSION = 2
+    FINGERPRINT_PROP = "forest_build_fingerprint"
+    
+    def group_inputs(self, group):
+        """Plan categories a build group reads (its own, plus the trees its flock avoids)."""
+        categories = self.BUILD_GROUPS[group][0]
+        if group == "sky" and self.use_flocking:
+            categories = categories + ("trees",)  # The flock steers around the tree crowns
+        return categories
+    
+    def group_fingerprint(self, group, plan, backend):
         """
-        Main execution pipeline - NOW WITH FULLY DYNAMIC GENERATION!
+        Hash of everything a build group's objects depend on: its planned rows
+        (which already fold in the config, counts, seed streams and the
+        placement of earlier categories), its shading kinds and palettes,
+        its template specs, the backend and the animation mode.
+        
+        Returns:
+            str: sha256 hex digest
+        """
+        _, kinds, template_names = self.BUILD_GROUPS[group]
+        categories = self.group_inputs(group)
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "version": self.BUILD_VERSION,
+            "group": group,
+            "backend": backend,
+            "animation": self.keyframes.mode,
+            "shading": {kind: SHADING_KINDS[kind] for kind in kinds},
+            "templates": {name: MeshTemplateLibrary.TEMPLATE_SPECS[name] for name in template_names},
+            # The ground color comes from the scene seed (not a plan row), its size from the counts
+            "ground": [str(plan.seed), palettes.GROUND_COLORS, self.planner.ground_half_extent]
+            if group == "environment" else None,
+            # Vegetation sways with the seeded wind field
+            "wind": [str(plan.seed), self.wind.parameters()]
+            if self.wind is not None and set(categories) & set(self.WIND_WINDOWS) else None,
+            "flocking": self.use_flocking if group == "sky" else None,
+        }, sort_keys=True, default=list).encode("utf-8"))
+        for category in categories:
+            digest.update(category.encode("utf-8"))
+            digest.update(np.ascontiguousarray(plan[category]).tobytes())
+        return digest.hexdigest()
+    
+    def group_collection(self, group):
+        """Returns the sub-collection of a build group, creating it on first use."""
+        name = f"{self.collection_name}_{group.title()}"
+        collection = self.collection.children.get(name)
+        if collection is None:
+            collection = tag(bpy.data.collections.new(name))
+            self.collection.children.link(collection)
+        return collection
+    
+    def realize(self, plan, backend="objects", fingerprints=None):
+        """
+        Turns a ScenePlan into Blender objects, one build group at a time.
+        All randomness already lives in the plan - this is pure bpy work.
+        
+        Args:
+            plan: ScenePlan to realize
+            backend: "objects" (one animated object per element) or
+                "instances" (ground categories as Geometry Nodes instances)
+            fingerprints: {group: fingerprint}; groups whose sub-collection
+                already carries the same fingerprint are kept as they are
+        
+        Returns:
+            list: Names of the rebuilt groups
         """
-        self.reset_scene()
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {self.BACKENDS}")
+        fingerprints = fingerprints or {}
+        stages = ((group, fingerprints.get(group), None) for group in self.BUILD_GROUPS)
+        return self.realize_stages(plan, backend, stages)
+    
+    def realize_stages(self, plan, backend, stages):
+        """
+        Realizes (group, fingerprint, prepared) stages in order, then writes
+        the queued keyframes. prepared is prepare_group()'s result, or None
+        to compute it here. stages is closed before an error propagates, so
+        a pipeline_stages() producer is stopped and joined first.
         
-        # Complete environment setup
-        bpy.ops.mesh.primitive_plane_add(size=40)
-        ground = bpy.context.active_object
-        for c in ground.users_collection:
-            c.objects.unlink(ground)
-        self.collection.objects.link(ground)
+        Returns:
+            list: Names of the rebuilt groups
+        """
+        root = self.collection
+        rebuilt = []
+        with contextlib.closing(stages):
+            for group, fingerprint, prepared in stages:
+                collection = self.group_collection(group)
+                if fingerprint is not None and collection.get(self.FINGERPRINT_PROP) == fingerprint:
+                    print(f"♻️ Keeping {group} (unchanged)")
+                    continue
+                
+                # Dirty group: park/free its old objects, then generate into its collection
+                with profiler.phase("purge", group):
+                    # Gathered before parking: park() clears the animation data
+                    # and moves the objects out, which would orphan their actions
+                    # and keep per-scene materials (e.g. the ground) alive
+                    doomed = [datablock for datablock in collection_datablocks(collection)
+                              if datablock is not collection]
+                    if self.pool is not None:
+                        self.pool.park_collection(collection)
+                    purge(lifetimes=(), extra=[
+                        datablock for datablock in doomed if datablock.get(GENERATED_PROP) != POOLED
+                    ])
+                self.collection = collection
+                try:
+                    with profiler.phase("realize", group):
+                        self.realize_group(group, plan, backend, prepared)
+                finally:
+                    self.collection = root
+                if fingerprint is not None:
+                    collection[self.FINGERPRINT_PROP] = fingerprint
+                rebuilt.append(group)
+        
+        # Write every queued animation channel in one bulk pass
+        keyframe_count = self.keyframes.flush()
+        print(f"🎞️ Wrote {keyframe_count} keyframes")
+        if self.keyframes.actions is not None:
+            print(f"🎞️ {self.keyframes.actions.strip_count} NLA strips over "
+                  f"{len(self.keyframes.actions._actions)} shared pattern actions")
+        return rebuilt
+    
+    # ============ PIPELINE ============
+    
+    # Planned groups the producer may run ahead of realization (queue bound = backpressure)
+    PIPELINE_DEPTH = 2
+    
+    def prepare_group(self, group, plan, backend):
+        """
+        Pure NumPy work a build group needs before it touches bpy: batched
+        wind tables, flock trajectories, butterfly flight paths. Safe to run
+        off the main thread.
         
-        # Setup animated sun instead of static light
-        self.setup_sun_light()
+        Returns:
+            dict: "wind_rows" {category: wind_table}, plus "flock" (sky)
+                and "butterflies" (flowers) when there is anything to fly
+        """
+        prepared = {"wind_rows": {}}
+        if self.wind is not None and backend == "objects":
+            # One batched wind interpolation for every plant of the group
+            for category in self.BUILD_GROUPS[group][0]:
+                if category in self.WIND_WINDOWS and len(plan[category]):
+                    prepared["wind_rows"][category] = self.wind_table(category, plan[category])
+        if group == "sky" and self.use_flocking and len(plan["birds"]):
+            prepared["flock"] = self.simulate_flock(plan)
+        if group == "flowers" and len(plan["butterflies"]):
+            prepared["butterflies"] = self.butterfly_flight(plan["butterflies"])
+        return prepared
+    
+    def pipeline_stages(self, plan, counts, backend):
+        """
+        Producer/consumer pipeline: a worker thread plans the categories
+        (ScenePlanner.iter_plan) and, as soon as all categories of a build
+        group are planned, fingerprints and prepares that group and hands
+        it over through a bounded queue. The caller - the main thread, the
+        only one allowed to touch bpy - realizes each group while the next
+        ones are planned, so a scene takes about max(plan, realize) instead
+        of their sum.
+        
+        Args:
+            plan: Empty ScenePlan (ScenePlanner.new_plan) the producer fills in
+            counts: Per-category counts for the planner
+            backend: Realization backend (part of the fingerprints)
+        
+        Yields:
+            (group, fingerprint, prepared) in BUILD_GROUPS order
+        """
+        handoff = queue.Queue(maxsize=self.PIPELINE_DEPTH)
+        stop = threading.Event()
+        done = object()
+        timing = {"plan": 0.0}
+        
+        def put(item):
+            # Blocks while the queue is full, but gives up once the consumer stopped
+            while not stop.is_set():
+                try:
+                    handoff.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                waiting = list(self.BUILD_GROUPS)
+                planned = set()
+                categories = self.planner.iter_plan(counts)
+                while waiting:
+                    group = waiting[0]
+                    if planned.issuperset(self.group_inputs(group)):
+                        waiting.pop(0)
+                        start = time.perf_counter()
+                        with profiler.phase("fingerprint", group):
+                            fingerprint = self.group_fingerprint(group, plan, backend)
+                        with profiler.phase("prepare", group):
+                            stage = (group, fingerprint, self.prepare_group(group, plan, backend))
+                        timing["plan"] += time.perf_counter() - start
+                        if not put(stage):
+                            return
+                        continue
+                    start = time.perf_counter()
+                    category, array = next(categories)
+                    plan[category] = array
+                    planned.add(category)
+                    timing["plan"] += time.perf_counter() - start
+                put(done)
+            except BaseException as e:
+                put(e)
+        
+        producer = threading.Thread(target=produce, name="forest-planner", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = handoff.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+            print(f"⏱️ Planning thread: {timing['plan'] * 1000:.1f} ms (overlapped with realization)")
+    
+    def realize_group(self, group, plan, backend, prepared=None):
+        """
+        Generates one build group into self.collection.
         
-        # Pure random generation config
-        config = GenerationConfig.create_random_config()
-        counts = config.get_all_counts()
+        Args:
+            group: Key of BUILD_GROUPS
+            plan: ScenePlan holding the group's rows
+            backend: "objects" or "instances"
+            prepared: prepare_group() result (computed here when None)
+        """
+        if prepared is None:
+            with profiler.phase("prepare"):
+                prepared = self.prepare_group(group, plan, backend)
+        self.wind_rows.update(prepared["wind_rows"])
+        
+        if group == "environment":
+            # Complete environment setup
+            half = self.planner.ground_half_extent
+            self.ground = self.templates.new_object(
+                "plane", "Ground", self.collection, scale=(half, half, 1)
+            )
+            # Ground gets its own stream too, so its color only depends on the seed
+            ground_seed = self.planner.seeds.object_seeds(1, self.planner.seeds.generator("ground"))[0]
+            self.material_engine.apply_ground_material(self.ground, seed=ground_seed)
+            
+            # Setup animated sun instead of static light
+            self.setup_sun_light()
+            return
+        
+        if group == "sky":
+            print("☁️ Generating Sky Elements...")
+            self.material_engine.generate_sky_elements(
+                self.collection, 
+                clouds=plan["clouds"], 
+                birds=plan["birds"],
+                trajectories=prepared.get("flock")
+            )
+            return
         
-        # Printing generation plan
-        config.print_generation_plan(counts)
+        if backend == "instances":
+            print(f"🧬 Instancing {group} with Geometry Nodes...")
+            instance_count = self.instancer.realize(plan, self.collection, self.BUILD_GROUPS[group][0])
+            profiler.count("instances", instance_count)
+            print(f"🧬 {instance_count} instances created")
+        else:
+            self.realize_objects(group, plan)
+        
+        # Butterflies stay animated objects in both backends
+        if group == "flowers" and "butterflies" in prepared:
+            print("🦋 Generating Butterflies...")
+            path_frames, paths, headings = prepared["butterflies"]
+            for spec, path, heading in zip(plan["butterflies"], paths, headings):
+                self.generate_butterfly_near_flower(None, spec, (path_frames, path, heading))
+
+    def simulate_flock(self, plan, frame_start=1, frame_end=120, key_step=4):
+        """
+        Flies every planned bird as one boids flock around the tree crowns,
+        one simulation step per frame, keyed every key_step frames.
         
-        # Generating objects with DYNAMIC counts!
-        print("🌲 Generating Trees with RANDOM SHAPES...")
-        for _ in range(counts["trees"]):
-            self.generate_tree(ground)
+        Returns:
+            (frames, positions, headings) for MaterialAssigner.generate_sky_elements
+        """
+        start = time.perf_counter()
+        # Sky box: the placement area plus a margin, between the tree tops and the clouds
+        xmin, ymin, xmax, ymax = self.planner.placement.bounds
+        flock = Flock.from_plan(plan["birds"], bounds=(xmin - 5, ymin - 5, 6.0, xmax + 5, ymax + 5, 16.0))
+        flock.avoid_trees(plan["trees"])
+        trajectories = flock.simulate(frame_start, frame_end, key_step)
+        print(f"🐦 Simulated a flock of {len(flock)} birds over {frame_end - frame_start + 1} frames "
+              f"in {time.perf_counter() - start:.2f}s")
+        return trajectories
+
+    def realize_objects(self, group, plan):
+        """Object backend: one animated Blender object per ground element (wind rows already prepared)."""
+        if group == "trees":
+            print("🌲 Generating Trees with RANDOM SHAPES...")
+            for spec in plan["trees"]:
+                self.generate_tree(self.ground, spec)
+        
+        elif group == "rocks":
+            print("🪨 Generating Rocks...")
+            for spec in plan["rocks"]:
+                self.generate_rock(spec)
+        
+        elif group == "bushes":
+            print("🌿 Generating Bushes...")
+            for spec in plan["bushes"]:
+                self.generate_bush(spec)
+        
+        elif group == "flowers":
+            print("🌸 Generating Flowers...")
+            for spec in plan["flowers"]:
+                self.generate_flower(spec)
+
+        elif group == "mushrooms":
+            print("🍄 Generating Mushrooms...")
+            for spec in plan["mushrooms"]:
+                self.generate_mushroom(spec)
+
+    def run(self, density_maps=None, backend="objects", config=None, counts=None, incremental=False,
+            pipelined=True, profile_report=None, profile_trace=None, extent=None):
+        """
+        Main execution pipeline - NOW WITH FULLY DYNAMIC GENERATION!
         
-        print("🪨 Generating Rocks...")
-        for _ in range(counts["rocks"]):
-            self.generate_rock()
+        Args:
+            density_maps: Optional {"trees": "noise" | array | ".npy"/image path, ...}
+                - where each ground category grows and how many it gets
+            backend: "objects" (animated per-object forest) or "instances"
+                (Geometry Nodes scatter for 100k+ elements, static layout)
+            config: GenerationConfig to use (random when omitted; an
+                incremental run reuses the previous one)
+            counts: Per-category count overrides, e.g. {"mushrooms": 40}
+            incremental: Keep the objects of every build group whose
+                fingerprint did not change and rebuild only the rest
+            pipelined: Plan and prepare the next build groups on a worker
+                thread while the main thread realizes the current one
+                (False = plan everything first, then realize)
+            profile_report: Path of a JSON profile report (profiles this run
+                even when the manager was created without profile=True)
+            profile_trace: Path of a Chrome trace of the run's phases
+                (open in chrome://tracing or ui.perfetto.dev)
+            extent: Half-width of the ground in meters (ground plane, sky,
+                wind and flock area); None sizes it from the counts, at
+                least 20 m. Ground categories still spread out as far as
+                their counts need.
+        
+        Returns:
+            ScenePlan: The plan that was realized
+        """
+        enabled = self.profile or profile_report is not None or profile_trace is not None
+        self.profiler = Profiler(enabled=enabled)
+        previous = profiler.activate(self.profiler)
+        try:
+            with profiler.phase("run"):
+                plan = self.generate_scene(density_maps, backend, config, counts, incremental, pipelined, extent)
+        finally:
+            profiler.activate(previous)
+        
+        if enabled:
+            self.profiler.meta.update({
+                "seed": str(plan.seed),
+                "density": plan.density,
+                "backend": backend,
+                "animation": self.keyframes.mode,
+                "pipelined": pipelined,
+                "incremental": incremental,
+                "counts": plan.counts(),
+                "ground_extent": self.planner.ground_half_extent,
+            })
+            self.profiler.print_summary()
+            if profile_report is not None:
+                self.profiler.write_report(profile_report)
+                print(f"📝 Profile report: {profile_report}")
+            if profile_trace is not None:
+                self.profiler.write_trace(profile_trace)
+                print(f"📝 Chrome trace: {profile_trace}")
+        return plan
+    
+    def record_scene_stats(self, before):
+        """
+        Adds the datablocks this run created (counts after the scene reset
+        vs now) and the mesh geometry of the finished scene to the profile.
+        Instanced geometry (backend="instances") counts as its point clouds.
         
-        print("🌿 Generating Bushes...")
-        for _ in range(counts["bushes"]):
-            self.generate_bush()
+        Args:
+            before: datablock_counts() taken right after the reset
+        """
+        after = datablock_counts()
+        created = {name: max(0, after[name] - before[name]) for name in DATABLOCK_TYPES}
+        for name, value in created.items():
+            profiler.count(f"datablocks_created.{name}", value)
+        profiler.count("datablocks_created", sum(created.values()))
+        
+        # Shared template meshes are measured once, counted per object
+        sizes = {}
+        for obj in self.collection.all_objects:
+            if obj.type != 'MESH':
+                continue
+            size = sizes.get(obj.data.name)
+            if size is None:
+                size = sizes[obj.data.name] = (len(obj.data.vertices), len(obj.data.polygons))
+            profiler.count("vertices", size[0])
+            profiler.count("faces", size[1])
+        self.profiler.stats["datablocks"] = {"after_reset": before, "after_run": after}
+        self.profiler.stats["rss_mb"] = self.profiler.rss_mb()
+    
+    def generate_scene(self, density_maps, backend, config, counts, incremental, pipelined, extent=None):
+        """run() without the profiling setup (phases report to the active profiler)."""
+        with profiler.phase("reset"):
+            self.ensure_object_mode()
+            if incremental and self.collection_name in bpy.data.collections:
+                self.collection = bpy.data.collections[self.collection_name]
+            else:
+                self.reset_scene()
+        datablocks_before = datablock_counts() if self.profiler.enabled else None
+        
+        # Template meshes + category materials from disk (rebuilt when their inputs change)
+        if self.assets is not None:
+            asset_start = time.perf_counter()
+            with profiler.phase("assets"):
+                self.assets.ensure()
+            print(f"⏱️ Asset library: {(time.perf_counter() - asset_start) * 1000:.1f} ms")
+        
+        # Pure random generation config (kept for incremental re-runs)
+        if config is None:
+            config = self.config if incremental and self.config is not None else GenerationConfig.create_random_config()
+        self.config = config
+        self.planner = ScenePlanner(config, diversity=self.var_engine.diversity)
+        
+        # Density maps shape the layout; the preset scales their counts
+        with profiler.phase("density_fields"):
+            fields = self.planner.build_density_fields(density_maps or {})
+        self.planner.density_fields = fields
+        all_counts = config.get_all_counts(fields)
+        all_counts.update(counts or {})
+        
+        # The ground grows with the counts, so 100k-row scatters get room too
+        self.planner.fit_ground(extent if extent is not None else self.planner.ground_extent(all_counts))
+        
+        # One wind field for all vegetation, from its own seed stream
+        self.wind = WindField(
+            self.planner.seeds.generator("wind"), bounds=self.planner.placement.bounds
+        ) if self.use_wind_field else None
+        self.wind_rows = {}
         
-        print("🌸 Generating Flowers with Butterflies...")
-        for _ in range(counts["flowers"]):
-            self.generate_flower()
-
-        print("🍄 Generating Mushrooms...")
-        for _ in range(counts["mushrooms"]):
-            self.generate_mushroom()
-        
-        print("☁️ Generating Sky Elements...")
-        self.material_engine.generate_sky_elements(
-            self.collection, 
-            count_clouds=counts["clouds"], 
-            count_birds=counts["birds"]
-        )
+        # Printing generation plan
+        config.print_generation_plan(all_counts)
+        
+        # Plan everything first (no bpy), then realize it
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {self.BACKENDS}")
+        if pipelined:
+            # Planning overlaps realization; the plan fills in while groups are built
+            plan_time = 0.0
+            realize_start = time.perf_counter()
+            plan = self.planner.new_plan()
+            rebuilt = self.realize_stages(plan, backend, self.pipeline_stages(plan, all_counts, backend))
+        else:
+            plan_start = time.perf_counter()
+            plan = self.planner.plan(all_counts)
+            plan_time = time.perf_counter() - plan_start
+            
+            fingerprints = {}
+            for group in self.BUILD_GROUPS:
+                with profiler.phase("fingerprint", group):
+                    fingerprints[group] = self.group_fingerprint(group, plan, backend)
+            realize_start = time.perf_counter()
+            rebuilt = self.realize(plan, backend, fingerprints)
+        if self.pool is not None:
+            # Objects the new forest did not need are the only ones freed
+            with profiler.phase("pool_trim"):
+                freed = self.pool.trim()
+            self.pool.report()
+            if freed:
+                print(f"♻️ Freed {freed} surplus pooled objects")
+        realize_time = time.perf_counter() - realize_start
+        if pipelined:
+            print(f"⏱️ Pipelined planning + realization: {realize_time * 1000:.1f} ms "
+                  f"({len(rebuilt)}/{len(self.BUILD_GROUPS)} groups rebuilt)")
+        else:
+            print(f"⏱️ Planning: {plan_time * 1000:.1f} ms | Realization: {realize_time * 1000:.1f} ms "
+                  f"({len(rebuilt)}/{len(self.BUILD_GROUPS)} groups rebuilt)")
         
         # Automatically move playhead to Frame 90 to see everything
-        bpy.context.scene.frame_set(90)
+        with profiler.phase("frame_set"):
+            bpy.context.scene.frame_set(90)
+        if datablocks_before is not None:
+            self.record_scene_stats(datablocks_before)
         
         print("\n✅ PROCEDURAL FOREST GENERATION COMPLETE!")
-        print(f"📊 Total Objects Generated: {sum(counts.values())}")
+        print(f"📊 Total Objects Generated: {sum(plan.counts().values())}")
         print("🌳 Trees grow from roots with continuous wind sway!")
         print("🌿 Bushes sway dramatically in the wind!")
         print("🌸 Flowers spin and bend - petals rotate with wind!")
@@ -604,4 +1116,5 @@ class SceneManager:
         print("🪨 Rocks emerge from underground!")
         print("☀️ Sun moves across the sky during animation!")
         print("🦋 Butterflies flutter around flowers!")
-        print("🎬 Run again for a completely different forest!\n")
\ No newline at end of file
+        print("🎬 Run again for a completely different forest!\n")
+        return plan
\ No newline at end of file
@@ -0,0 +1,579 @@
+# scene_plan.py
+"""
+Blender-independent planning stage.
+All randomness and layout happen here on NumPy arrays; SceneManager only
+realizes the finished plan into Blender objects. Nothing in this module
+imports bpy, so plans can be built, cached, tested and benchmarked anywhere.
+"""
+import math
+import numpy as np
+
+import palettes
+import profiler
+from diversity import RuntimeDiversity
+from seeding import SeedHierarchy, KeyedRandom
+from placement import PoissonDiskSampler, ClusterProcess
+from density import DensityField
+
+# Enumerations stored as small integers in the plan arrays
+CROWN_TYPES = ('cone', 'sphere', 'ico_sphere', 'round_cone')
+# Crown template per shape (same order as CROWN_TYPES):
+# cone = classic cone tree, sphere = round bushy tree,
+# ico_sphere = dense rounded tree, round_cone = rounded cone hybrid
+CROWN_TEMPLATES = ("cone_15", "uv_sphere_16x15", "ico_sphere_2", "cone_20")
+SPIN_STYLES = ('full_spin', 'wiggle')
+FLIGHT_PATTERNS = ('straight', 'circular', 'wavy')
+
+# Half-width of the square each ground category spawns in
+SPAWN_EXTENTS = {"rocks": 15.0, "bushes": 12.0, "flowers": 10.0, "mushrooms": 8.0}
+# Typical footprint radius per ground category (trees use the diversity scale
+# range) - sizes the ground before any row is planned
+FOOTPRINT_RADII = {"rocks": 1.0, "bushes": 1.5, "flowers": 0.5, "mushrooms": 0.65}
+# Ground beyond the widest spawn square (the sky and the flock use it too)
+GROUND_MARGIN = 5.0
+
+# Cluster process per ground category when the config switches clustering on:
+# (style, mean children per cluster, spread in meters at density multiplier 1)
+CLUSTER_SETTINGS = {
+    "trees": ("thomas", 5, 4.0),      # Groves
+    "rocks": ("matern", 3, 2.5),      # Rock fields
+    "bushes": ("thomas", 4, 3.0),     # Thickets
+    "flowers": ("matern", 6, 1.5),    # Flower patches
+    "mushrooms": ("ring", 6, 1.5),    # Fairy rings
+}
+
+# One structured dtype per category - every field a realizer needs
+PLAN_DTYPES = {
+    "trees": np.dtype([
+        ("id", np.int32), ("seed", np.uint64),
+        ("x", np.float64), ("y", np.float64),
+        ("trunk_height", np.float64), ("scale", np.float64),
+        ("crown_type", np.int8), ("crown_rotation", np.float64),
+        ("bark_palette", np.int16), ("leaf_palette", np.int16),
+        ("trunk_sway_y", np.float64), ("trunk_sway_x", np.float64),
+        ("leaves_sway_y", np.float64), ("leaves_sway_x", np.float64),
+        ("wind_speed", np.float64),
+    ]),
+    "rocks": np.dtype([
+        ("id", np.int32), ("seed", np.uint64),
+        ("x", np.float64), ("y", np.float64), ("z", np.float64),
+        ("radius", np.float64),
+        ("rotation_x", np.float64), ("rotation_y", np.float64), ("rotation_z", np.float64),
+        ("palette", np.int16),
+    ]),
+    "bushes": np.dtype([
+        ("id", np.int32), ("seed", np.uint64),
+        ("x", np.float64), ("y", np.float64), ("z", np.float64),
+        ("scale_x", np.float64), ("scale_y", np.float64), ("scale_z", np.float64),
+        ("palette", np.int16),
+        ("sway_angle", np.float64), ("wind_speed", np.float64),
+    ]),
+    "flowers": np.dtype([
+        ("id", np.int32), ("seed", np.uint64),
+        ("x", np.float64), ("y", np.float64), ("z", np.float64),
+        ("stem_height", np.float64), ("petal_radius", np.float64),
+        ("petal_palette", np.int16),
+        ("stem_sway", np.float64), ("petal_rotation", np.float64),
+        ("spin_style", np.int8), ("has_butterfly", np.bool_),
+    ]),
+    "butterflies": np.dtype([
+        ("id", np.int32), ("seed", np.uint64),
+        ("center_x", np.float64), ("center_y", np.float64),
+        ("x", np.float64), ("y", np.float64), ("z", np.float64),
+        ("flight_radius", np.float64),
+        ("wing_palette", np.int16),
+    ]),
+    "mushrooms": np.dtype([
+        ("id", np.int32), ("seed", np.uint64),
+        ("x", np.float64), ("y", np.float64), ("z", np.float64),
+        ("stalk_radius", np.float64), ("stalk_height", np.float64),
+        ("cap_radius", np.float64), ("cap_palette", np.int16),
+        ("wobble_angle", np.float64),
+    ]),
+    "clouds": np.dtype([
+        ("id", np.int32), ("seed", np.uint64),
+        ("x", np.float64), ("y", np.float64), ("z", np.float64),
+        ("scale_x", np.float64), ("scale_y", np.float64), ("scale_z", np.float64),
+        ("wind_direction", np.float64), ("drift_distance", np.float64),
+        ("vertical_wobble", np.float64),
+    ]),
+    "birds": np.dtype([
+        ("id", np.int32), ("seed", np.uint64),
+        ("x", np.float64), ("y", np.float64), ("z", np.float64),
+        ("heading", np.float64), ("flight_pattern", np.int8),
+        ("direction", np.float64), ("distance", np.float64), ("end_dz", np.float64),
+        ("circle_radius", np.float64), ("wave_amplitude", np.float64),
+    ]),
+}
+
+
+class ScenePlan:
+    """
+    Intermediate representation of one forest: a structured array per category.
+    Pure data - cacheable with save()/load() and cheap to inspect.
+    """
+
+    CATEGORIES = tuple(PLAN_DTYPES)
+
+    def __init__(self, arrays=None, density=None, seed=None):
+        self.density = density
+        self.seed = seed
+        self.arrays = {name: np.zeros(0, dtype=dtype) for name, dtype in PLAN_DTYPES.items()}
+        if arrays:
+            self.arrays.update(arrays)
+
+    def __getitem__(self, category):
+        return self.arrays[category]
+
+    def __setitem__(self, category, array):
+        self.arrays[category] = array
+
+    def counts(self):
+        """Returns {"trees": n, ...} for every category."""
+        return {name: len(array) for name, array in self.arrays.items()}
+
+    def to_dict(self):
+        """JSON-friendly view (lists of per-object dicts)."""
+        return {
+            "density": self.density,
+            "seed": self.seed,
+            "categories": {
+                name: [dict(zip(array.dtype.names, row.tolist())) for row in array]
+                for name, array in self.arrays.items()
+            },
+        }
+
+    def save(self, path):
+        """Caches the plan as a compressed .npz file."""
+        meta = np.array([str(self.density), str(self.seed)])
+        np.savez_compressed(path, _meta=meta, **self.arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a plan written by save()."""
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in cls.CATEGORIES if name in data}
+            density, seed = data["_meta"].tolist()
+        # Stored as strings: seeds are ints (possibly 128-bit entropy), either may be None
+        return cls(
+            arrays,
+            density=None if density == "None" else density,
+            seed=None if seed == "None" else int(seed)
+        )
+
+
+class ScenePlanner:
+    """
+    Draws every per-object parameter for a forest as vectorized NumPy arrays.
+    Uses GenerationConfig for counts and RuntimeDiversity batch sampling
+    (its ranges for trees, its distribution for every category).
+
+    Every category draws from its own SeedHierarchy stream and every object
+    gets its own seed, so categories can be planned in any order (or in
+    separate workers) and still match a full-scene plan.
+    """
+
+    def __init__(self, config=None, diversity=None, seed=None, density_fields=None):
+        """
+        Args:
+            config: GenerationConfig (counts + seed); optional for one-off plans
+            diversity: RuntimeDiversity providing ranges and the batch distribution
+            seed: Overrides config.seed for the planner's random stream
+            density_fields: Optional {"trees": DensityField, ...} deciding where
+                each ground category grows
+        """
+        self.config = config
+        if seed is not None:
+            self.seeds = SeedHierarchy(seed)
+        elif config is not None:
+            self.seeds = config.seeds
+        else:
+            self.seeds = SeedHierarchy()
+        # Same ranges everywhere; each category gets its own Generator
+        self.base_diversity = diversity if diversity is not None else RuntimeDiversity()
+        self._streams = {}
+        # One shared grid for every ground category = cross-category exclusion
+        extent = max(self.base_diversity.pos_range, *SPAWN_EXTENTS.values()) + GROUND_MARGIN
+        self.placement = PoissonDiskSampler(
+            bounds=(-extent, -extent, extent, extent), rng=self.seeds.generator("placement")
+        )
+        # category -> density multiplier for categories placed as clusters
+        self.clustering = {}
+        # category -> half-width it was actually placed in (grows with the count)
+        self.extents = {}
+        self.density_fields = density_fields or {}
+
+    def plan(self, counts=None):
+        """
+        Builds the complete ScenePlan.
+
+        Args:
+            counts: {"trees": n, ...}; drawn from the config when omitted
+
+        Returns:
+            ScenePlan
+        """
+        plan = self.new_plan()
+        for category, array in self.iter_plan(counts):
+            plan[category] = array
+        return plan
+
+    def ground_extent(self, counts):
+        """
+        Half-width of the ground for a scene with these counts: the usual
+        squares plus GROUND_MARGIN, or enough room for every typical ground
+        footprint at the sampler's packing (the sizing spawn_extent applies
+        per category) once the counts outgrow them.
+        """
+        radii = dict(FOOTPRINT_RADII, trees=float(np.mean(self.base_diversity.scale_range)))
+        area = sum(math.pi * radii[category] ** 2 * n for category, n in counts.items() if category in radii)
+        # 10% headroom: the planned footprints scatter around the typical ones
+        needed = 1.1 * math.sqrt(area / PoissonDiskSampler.PACKING) / 2.0
+        return max(self.base_diversity.pos_range, *SPAWN_EXTENTS.values(), needed) + GROUND_MARGIN
+
+    def fit_ground(self, half_extent):
+        """Sizes the ground (placement grid, sky, wind and flock area) to +/- half_extent for the next plans."""
+        self.placement.reset(bounds=(-half_extent, -half_extent, half_extent, half_extent))
+
+    @property
+    def ground_half_extent(self):
+        """Half-width of the ground the next plan is made for."""
+        return self.placement.base_bounds[2]
+
+    def new_plan(self):
+        """Empty ScenePlan for this planner, with placement and clustering reset for iter_plan."""
+        self.placement.reset()
+        self.extents = {}
+        self.clustering = self.choose_clustering()
+        return ScenePlan(
+            density=getattr(self.config, "density", None),
+            seed=self.seeds.entropy
+        )
+
+    def iter_plan(self, counts=None):
+        """Yields (category, array) in realization order; butterflies follow flowers."""
+        if counts is None:
+            counts = self.config.get_all_counts()
+
+        for category in ("trees", "rocks", "bushes", "flowers", "mushrooms", "clouds", "birds"):
+            with profiler.phase("planning", category):
+                array = self.plan_category(category, counts.get(category, 0))
+            yield category, array
+            if category == "flowers":
+                with profiler.phase("planning", "butterflies"):
+                    butterflies = self.plan_butterflies(array)
+                yield "butterflies", butterflies
+
+    def plan_category(self, category, n):
+        """Plans n objects of one category."""
+        planners = {
+            "trees": self.plan_trees,
+            "rocks": self.plan_rocks,
+            "bushes": self.plan_bushes,
+            "flowers": self.plan_flowers,
+            "mushrooms": self.plan_mushrooms,
+            "clouds": self.plan_clouds,
+            "birds": self.plan_birds,
+        }
+        return planners[category](n)
+
+    def stream(self, category):
+        """
+        RuntimeDiversity drawing from the category's own stream (the object
+        seeds). Created once per planner, so repeated single-object plans
+        keep advancing.
+        """
+        diversity = self._streams.get(category)
+        if diversity is None:
+            rng = self.seeds.generator("plan", category)
+            diversity = self._streams[category] = self.base_diversity.with_rng(rng)
+        return diversity
+
+    def spawn_bounds(self, category):
+        """(xmin, ymin, xmax, ymax) of a ground category's spawn square."""
+        extent = SPAWN_EXTENTS.get(category, self.base_diversity.pos_range)
+        return (-extent, -extent, extent, extent)
+
+    def build_density_fields(self, sources):
+        """
+        Turns {"trees": "noise" | array | ".npy"/image path | DensityField}
+        into DensityFields over each category's spawn square. Noise fields
+        come from the category's own seed stream.
+        """
+        return {
+            category: DensityField.from_source(
+                source,
+                rng=self.seeds.generator("density", category),
+                bounds=self.spawn_bounds(category)
+            )
+            for category, source in sources.items()
+        }
+
+    def choose_clustering(self):
+        """
+        Asks the config, per ground category, whether to cluster and how dense.
+        Returns {category: density multiplier}; empty without a config.
+        Each category decides from its own stream, so re-planning with the
+        same config (incremental runs) repeats the same choices.
+        """
+        clustering = {}
+        if self.config is None:
+            return clustering
+        for category in CLUSTER_SETTINGS:
+            rng = self.seeds.generator("clustering", category)
+            if self.config.should_generate_cluster(rng=rng):
+                clustering[category] = self.config.get_density_multiplier(rng=rng)
+                style = CLUSTER_SETTINGS[category][0]
+                print(f"🧩 {category.capitalize()}: {style} clusters (density x{clustering[category]:.2f})")
+        return clustering
+
+    def proposal(self, category, seeds, half_extent, multiplier=None, key="place"):
+        """
+        Candidate generator for placing a category's objects (one seed each):
+        uniform in its spawn square (or following its density field), or a
+        cluster process when a density multiplier is given. Every candidate
+        comes from its object's seed and attempt number (KeyedRandom), so an
+        object's darts never depend on how many objects are placed.
+        """
+        keyed = KeyedRandom(seeds, key)
+        field = self.density_fields.get(category)
+        if multiplier is not None:
+            style, children, spread = CLUSTER_SETTINGS[category]
+            # Fertile ground (multiplier > 1) packs the same count into tighter clusters
+            spread = spread / multiplier
+            # Parents are keyed by their own seeds too, so more objects only add clusters
+            count = max(1, int(np.ceil(len(seeds) / children)))
+            parents = KeyedRandom(self.seeds.object_seeds(count, self.seeds.generator("clusters", category)))
+            if field is None:
+                process = ClusterProcess.scatter(style, len(seeds), children, spread, half_extent - spread, parents)
+            else:
+                # Cluster centres follow the density map
+                process = ClusterProcess(style, field.sample(count, parents), spread, parents)
+            # Object i grows around parent i // children
+            return lambda objects, attempts: process.draw(
+                len(objects), keyed.at(objects, attempts), parent=objects // children
+            )
+
+        if field is not None:
+            return lambda objects, attempts: field.sample(len(objects), keyed.at(objects, attempts))
+
+        def propose(objects, attempts):
+            # Candidates follow the category's distribution, keyed per object and attempt
+            d = self.base_diversity.with_rng(keyed.at(objects, attempts))
+            return np.column_stack((
+                d.sample(len(objects), -half_extent, half_extent),
+                d.sample(len(objects), -half_extent, half_extent)
+            ))
+        return propose
+
+    def footprints(self, category, array):
+        """Ground footprint radius per object, derived from its planned scales."""
+        if category == "trees":
+            return array["scale"]  # Trunk radius (cylinder template radius 1)
+        if category == "rocks":
+            return array["radius"]
+        if category == "bushes":
+            # Bushes may brush each other, so use most of the widest axis
+            return 0.75 * np.maximum(array["scale_x"], array["scale_y"])
+        if category == "flowers":
+            return array["petal_radius"]
+        if category == "mushrooms":
+            return np.maximum(array["stalk_radius"], array["cap_radius"])
+        raise ValueError(f"No ground footprint for '{category}'")
+
+    def spawn_extent(self, category, radii, half_extent):
+        """
+        Half-width of the square a ground category spawns in: its usual
+        half_extent, grown just enough for the requested footprints (plus
+        everything placed so far) when that square cannot hold them.
+        """
+        bounds = (-half_extent, -half_extent, half_extent, half_extent)
+        if self.placement.capacity(radii, bounds) >= len(radii):
+            return half_extent
+        return max(half_extent, self.placement.required_extent(radii))
+
+    def place(self, category, array, half_extent):
+        """
+        Poisson-disk positions for a planned category.
+        The spawn square grows with the requested count (see spawn_extent).
+        A density field keeps its own bounds, so there the count is cut up
+        front to what the field can hold. Clustered objects that find no room
+        in their cluster are retried as uniform strays over the whole square.
+        Objects that still find no room are dropped (with a warning) and ids
+        are renumbered, so the returned array may be shorter than the input.
+        """
+        radii = self.footprints(category, array)
+        field = self.density_fields.get(category)
+        if field is None:
+            half_extent = self.spawn_extent(category, radii, half_extent)
+        else:
+            half_extent = max(abs(b) for b in field.bounds)
+            room = self.placement.capacity(radii, field.bounds)
+            if room < len(array):
+                # Hopeless rows would only burn rounds - keep the ones that fit
+                print(f"⚠️ Only room for about {room} of {len(array)} {category} - count reduced")
+                array = array[:room]
+                radii = radii[:room]
+        self.placement.cover(half_extent)
+        self.extents[category] = half_extent
+
+        multiplier = self.clustering.get(category)
+        propose = self.proposal(category, array["seed"], half_extent, multiplier)
+        points, placed = self.placement.place(radii, propose)
+        if multiplier is not None and not placed.all():
+            # Clusters full (or blocked by trunks) - the rest grow as strays
+            stray = np.flatnonzero(~placed)
+            stray_points, stray_placed = self.placement.place(
+                radii[stray], self.proposal(category, array["seed"][stray], half_extent, key="stray")
+            )
+            points[stray] = stray_points
+            placed[stray] = stray_placed
+        array["x"] = points[:, 0]
+        array["y"] = points[:, 1]
+        if not placed.all():
+            print(f"⚠️ Only room for {placed.sum()} of {len(array)} {category} - count reduced")
+            array = array[placed]
+            array["id"] = np.arange(len(array))
+        return array
+
+    def _new(self, category, n):
+        array = np.zeros(n, dtype=PLAN_DTYPES[category])
+        array["id"] = np.arange(n)
+        array["seed"] = self.seeds.object_seeds(n, self.stream(category).rng)
+        return array
+
+    def keyed(self, array):
+        """
+        RuntimeDiversity whose every draw comes from each row's own seed
+        (KeyedRandom): row i's parameters only depend on its seed, so
+        appending rows never changes the earlier ones.
+        """
+        return self.base_diversity.with_rng(KeyedRandom(array["seed"], "plan"))
+
+    def plan_trees(self, n):
+        trees = self._new("trees", n)
+        d = self.keyed(trees)
+        trees["trunk_height"] = d.random_heights(n)
+        trees["scale"] = d.random_scales(n)
+        trees["crown_type"] = d.choice(n, CROWN_TYPES)
+        trees["crown_rotation"] = d.random_rotations(n)
+        trees["bark_palette"] = d.choice(n, palettes.BARK_COLORS)
+        trees["leaf_palette"] = d.choice(n, palettes.LEAF_COLORS)
+
+        # Wind parameters - trunk sways less, leaves more
+        trees["trunk_sway_y"] = np.radians(d.sample(n, 1.5, 3.0))
+        trees["trunk_sway_x"] = np.radians(d.sample(n, 0.5, 1.5))
+        trees["leaves_sway_y"] = np.radians(d.sample(n, 4.0, 8.0))
+        trees["leaves_sway_x"] = np.radians(d.sample(n, 2.0, 5.0))
+        trees["wind_speed"] = d.sample(n, 0.8, 1.5)
+        return self.place("trees", trees, d.pos_range)
+
+    def plan_rocks(self, n):
+        rocks = self._new("rocks", n)
+        d = self.keyed(rocks)
+        rocks["radius"] = d.sample(n, 0.5, 1.5)
+        rocks["z"] = d.sample(n, 0.3, 0.8)
+        rocks["rotation_x"] = d.sample(n, 0, math.pi/4)
+        rocks["rotation_y"] = d.sample(n, 0, math.pi/4)
+        rocks["rotation_z"] = d.sample(n, 0, math.pi*2)
+        rocks["palette"] = d.choice(n, palettes.ROCK_COLORS)
+        return self.place("rocks", rocks, SPAWN_EXTENTS["rocks"])
+
+    def plan_bushes(self, n):
+        bushes = self._new("bushes", n)
+        d = self.keyed(bushes)
+        radius = d.sample(n, 0.8, 1.5)
+        bushes["z"] = d.sample(n, 0.5, 1.0)
+        # Bushy (wider than tall) - template radius folded into scale
+        bushes["scale_x"] = radius * d.sample(n, 1.2, 2.0)
+        bushes["scale_y"] = radius * d.sample(n, 1.2, 2.0)
+        bushes["scale_z"] = radius * d.sample(n, 0.6, 1.0)
+        bushes["palette"] = d.choice(n, palettes.BUSH_COLORS)
+        bushes["sway_angle"] = np.radians(d.sample(n, 8.0, 15.0))
+        bushes["wind_speed"] = d.sample(n, 1.0, 1.8)
+        return self.place("bushes", bushes, SPAWN_EXTENTS["bushes"])
+
+    def plan_flowers(self, n):
+        flowers = self._new("flowers", n)
+        d = self.keyed(flowers)
+        flowers["z"] = d.sample(n, 0.4, 0.6)
+        flowers["stem_height"] = d.sample(n, 0.8, 1.2)
+        flowers["petal_radius"] = d.sample(n, 0.4, 0.6)
+        flowers["petal_palette"] = d.choice(n, palettes.FLOWER_COLORS)
+        flowers["stem_sway"] = np.radians(d.sample(n, 5.0, 12.0))
+        flowers["petal_rotation"] = d.sample(n, 0, math.pi * 2)
+        flowers["spin_style"] = d.choice(n, SPIN_STYLES)
+        # Butterfly near this flower (30% chance)
+        flowers["has_butterfly"] = d.chance(n, 0.3)
+        return self.place("flowers", flowers, SPAWN_EXTENTS["flowers"])
+
+    def plan_butterflies(self, flowers):
+        """Plans one butterfly for every flower flagged has_butterfly."""
+        hosts = flowers[flowers["has_butterfly"]]
+        return self.plan_butterflies_at(np.column_stack((hosts["x"], hosts["y"], hosts["z"])))
+
+    def plan_butterflies_at(self, centers):
+        """
+        Plans butterflies circling the given flower positions.
+
+        Args:
+            centers: Array of shape (n, 3) with flower positions
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        n = len(centers)
+        butterflies = self._new("butterflies", n)
+        d = self.keyed(butterflies)
+        butterflies["center_x"] = centers[:, 0]
+        butterflies["center_y"] = centers[:, 1]
+        butterflies["x"] = centers[:, 0] + d.sample(n, -0.5, 0.5)
+        butterflies["y"] = centers[:, 1] + d.sample(n, -0.5, 0.5)
+        butterflies["z"] = centers[:, 2] + d.sample(n, 0.8, 1.5)
+        butterflies["flight_radius"] = d.sample(n, 0.8, 1.5)
+        butterflies["wing_palette"] = d.choice(n, palettes.BUTTERFLY_COLORS)
+        return butterflies
+
+    def plan_mushrooms(self, n):
+        mushrooms = self._new("mushrooms", n)
+        d = self.keyed(mushrooms)
+        mushrooms["stalk_radius"] = d.sample(n, 0.2, 0.35)
+        mushrooms["stalk_height"] = d.sample(n, 0.7, 1.0)
+        mushrooms["z"] = d.sample(n, 0.35, 0.5)
+        mushrooms["cap_radius"] = d.sample(n, 0.5, 0.8)
+        mushrooms["cap_palette"] = d.choice(n, palettes.MUSHROOM_CAP_COLORS)
+        mushrooms["wobble_angle"] = np.radians(d.sample(n, 3.0, 8.0))
+        return self.place("mushrooms", mushrooms, SPAWN_EXTENTS["mushrooms"])
+
+    def plan_clouds(self, n):
+        clouds = self._new("clouds", n)
+        d = self.keyed(clouds)
+        # Higher up for clouds, over the whole ground
+        half = self.ground_half_extent
+        clouds["x"] = d.sample(n, -half, half)
+        clouds["y"] = d.sample(n, -half, half)
+        clouds["z"] = d.sample(n, 15, 25)
+        # Fluffy shape - template radius folded into scale
+        radius = d.sample(n, 1.5, 2.5)
+        clouds["scale_x"] = radius * d.sample(n, 2.5, 4.0)
+        clouds["scale_y"] = radius * d.sample(n, 1.5, 3.0)
+        clouds["scale_z"] = radius * d.sample(n, 0.8, 1.5)
+        clouds["wind_direction"] = d.sample(n, 0, math.pi * 2)
+        clouds["drift_distance"] = d.sample(n, 8, 15)
+        clouds["vertical_wobble"] = d.sample(n, 0.5, 1.2)
+        return clouds
+
+    def plan_birds(self, n):
+        birds = self._new("birds", n)
+        d = self.keyed(birds)
+        # Lower than clouds, away from the ground's edge
+        half = self.ground_half_extent - GROUND_MARGIN
+        birds["x"] = d.sample(n, -half, half)
+        birds["y"] = d.sample(n, -half, half)
+        birds["z"] = d.sample(n, 8, 14)
+        birds["heading"] = d.sample(n, 0, math.pi * 2)
+        birds["flight_pattern"] = d.choice(n, FLIGHT_PATTERNS)
+        birds["direction"] = d.sample(n, 0, math.pi * 2)
+        birds["distance"] = d.sample(n, 30, 50)
+        birds["end_dz"] = d.sample(n, -2, 3)
+        birds["circle_radius"] = d.sample(n, 8, 15)
+        birds["wave_amplitude"] = d.sample(n, 3, 6)
+        return birds
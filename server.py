@@ -0,0 +1,167 @@
+"""
+Resident generation server - runs INSIDE a background Blender process:
+
+    blender --background --factory-startup --python server.py -- --port 0
+    blender --background --factory-startup --python server.py -- --stdio
+
+Blender starts and the generator modules are imported ONCE; after that
+every job only costs its generation work. Jobs arrive as JSON lines on a
+local TCP socket (127.0.0.1) or on stdin, and status comes back as JSON
+lines on the same channel:
+
+    -> {"id": "a", "seed": 42, "density": "sparse", "season": "spring",
+        "backend": "objects", "output": "/tmp/forest_a"}
+    <- {"id": "a", "status": "started"}
+    <- {"id": "a", "status": "done", "seconds": 0.8, "stats": {...}}
+
+Other requests: {"command": "ping"} and {"command": "shutdown"}.
+client.py drives several of these servers from asyncio.
+"""
+import bpy
+import sys
+import os
+import json
+import time
+import socket
+import argparse
+import traceback
+
+# Scripts live next to this file (no saved .blend needed in --background)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+import profiler
+from scene_manager import SceneManager
+from batch_worker import generate
+
+# Printed (alone on a line) once the server accepts jobs; socket mode adds the port
+READY = "FOREST_SERVER_READY"
+
+
+def parse_args():
+    """Arguments after Blender's own "--" separator."""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="server.py")
+    parser.add_argument("--port", type=int, default=0, help="Local TCP port (0 = any free port)")
+    parser.add_argument("--stdio", action="store_true", help="Read jobs from stdin instead of a socket")
+    return parser.parse_args(argv)
+
+
+class GenerationServer:
+    """Runs generation jobs one after another in this Blender process."""
+
+    def __init__(self):
+        # Start from an empty file instead of the default cube/camera/light scene
+        profiler.operator(bpy.ops.wm.read_homefile, use_empty=True)
+        # One SceneManager for every job: templates, materials and pooled objects are reused
+        self.app = SceneManager()
+        self.jobs_done = 0
+        # Warm the on-disk asset library before announcing readiness
+        if self.app.assets is not None:
+            self.app.assets.ensure()
+
+    def job_from_request(self, request):
+        """Validates a generate request and turns it into a batch_worker job."""
+        if "output" not in request:
+            raise ValueError("job needs an 'output' directory")
+        seed = request.get("seed")
+        return {
+            "id": request.get("id", f"job{self.jobs_done}"),
+            "seed": None if seed is None else int(seed),
+            "density": request.get("density", "medium"),
+            "season": request.get("season"),
+            "backend": request.get("backend", "objects"),
+            "directory": os.path.abspath(request["output"]),
+        }
+
+    def handle(self, request, send):
+        """
+        Executes one request, streaming status messages through send(dict).
+
+        Returns:
+            bool: False when the server should stop
+        """
+        command = request.get("command", "generate")
+        request_id = request.get("id")
+        if command == "ping":
+            send({"id": request_id, "status": "pong", "jobs_done": self.jobs_done})
+            return True
+        if command == "shutdown":
+            send({"id": request_id, "status": "bye"})
+            return False
+        if command != "generate":
+            send({"id": request_id, "status": "failed", "error": f"unknown command '{command}'"})
+            return True
+
+        start = time.perf_counter()
+        try:
+            job = self.job_from_request(request)
+            send({"id": job["id"], "status": "started"})
+            stats = generate(self.app, job)
+            self.jobs_done += 1
+            send({"id": job["id"], "status": "done", "seconds": time.perf_counter() - start, "stats": stats})
+        except Exception as e:
+            # The next job resets the scene, so one failure does not poison the server
+            traceback.print_exc()
+            send({"id": request_id, "status": "failed", "seconds": time.perf_counter() - start,
+                  "error": f"{type(e).__name__}: {e}"})
+        return True
+
+    def serve_lines(self, lines, send):
+        """Handles JSON requests line by line until shutdown or end of input."""
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                send({"id": None, "status": "failed", "error": f"invalid JSON: {e}"})
+                continue
+            if not self.handle(request, send):
+                return False
+        return True
+
+    def serve_stdio(self, out):
+        """Jobs on stdin, status on out (the real stdout; prints go to stderr meanwhile)."""
+        def send(message):
+            out.write(json.dumps(message) + "\n")
+            out.flush()
+
+        out.write(f"{READY}\n")
+        out.flush()
+        self.serve_lines(sys.stdin, send)
+
+    def serve_socket(self, port=0):
+        """Serves one local client connection at a time until a shutdown request."""
+        server = socket.create_server(("127.0.0.1", port))
+        print(f"{READY} {server.getsockname()[1]}", flush=True)
+        running = True
+        with server:
+            while running:
+                connection, _ = server.accept()
+                with connection, connection.makefile("r", encoding="utf-8") as reader:
+                    def send(message):
+                        connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+                    try:
+                        running = self.serve_lines(reader, send)
+                    except OSError:
+                        pass  # Client went away; wait for the next one
+
+
+def main():
+    args = parse_args()
+    out = sys.stdout
+    if args.stdio:
+        # Keep the status channel clean of generator prints
+        sys.stdout = sys.stderr
+    server = GenerationServer()
+    if args.stdio:
+        server.serve_stdio(out)
+    else:
+        server.serve_socket(args.port)
+    print(f"👋 Generation server stopped after {server.jobs_done} jobs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# shading.py
+"""
+Per-object shading values for the shared category materials.
+Each forest element no longer gets its own node tree: one material per
+category reads these values back through Attribute nodes (custom
+properties on objects, point attributes on instances). Kept free of bpy
+so the object and instancing backends draw them the same way.
+"""
+import numpy as np
+
+import palettes
+from seeding import KeyedRandom
+
+# Attribute name -> Principled BSDF input driven by it
+SHADING_INPUTS = (
+    ("forest_color", "Base Color"),
+    ("forest_roughness", "Roughness"),
+    ("forest_subsurface", "Subsurface Weight"),
+    ("forest_specular", "Specular IOR Level"),
+    ("forest_metallic", "Metallic"),
+)
+
+# Kind -> palette (None = fixed or derived color) and value ranges.
+# A (low, high) tuple is drawn uniformly, a float is used as is.
+SHADING_KINDS = {
+    "bark": {"palette": palettes.BARK_COLORS, "roughness": (0.6, 0.95), "specular": (0.1, 0.4)},
+    "leaf": {"palette": palettes.LEAF_COLORS, "roughness": (0.2, 0.7), "subsurface": (0.15, 0.4)},
+    "rock": {"palette": palettes.ROCK_COLORS, "roughness": (0.8, 1.0), "specular": (0.05, 0.15)},
+    "bush": {"palette": palettes.BUSH_COLORS, "roughness": (0.4, 0.7), "subsurface": (0.2, 0.4)},
+    "flower_petal": {"palette": palettes.FLOWER_COLORS, "roughness": (0.3, 0.6),
+                     "specular": (0.4, 0.7), "subsurface": (0.3, 0.5)},
+    "flower_stem": {"palette": None, "color": (0.1, 0.4, 0.1), "roughness": 0.6},
+    "mushroom_cap": {"palette": palettes.MUSHROOM_CAP_COLORS, "roughness": (0.4, 0.7),
+                     "specular": (0.3, 0.5)},
+    "mushroom_stalk": {"palette": None, "color": (0.9, 0.88, 0.85), "roughness": 0.7},
+    "butterfly_body": {"palette": None, "color": (0.05, 0.05, 0.05), "roughness": 0.8},
+    "butterfly_wing": {"palette": palettes.BUTTERFLY_COLORS, "roughness": (0.2, 0.4),
+                       "specular": (0.5, 0.8), "metallic": (0.1, 0.3)},
+    "cloud": {"palette": None, "roughness": 0.9, "subsurface": 0.3},
+    "bird": {"palette": None, "roughness": 0.7},
+}
+
+# Principled defaults for inputs a kind does not vary
+DEFAULTS = {"roughness": 0.5, "subsurface": 0.0, "specular": 0.5, "metallic": 0.0}
+
+
+def shading_rng(seeds):
+    """
+    Material stream of objects with planned seeds (one row per seed).
+    Keyed per object (seeding.KeyedRandom), so an object's shading only
+    depends on its own seed: the object backend (one seed at a time) and
+    the instancing backend (a whole category) give every row the same
+    values, as long as both shade an object's parts in the same order.
+    """
+    return KeyedRandom(seeds, "material")
+
+
+def sample_shading(kind, n, rng, palette_indices=None):
+    """
+    Draws shading values for n objects of one kind in one vectorized pass.
+
+    Args:
+        kind: Key of SHADING_KINDS
+        n: Number of objects
+        rng: numpy Generator, or shading_rng() of the n objects
+        palette_indices: Planned palette entry per object (drawn when omitted)
+
+    Returns:
+        dict: "forest_color" (n, 4) RGBA plus (n,) arrays for the other inputs
+    """
+    spec = SHADING_KINDS[kind]
+    palette = spec["palette"]
+
+    if palette is not None:
+        if palette_indices is None:
+            palette_indices = rng.integers(0, len(palette), n)
+        color = np.asarray(palette, dtype=np.float64)[np.asarray(palette_indices)].reshape(n, 3)
+    elif "color" in spec:
+        color = np.tile(spec["color"], (n, 1)).astype(np.float64)
+    else:
+        color = np.zeros((n, 3))
+
+    # Natural variation on top of the palette entry
+    if kind in ("bark", "bush"):
+        color = color + rng.uniform(-0.05, 0.08, (n, 1))
+    elif kind == "rock":
+        color = color + rng.uniform(-0.03, 0.03, (n, 1))
+    elif kind == "leaf":
+        hue_shift = rng.uniform(-0.08, 0.12, n)
+        brightness_shift = rng.uniform(-0.10, 0.15, n)
+        color = color + np.column_stack((hue_shift, brightness_shift, hue_shift))
+    elif kind == "cloud":
+        whiteness = rng.uniform(0.85, 0.98, n)
+        color = np.column_stack((whiteness, whiteness, whiteness))
+    elif kind == "bird":
+        darkness = rng.uniform(0.05, 0.15, n)
+        color = np.column_stack((darkness, darkness * 0.8, darkness * 0.6))
+
+    values = {"forest_color": np.column_stack((np.clip(color, 0.0, 1.0), np.ones(n)))}
+    for name, default in DEFAULTS.items():
+        value = spec.get(name, default)
+        if isinstance(value, tuple):
+            values[f"forest_{name}"] = rng.uniform(value[0], value[1], n)
+        else:
+            values[f"forest_{name}"] = np.full(n, float(value))
+    return values
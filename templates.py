@@ -0,0 +1,142 @@
+import bpy
+import bmesh
+import numpy as np
+import profiler
+from datablocks import tag, SHARED
+
+
+class MeshTemplateLibrary:
+    """
+    Shared mesh templates for every forest element.
+    Each primitive is built ONCE through bpy.data.meshes and every object made
+    from it is a linked duplicate (same mesh datablock, own transform).
+    No bpy.ops calls - no context polling, undo pushes or view-layer updates!
+    """
+
+    # Template name -> (builder, parameters)
+    # All sizes match the defaults of the matching bpy.ops primitive, so
+    # object scale carries the per-object radius/depth variation.
+    # "smooth": True templates are smooth-shaded once at the mesh level, so
+    # every object made from them inherits it; a shape needed both ways has a
+    # flat and a *_smooth variant.
+    TEMPLATE_SPECS = {
+        "cylinder_15": ("cylinder", {"segments": 15}),
+        "cylinder_15_smooth": ("cylinder", {"segments": 15, "smooth": True}),
+        "cylinder_6": ("cylinder", {"segments": 6, "smooth": True}),
+        "cylinder_5": ("cylinder", {"segments": 5, "smooth": True}),
+        "cone_20": ("cone", {"segments": 20, "smooth": True}),
+        "cone_15": ("cone", {"segments": 15, "smooth": True}),
+        "cone_5": ("cone", {"segments": 5, "smooth": True}),
+        "uv_sphere_32x16": ("uv_sphere", {"segments": 32, "rings": 16}),
+        "uv_sphere_16x15": ("uv_sphere", {"segments": 16, "rings": 15, "smooth": True}),
+        "uv_sphere_12x5": ("uv_sphere", {"segments": 12, "rings": 5, "smooth": True}),
+        "uv_sphere_8x6": ("uv_sphere", {"segments": 8, "rings": 6, "smooth": True}),
+        "ico_sphere_2": ("ico_sphere", {"subdivisions": 2, "smooth": True}),
+        "cube": ("cube", {}),
+        "plane": ("plane", {}),
+    }
+
+    def __init__(self, prefix="Forest_Template", pool=None):
+        """
+        Args:
+            prefix: Name prefix of the template meshes
+            pool: Optional ObjectPool that new_object recycles objects from
+        """
+        self.prefix = prefix
+        self.pool = pool
+
+    def mesh_name(self, template):
+        return f"{self.prefix}_{template}"
+
+    def get_mesh(self, template):
+        """
+        Returns the shared mesh for a template, building it on first use.
+
+        Args:
+            template: Key of TEMPLATE_SPECS (e.g. "cylinder_15")
+
+        Returns:
+            bpy.types.Mesh shared by every object of this template
+        """
+        name = self.mesh_name(template)
+        mesh = bpy.data.meshes.get(name)
+        if mesh is None:
+            with profiler.phase("templates"):
+                mesh = self.build_mesh(template, name)
+        return mesh
+
+    def build_mesh(self, template, name):
+        """Builds template geometry with bmesh and writes it into a new mesh datablock."""
+        builder, params = self.TEMPLATE_SPECS[template]
+
+        bm = bmesh.new()
+        if builder == "cylinder":
+            bmesh.ops.create_cone(
+                bm, cap_ends=True, cap_tris=False,
+                segments=params["segments"], radius1=1.0, radius2=1.0, depth=2.0
+            )
+        elif builder == "cone":
+            bmesh.ops.create_cone(
+                bm, cap_ends=True, cap_tris=False,
+                segments=params["segments"], radius1=1.0, radius2=0.0, depth=2.0
+            )
+        elif builder == "uv_sphere":
+            bmesh.ops.create_uvsphere(
+                bm, u_segments=params["segments"], v_segments=params["rings"], radius=1.0
+            )
+        elif builder == "ico_sphere":
+            bmesh.ops.create_icosphere(bm, subdivisions=params["subdivisions"], radius=1.0)
+        elif builder == "cube":
+            bmesh.ops.create_cube(bm, size=2.0)
+        else:  # plane
+            bmesh.ops.create_grid(bm, x_segments=1, y_segments=1, size=1.0)
+
+        mesh = tag(bpy.data.meshes.new(name), SHARED)
+        bm.to_mesh(mesh)
+        bm.free()
+        with profiler.phase("shading"):
+            self.set_smooth(mesh, params.get("smooth", False))
+        profiler.count("template_meshes")
+
+        # One empty slot so objects can carry their own (object-linked) material
+        mesh.materials.append(None)
+        return mesh
+
+    @staticmethod
+    def set_smooth(mesh, smooth=True):
+        """
+        Writes use_smooth of every polygon in one foreach_set - the data-level
+        equivalent of bpy.ops.object.shade_smooth / shade_flat (no active
+        object, selection or view layer needed, so it also runs in --background).
+        """
+        mesh.polygons.foreach_set("use_smooth", np.full(len(mesh.polygons), smooth, dtype=bool))
+        mesh.update()
+
+    def new_object(self, template, name, collection, location=(0, 0, 0), scale=(1, 1, 1)):
+        """
+        Creates an object that shares the template mesh and links it
+        straight into the target collection (recycled from the object pool
+        when one is attached).
+
+        Args:
+            template: Key of TEMPLATE_SPECS
+            name: Object name
+            collection: Collection to link the object into
+            location: Initial location
+            scale: Initial scale (carries radius/depth variation)
+
+        Returns:
+            bpy.types.Object
+        """
+        with profiler.phase("primitives"):
+            mesh = self.get_mesh(template)
+            if self.pool is not None:
+                obj = self.pool.acquire(template, name, mesh, collection)
+            else:
+                obj = tag(bpy.data.objects.new(name, mesh))
+                with profiler.phase("linking"):
+                    collection.objects.link(obj)
+            obj.location = location
+            obj.scale = scale
+        profiler.count("objects")
+        return obj
@@ -0,0 +1,6 @@
+# conftest.py
+"""Puts the flat repo root on sys.path so tests import the bpy-free modules directly."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,48 @@
+# test_benchmark.py
+"""bpy-free tests for the benchmark ladder."""
+import pytest
+
+from benchmark import BenchmarkSuite, BenchmarkHistory
+
+
+class FakeSuite(BenchmarkSuite):
+    """Cases cost n milliseconds and deliver at most 50 objects, without running anything."""
+
+    def measure(self, setup, work):
+        n = setup()
+        return {"seconds": n / 1000, "count": work(n)}
+
+    def run(self):
+        self.ladder("fake", lambda n: n, lambda n: min(n, 50), max_n=5000)
+        return self.results
+
+
+def test_base_suite_is_abstract():
+    with pytest.raises(TypeError):
+        BenchmarkSuite()
+
+
+def test_ladder_projects_and_caps_sizes():
+    results = FakeSuite(sizes=(10, 100, 1000, 10000), budget=2.0, repeat=1).run()
+    assert results["fake/n=1000"]["seconds"] == 1.0
+    assert results["fake/n=10000"]["skipped"] == "n > 5000"
+
+    results = FakeSuite(sizes=(10, 100, 1000, 4000), budget=2.0, repeat=1).run()
+    assert results["fake/n=4000"]["skipped"].startswith("projected")
+
+
+def test_us_per_object_uses_requested_count():
+    results = FakeSuite(sizes=(100,), repeat=1).run()
+    assert results["fake/n=100"]["count"] == 50
+    assert results["fake/n=100"]["us_per_object"] == pytest.approx(1000.0)
+
+
+def test_history_only_compares_the_same_backend_and_seed(tmp_path):
+    history = BenchmarkHistory(str(tmp_path / "history.jsonl"))
+    for backend, seed in (("objects", 42), ("instances", 42), ("objects", 7)):
+        history.append({"mode": "blender", "host": "ci", "backend": backend, "seed": seed,
+                        "results": {"preset/medium": {"seconds": 1.0}}})
+
+    entries = history.load("blender", "ci", "instances", 42)
+    assert [(entry["backend"], entry["seed"]) for entry in entries] == [("instances", 42)]
+    assert history.load("pure", "ci") == []
@@ -0,0 +1,46 @@
+# test_density.py
+"""bpy-free tests for DensityField."""
+import numpy as np
+import pytest
+
+from density import DensityField
+
+
+def test_every_source_is_normalized_to_max_one():
+    painted = DensityField(np.array([[0.0, 255.0], [127.5, 255.0]]))
+    unit = DensityField(np.array([[0.0, 1.0], [0.5, 1.0]]))
+    np.testing.assert_allclose(painted.values, unit.values)
+    assert painted.values.max() == 1.0
+
+    noise = DensityField.from_noise(np.random.default_rng(1), shape=(16, 16))
+    assert noise.values.min() >= 0.0
+    assert noise.values.max() == pytest.approx(1.0)
+
+
+def test_negative_and_empty_fields():
+    field = DensityField(np.array([[-3.0, 2.0], [0.0, 1.0]]))
+    np.testing.assert_allclose(field.values, [[0.0, 1.0], [0.0, 0.5]])
+
+    barren = DensityField(np.zeros((3, 3)))
+    assert barren.coverage() == 0.0
+    assert barren.expected_count(40) == 0
+    with pytest.raises(ValueError):
+        barren.sample(1, np.random.default_rng(2))
+
+
+def test_expected_count_scales_the_preset_by_coverage():
+    assert DensityField(np.full((4, 4), 7.0)).expected_count(20) == 20
+    half = DensityField(np.array([[0.0, 1.0], [0.0, 1.0]]))
+    assert half.expected_count(20) == 10
+    # Units of the source never change the totals
+    assert DensityField(np.array([[0.0, 255.0], [0.0, 255.0]])).expected_count(20) == 10
+
+
+def test_sample_stays_on_fertile_cells_inside_bounds():
+    values = np.zeros((4, 4))
+    values[0, 3] = 1.0  # Row 0 = ymin, column 3 = xmax
+    field = DensityField(values, bounds=(-8.0, -8.0, 8.0, 8.0))
+    points = field.sample(200, np.random.default_rng(3))
+    assert points.shape == (200, 2)
+    assert ((points[:, 0] >= 4.0) & (points[:, 0] <= 8.0)).all()
+    assert ((points[:, 1] >= -8.0) & (points[:, 1] <= -4.0)).all()
@@ -0,0 +1,164 @@
+# test_placement.py
+"""bpy-free tests for SpatialHashGrid and PoissonDiskSampler."""
+import numpy as np
+import pytest
+
+from placement import SpatialHashGrid, PoissonDiskSampler
+from seeding import SeedHierarchy, KeyedRandom
+
+
+def brute_force_pairs(queries, query_radii, points, radii):
+    delta = queries[:, None, :] - points[None, :, :]
+    limit = query_radii[:, None] + radii[None, :]
+    q, p = np.nonzero(np.einsum("ijk,ijk->ij", delta, delta) < limit * limit)
+    return set(zip(q.tolist(), p.tolist()))
+
+
+def assert_no_overlaps(points, radii):
+    delta = points[:, None, :] - points[None, :, :]
+    distance = np.sqrt(np.einsum("ijk,ijk->ij", delta, delta))
+    limit = radii[:, None] + radii[None, :]
+    np.fill_diagonal(distance, np.inf)
+    assert (distance >= limit).all()
+
+
+# ============ SpatialHashGrid ============
+
+def test_grid_query_pairs_matches_brute_force():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-10, 10, (300, 2))
+    radii = rng.uniform(0.1, 1.5, 300)
+    queries = rng.uniform(-12, 12, (200, 2))
+    query_radii = rng.uniform(0.1, 1.5, 200)
+
+    grid = SpatialHashGrid((-10, -10, 10, 10), cell_size=2.0)
+    grid.build(points, radii)
+    q, p = grid.query_pairs(queries, query_radii)
+
+    assert set(zip(q.tolist(), p.tolist())) == brute_force_pairs(queries, query_radii, points, radii)
+
+
+def test_grid_overlaps_and_add():
+    grid = SpatialHashGrid((-5, -5, 5, 5), cell_size=1.0)
+    assert len(grid) == 0
+    assert not grid.overlaps([[0.0, 0.0]], [1.0]).any()
+
+    grid.add([[0.0, 0.0]], [1.0])
+    grid.add([[3.0, 3.0]], [0.5])
+    assert len(grid) == 2
+    mask = grid.overlaps([[1.5, 0.0], [2.5, 0.0], [3.2, 3.2]], [0.6, 0.6, 0.1])
+    assert mask.tolist() == [True, False, True]
+
+
+def test_grid_clamps_points_outside_bounds():
+    grid = SpatialHashGrid((-2, -2, 2, 2), cell_size=1.0)
+    ix, iy = grid.cells(np.array([[-50.0, 0.0], [50.0, 1.5]]))
+    assert ix.tolist() == [0, grid.nx - 1]
+    assert iy.tolist() == [2, 3]
+
+    # Clamped discs are still found by exact distance
+    grid.build([[10.0, 10.0]], [1.0])
+    assert grid.overlaps([[10.5, 10.5], [2.0, 2.0]], [0.5, 0.5]).tolist() == [True, False]
+
+
+# ============ PoissonDiskSampler ============
+
+def test_place_never_overlaps():
+    sampler = PoissonDiskSampler(rng=np.random.default_rng(2))
+    radii = np.random.default_rng(3).uniform(0.3, 1.0, 150)
+    points, placed = sampler.place(radii, sampler.uniform_proposal(15.0))
+
+    assert placed.all()
+    assert np.isfinite(points).all()
+    assert_no_overlaps(points, radii)
+
+
+def test_place_respects_earlier_discs_and_exclusions():
+    sampler = PoissonDiskSampler(rng=np.random.default_rng(4))
+    sampler.exclude([[0.0, 0.0]], [5.0])
+    first = sampler.sample(40, 0.5, 10.0)
+    second = sampler.sample(40, 0.5, 10.0)
+
+    assert (np.hypot(*np.vstack((first, second)).T) >= 5.5).all()
+    everything = np.vstack((first, second))
+    assert_no_overlaps(everything, np.full(len(everything), 0.5))
+
+
+def test_place_gives_up_when_full():
+    sampler = PoissonDiskSampler(bounds=(-3, -3, 3, 3), rng=np.random.default_rng(5))
+    proposals = []
+
+    def propose(objects, attempts):
+        proposals.append(len(objects))
+        return sampler.rng.uniform(-3, 3, (len(objects), 2))
+
+    points, placed = sampler.place(np.full(5000, 1.0), propose)
+
+    assert 0 < placed.sum() < 20
+    assert np.isnan(points[~placed]).all()
+    # Stops on idle darts long before max_rounds
+    assert len(proposals) < sampler.max_rounds
+
+
+def test_capacity_counts_leading_objects_and_occupied_area():
+    sampler = PoissonDiskSampler()
+    bounds = (-5, -5, 5, 5)
+    radii = np.ones(100)
+    free = int(PoissonDiskSampler.PACKING * 100 / np.pi)
+    assert sampler.capacity(radii, bounds) == free
+    assert sampler.capacity(radii[:3], bounds) == 3
+
+    sampler.exclude([[0.0, 0.0]], [2.0])
+    assert sampler.capacity(radii, bounds) == free - 4
+    # Discs outside the bounds take nothing away
+    sampler.exclude([[18.0, 18.0]], [1.0])
+    assert sampler.capacity(radii, bounds) == free - 4
+
+
+def test_required_extent_holds_the_requested_count():
+    sampler = PoissonDiskSampler(rng=np.random.default_rng(6))
+    radii = np.random.default_rng(7).uniform(0.7, 1.3, 2000)
+    half_extent = sampler.required_extent(radii)
+    bounds = (-half_extent, -half_extent, half_extent, half_extent)
+    assert sampler.capacity(radii, bounds) == pytest.approx(len(radii), abs=1)
+
+    sampler.cover(half_extent)
+    points, placed = sampler.place(radii, sampler.uniform_proposal(half_extent))
+    assert placed.all()
+    assert (np.abs(points) <= half_extent).all()
+
+
+def test_cover_grows_grid_and_reset_restores_it():
+    sampler = PoissonDiskSampler(bounds=(-10, -10, 10, 10))
+    sampler.exclude([[1.0, 1.0]], [1.0])
+
+    sampler.cover(5.0)
+    assert sampler.bounds == (-10, -10, 10, 10)
+    sampler.cover(40.0)
+    assert sampler.bounds == (-40.0, -40.0, 40.0, 40.0)
+    assert len(sampler.grid) == 1
+    assert sampler.grid.overlaps([[1.5, 1.5]], [0.1]).all()
+
+    sampler.reset()
+    assert sampler.bounds == (-10, -10, 10, 10)
+    assert len(sampler.grid) == 0
+
+
+def test_place_is_deterministic_per_seed():
+    def run(seed):
+        sampler = PoissonDiskSampler(rng=np.random.default_rng(seed))
+        return sampler.sample(60, 0.8, 12.0)
+
+    np.testing.assert_array_equal(run(8), run(8))
+    assert not np.array_equal(run(8), run(9))
+
+
+def test_keyed_random_ignores_batch_size():
+    seeds = SeedHierarchy(3).object_seeds(50, np.random.default_rng(3))
+    small, large = KeyedRandom(seeds[:20], "plan"), KeyedRandom(seeds, "plan")
+    for draw in (lambda r: r.random(), lambda r: r.normal(2.0, 0.5), lambda r: r.integers(0, 9, (len(r), 3))):
+        np.testing.assert_array_equal(draw(small), draw(large)[:20])
+    darts = KeyedRandom(seeds, "place").at(np.array([4, 4, 7]), np.array([0, 1, 0])).random()
+    alone = KeyedRandom(seeds[:5], "place").at(np.array([4]), np.array([1])).random()
+    assert darts[0] != darts[1]
+    assert alone[0] == darts[1]
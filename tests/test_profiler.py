@@ -0,0 +1,20 @@
+# test_profiler.py
+"""bpy-free tests for the profiler counters."""
+import profiler
+from profiler import Profiler
+
+
+def test_operator_calls_count_on_the_active_profiler():
+    calls = []
+    profiler.operator(lambda **kwargs: calls.append(kwargs), mode="OBJECT")
+
+    active = Profiler()
+    previous = profiler.activate(active)
+    try:
+        result = profiler.operator(lambda **kwargs: calls.append(kwargs) or {"FINISHED"}, use_empty=True)
+    finally:
+        profiler.activate(previous)
+
+    assert result == {"FINISHED"}
+    assert calls == [{"mode": "OBJECT"}, {"use_empty": True}]
+    assert active.report()["counters"] == {"operator_calls": 1}
@@ -0,0 +1,58 @@
+# test_scene_plan.py
+"""bpy-free tests for ScenePlan and ScenePlanner."""
+import numpy as np
+
+from generation_config import GenerationConfig
+from scene_plan import ScenePlan, ScenePlanner
+
+
+def test_save_load_round_trip(tmp_path):
+    planner = ScenePlanner(GenerationConfig(seed=42, density="dense"))
+    plan = planner.plan()
+    path = tmp_path / "plan.npz"
+    plan.save(path)
+
+    loaded = ScenePlan.load(path)
+    assert loaded.seed == plan.seed
+    assert isinstance(loaded.seed, int)
+    assert loaded.density == "dense"
+    assert loaded.counts() == plan.counts()
+    for category in ScenePlan.CATEGORIES:
+        np.testing.assert_array_equal(loaded[category], plan[category])
+
+
+def test_save_load_without_seed_or_density(tmp_path):
+    path = tmp_path / "empty.npz"
+    ScenePlan().save(path)
+    loaded = ScenePlan.load(path)
+    assert loaded.seed is None
+    assert loaded.density is None
+
+
+def test_same_seed_same_plan():
+    counts = {"trees": 20, "rocks": 10, "bushes": 8, "flowers": 15, "mushrooms": 6, "clouds": 4, "birds": 5}
+    first = ScenePlanner(seed=7).plan(counts)
+    second = ScenePlanner(seed=7).plan(counts)
+    for category in ScenePlan.CATEGORIES:
+        np.testing.assert_array_equal(first[category], second[category])
+
+
+def test_adding_an_object_keeps_the_others():
+    counts = {"trees": 20, "rocks": 10, "bushes": 8, "flowers": 15, "mushrooms": 6, "clouds": 4, "birds": 5}
+    before = ScenePlanner(seed=7).plan(counts)
+    after = ScenePlanner(seed=7).plan({**counts, "flowers": 16})
+    np.testing.assert_array_equal(after["flowers"][:15], before["flowers"])
+    np.testing.assert_array_equal(after["trees"], before["trees"])
+
+
+class AlwaysClustered(GenerationConfig):
+    def should_generate_cluster(self, rng=None):
+        return True
+
+
+def test_clustered_counts_are_kept():
+    counts = {"trees": 300, "rocks": 300, "bushes": 300, "flowers": 300, "mushrooms": 300, "clouds": 2, "birds": 2}
+    planner = ScenePlanner(AlwaysClustered(seed=3, density="dense"))
+    plan = planner.plan(counts)
+    assert set(planner.clustering) == {"trees", "rocks", "bushes", "flowers", "mushrooms"}
+    assert plan.counts() == {**counts, "butterflies": len(plan["butterflies"])}
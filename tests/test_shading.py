@@ -0,0 +1,27 @@
+# test_shading.py
+"""bpy-free tests for the per-object shading streams."""
+import numpy as np
+
+from shading import sample_shading, shading_rng
+
+
+def test_appending_a_row_keeps_earlier_shading():
+    palette = np.array([0, 1, 2])
+    before = sample_shading("rock", 3, shading_rng([11, 22, 33]), palette)
+    after = sample_shading("rock", 4, shading_rng([11, 22, 33, 44]), np.append(palette, 1))
+    for name, values in before.items():
+        np.testing.assert_array_equal(after[name][:3], values)
+
+
+def test_batched_rows_match_single_objects():
+    # Instancing shades a whole category, the object backend one object at a time
+    seeds = [5, 6, 7]
+    batch = shading_rng(seeds)
+    bark = sample_shading("bark", 3, batch, [0, 1, 2])
+    leaf = sample_shading("leaf", 3, batch, [2, 1, 0])
+    for row, seed in enumerate(seeds):
+        single = shading_rng([seed])
+        for kind, values, palette in (("bark", bark, row), ("leaf", leaf, 2 - row)):
+            one = sample_shading(kind, 1, single, [palette])
+            for name, column in one.items():
+                np.testing.assert_array_equal(column[0], values[name][row])
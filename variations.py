@@ -1,51 +1,15 @@
-import random
-import math
 import bpy
 import importlib
 
 # Import the MaterialAssigner
 import materials
+import diversity
 importlib.reload(materials)
+importlib.reload(diversity)
 from materials import MaterialAssigner
 
-class RuntimeDiversity:
-    """
-    Handles all randomness and procedural realism.
-    Merged from diversity.py into variations.py
-    """
-    def __init__(
-        self,
-        pos_range=15.0,
-        scale_range=(0.7, 1.3),
-        height_range=(2.0, 5.0),
-        rotation_range=(0, 360),
-        seed=None
-    ):
-        self.pos_range = pos_range
-        self.scale_range = scale_range
-        self.height_range = height_range
-        self.rotation_range = rotation_range
-
-        # Optional reproducibility
-        if seed is not None:
-            random.seed(seed)
-
-    def random_position(self):
-        return (
-            random.uniform(-self.pos_range, self.pos_range),
-            random.uniform(-self.pos_range, self.pos_range)
-        )
-
-    def random_scale(self):
-        return random.uniform(*self.scale_range)
-
-    def random_height(self):
-        return random.uniform(*self.height_range)
-
-    def random_rotation(self):
-        return math.radians(
-            random.uniform(*self.rotation_range)
-        )
+# RuntimeDiversity lives in the bpy-free diversity.py so the planner can use it
+from diversity import RuntimeDiversity
 
 class VariationEngine:
     def __init__(self, spawn_range=15.0):
@@ -59,7 +23,7 @@ class VariationEngine:
         # Initialize material engine
         self.material_assigner = MaterialAssigner()
 
-    def apply_random_transform(self, trunk, leaves):
+    def apply_random_transform(self, trunk, leaves, tree_type=None):
         """
         Now uses RuntimeDiversity for all randomization.
         This removes hardcoded values and improves code quality.
@@ -68,9 +32,46 @@ class VariationEngine:
         pos_x, pos_y = self.diversity.random_position()
         
         # Get random dimensions
-        trunk_h = self.diversity.random_height()
-        tree_scale = self.diversity.random_scale()
-        leaf_rotation = self.diversity.random_rotation()
+        self.apply_tree_transform(trunk, leaves, {
+            "x": pos_x,
+            "y": pos_y,
+            "trunk_height": self.diversity.random_height(),
+            "scale": self.diversity.random_scale(),
+            "crown_rotation": self.diversity.random_rotation(),
+        })
+
+    def apply_random_transforms(self, pairs):
+        """
+        Batch version of apply_random_transform.
+        Draws every tree's values in one vectorized call per parameter.
+
+        Args:
+            pairs: Sequence of (trunk, leaves) tuples
+        """
+        n = len(pairs)
+        positions = self.diversity.random_positions(n)
+        heights = self.diversity.random_heights(n)
+        scales = self.diversity.random_scales(n)
+        rotations = self.diversity.random_rotations(n)
+
+        for i, (trunk, leaves) in enumerate(pairs):
+            self.apply_tree_transform(trunk, leaves, {
+                "x": positions[i, 0],
+                "y": positions[i, 1],
+                "trunk_height": heights[i],
+                "scale": scales[i],
+                "crown_rotation": rotations[i],
+            })
+
+    def apply_tree_transform(self, trunk, leaves, spec):
+        """
+        Places a tree from planned values (a ScenePlan row or a dict with
+        x, y, trunk_height, scale and crown_rotation).
+        """
+        pos_x, pos_y = spec["x"], spec["y"]
+        trunk_h = spec["trunk_height"]
+        tree_scale = spec["scale"]
+        leaf_rotation = spec["crown_rotation"]
 
         # Positioning Trunk (Cylinder)
         trunk.location = (pos_x, pos_y, trunk_h / 2)
@@ -81,11 +82,11 @@ class VariationEngine:
         leaves.scale = (tree_scale * 2.5, tree_scale * 2.5, trunk_h * 1.1)
         leaves.rotation_euler.z = leaf_rotation
 
-    def apply_materials(self, trunk, leaves, ground):
+    def apply_materials(self, trunk, leaves, ground, bark_palette=None, leaf_palette=None, seed=None):
         """Uses MaterialAssigner class for procedural material assignment."""
-        # Apply tree materials
-        self.material_assigner.apply_tree_materials(trunk, leaves)
+        # Apply tree materials (seed = the tree's own material stream)
+        self.material_assigner.apply_tree_materials(trunk, leaves, bark_palette, leaf_palette, seed)
         
         # Apply ground material only once
-        if ground and len(ground.data.materials) == 0:
+        if ground and ground.active_material is None:
             self.material_assigner.apply_ground_material(ground)
\ No newline at end of file
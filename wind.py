@@ -0,0 +1,164 @@
+# wind.py
+"""
+One space-time wind field for the whole forest.
+Gust strength is precomputed ONCE on a coarse (t, y, x) grid as value
+noise advected along the wind direction, so gusts visibly roll across the
+scene. Every plant's sway then comes from a single batched trilinear
+interpolation at its position instead of its own random sine. bpy-free.
+"""
+import numpy as np
+
+
+class WindField:
+    """Coarse grid of wind strength over (x, y, frame) plus a travelling sway wave."""
+
+    def __init__(self, rng, bounds=(-20.0, -20.0, 20.0, 20.0), frame_range=(1, 160),
+                 cell_size=4.0, frame_step=4, direction=None, speed=0.3,
+                 gust_size=12.0, gustiness=0.6, frequency=0.2, lean=0.35):
+        """
+        Args:
+            rng: numpy Generator (gust noise and, if not given, the direction)
+            bounds: (xmin, ymin, xmax, ymax) covered by the grid
+            frame_range: (first, last) frame covered by the grid
+            cell_size: Grid spacing in meters
+            frame_step: Grid spacing in frames
+            direction: Wind heading in radians (random when None)
+            speed: How fast gusts travel, in meters per frame
+            gust_size: Typical gust diameter in meters
+            gustiness: 0 = steady breeze, 1 = strength swings between 0 and 2
+            frequency: Sway oscillation speed in radians per frame
+            lean: Share of the sway that is a steady downwind bend
+        """
+        self.bounds = tuple(float(b) for b in bounds)
+        self.frame_range = (float(frame_range[0]), float(frame_range[1]))
+        self.cell_size = float(cell_size)
+        self.frame_step = float(frame_step)
+        if direction is None:
+            direction = rng.uniform(0.0, 2 * np.pi)
+        self.direction = float(direction)
+        self.heading = np.array([np.cos(self.direction), np.sin(self.direction)])
+        self.speed = float(speed)
+        self.gust_size = float(gust_size)
+        self.gustiness = float(gustiness)
+        self.frequency = float(frequency)
+        self.lean = float(lean)
+
+        xmin, ymin, xmax, ymax = self.bounds
+        self.xs = np.arange(xmin, xmax + self.cell_size, self.cell_size)
+        self.ys = np.arange(ymin, ymax + self.cell_size, self.cell_size)
+        self.ts = np.arange(self.frame_range[0], self.frame_range[1] + self.frame_step, self.frame_step)
+        self.values = self.build(rng)
+
+    def parameters(self):
+        """Everything that shapes the field (for build fingerprints)."""
+        return {
+            "bounds": self.bounds, "frame_range": self.frame_range,
+            "cell_size": self.cell_size, "frame_step": self.frame_step,
+            "direction": self.direction, "speed": self.speed, "gust_size": self.gust_size,
+            "gustiness": self.gustiness, "frequency": self.frequency, "lean": self.lean,
+        }
+
+    def build(self, rng):
+        """
+        Evaluates gust strength on the whole grid in one pass: value noise
+        sampled at positions pushed back along the wind by speed * time.
+
+        Returns:
+            (nt, ny, nx) array of strengths (mean about 1.0, never negative)
+        """
+        t = (self.ts - self.frame_range[0])[:, None, None]
+        gx = self.xs[None, None, :] - self.heading[0] * self.speed * t
+        gy = self.ys[None, :, None] - self.heading[1] * self.speed * t
+        gx, gy = np.broadcast_arrays(gx, gy)
+
+        # Random lattice large enough for the advected coordinates
+        x0, y0 = gx.min(), gy.min()
+        cells_x = int(np.ceil((gx.max() - x0) / self.gust_size)) + 2
+        cells_y = int(np.ceil((gy.max() - y0) / self.gust_size)) + 2
+        lattice = rng.random((cells_y, cells_x))
+
+        # Smoothstep-weighted bilinear lookup
+        fx = (gx - x0) / self.gust_size
+        fy = (gy - y0) / self.gust_size
+        ix = np.minimum(fx.astype(np.int64), cells_x - 2)
+        iy = np.minimum(fy.astype(np.int64), cells_y - 2)
+        tx = fx - ix
+        ty = fy - iy
+        tx = tx * tx * (3 - 2 * tx)
+        ty = ty * ty * (3 - 2 * ty)
+        top = lattice[iy, ix] * (1 - tx) + lattice[iy, ix + 1] * tx
+        bottom = lattice[iy + 1, ix] * (1 - tx) + lattice[iy + 1, ix + 1] * tx
+        noise = top * (1 - ty) + bottom * ty
+
+        return np.clip(1.0 + self.gustiness * 2.0 * (noise - 0.5), 0.0, None)
+
+    def strength(self, points, frames):
+        """
+        Trilinear interpolation of gust strength for many points and frames.
+
+        Args:
+            points: (n, 2) x/y positions
+            frames: (m,) frame numbers
+
+        Returns:
+            (n, m) array
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        frames = np.asarray(frames, dtype=np.float64).reshape(-1)
+
+        def axis(coords, origin, spacing, size):
+            f = np.clip((coords - origin) / spacing, 0.0, size - 1)
+            i = np.minimum(f.astype(np.int64), max(size - 2, 0))
+            return i, f - i
+
+        nt, ny, nx = self.values.shape
+        ix, wx = axis(points[:, 0], self.xs[0], self.cell_size, nx)
+        iy, wy = axis(points[:, 1], self.ys[0], self.cell_size, ny)
+        it, wt = axis(frames, self.ts[0], self.frame_step, nt)
+        ix1 = np.minimum(ix + 1, nx - 1)
+        iy1 = np.minimum(iy + 1, ny - 1)
+        it1 = np.minimum(it + 1, nt - 1)
+
+        # Points along axis 0, frames along axis 1
+        ix, ix1, wx = ix[:, None], ix1[:, None], wx[:, None]
+        iy, iy1, wy = iy[:, None], iy1[:, None], wy[:, None]
+        it, it1, wt = it[None, :], it1[None, :], wt[None, :]
+        v = self.values
+
+        def plane(t):
+            top = v[t, iy, ix] * (1 - wx) + v[t, iy, ix1] * wx
+            bottom = v[t, iy1, ix] * (1 - wx) + v[t, iy1, ix1] * wx
+            return top * (1 - wy) + bottom * wy
+
+        return plane(it) * (1 - wt) + plane(it1) * wt
+
+    def phase(self, points):
+        """Sway phase of each point: the wave reaches downwind plants later."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return -self.frequency * (points @ self.heading) / self.speed
+
+    def sway(self, points, frame_start, frame_end, step=5):
+        """
+        Unit sway of many plants over a frame window, in one array operation:
+            strength(p, t) * (lean + (1 - lean) * sin(frequency * (t - frame_start) + phase(p)))
+
+        Scale by a plant's own flexibility and project with heading to get
+        rotation offsets (tilt around the axis perpendicular to the wind).
+
+        Returns:
+            (frames, along): (m,) frame numbers and (n, m) unit sway
+        """
+        frames = np.arange(frame_start, frame_end + 1, step, dtype=np.float64)
+        oscillation = np.sin(self.frequency * (frames[None, :] - frame_start) + self.phase(points)[:, None])
+        along = self.strength(points, frames) * (self.lean + (1.0 - self.lean) * oscillation)
+        return frames, along
+
+    def sine_parameters(self, points, frame_start, frame_end):
+        """
+        Sine approximation of sway() for procedural / NLA animation modes.
+
+        Returns:
+            (mean, phase): (n,) window-averaged strength and (n,) phase
+        """
+        frames = np.linspace(frame_start, frame_end, 8)
+        return self.strength(points, frames).mean(axis=1), self.phase(points)